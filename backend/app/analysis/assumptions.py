@@ -3,12 +3,12 @@ import numpy as np
 from statsmodels.stats.outliers_influence import variance_inflation_factor
 from statsmodels.stats.diagnostic import het_breuschpagan
 from statsmodels.stats.stattools import durbin_watson
-from scipy.stats import shapiro
+
+from app.services import normality
 
 def check_normality(residuals):
     try:
-        stat, p = shapiro(residuals)
-        return {"statistic": stat, "p_value": p, "normal": p > 0.05}
+        return normality.test_values(residuals)
     except Exception:
         return {"error": "Normality check failed"}
 
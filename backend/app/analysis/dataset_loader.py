@@ -2,13 +2,17 @@ import pandas as pd
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.models.database import DatasetVersion
+from app.services import dataset_store
 
 
 def load_dataset(db: Session, project_id: int, dataset_version_id: int):
     dataset_version = db.query(DatasetVersion).filter_by(id=dataset_version_id, project_id=project_id).first()
     if not dataset_version:
         raise ValueError("Dataset version not found or does not belong to project.")
-    df = pd.read_csv(dataset_version.path)
+    if dataset_version.dataset_id and dataset_version.version_number is not None:
+        df = dataset_store.load_version(dataset_version.dataset_id, dataset_version.version_number)
+    else:
+        df = pd.read_csv(dataset_version.path)
     # Schema enforcement
     schema_summary = {}
     for col in df.columns:
@@ -1,11 +1,38 @@
+import csv
+import os
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
 from pathlib import Path
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from app.analytics.sketches import HyperLogLog, KLLSketch, ReservoirSample
+from app.services import column_executor
+from app.services.dataset_store import to_arrow_table
+try:
+    import pyreadstat
+except ImportError:
+    pyreadstat = None  # type: ignore
+
+# pandas.read_csv's default missing-value markers, so the Arrow and pandas
+# CSV paths agree on what counts as missing.
+PANDAS_NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a",
+    "nan", "null",
+]
 
 class DataIngestionEngine:
 
     SUPPORTED_FORMATS = [".csv", ".xlsx", ".xls", ".sav", ".dta"]
+    STREAM_BLOCK_SIZE = 16 << 20  # bytes of CSV parsed per chunk
+    SCHEMA_SAMPLE_BYTES = 1 << 20  # head of the file used for CSV type inference
+    CONVERT_CHUNK_ROWS = 50_000     # rows per chunk when converting xlsx/sav/dta
+    CATEGORY_MAX_UNIQUE = 1000        # text columns become category up to this many values
+    CATEGORY_MAX_UNIQUE_RATIO = 0.5   # ... and at most this share of their non-missing values
+    APPROXIMATE_MIN_ROWS = 2_000_000  # profile with sketches from this size up
+    PROFILE_CHUNK_ROWS = 1 << 20      # rows per chunk when sketching a loaded frame
 
     def __init__(self):
         self.audit_log = []
@@ -17,8 +44,10 @@ class DataIngestionEngine:
             "status": status
         })
 
-    def ingest(self, filepath: str) -> Tuple[pd.DataFrame, Dict]:
+    def ingest(self, filepath: str, compact: bool = True,
+               approximate: Optional[bool] = None) -> Tuple[pd.DataFrame, Dict]:
         self.audit_log = []
+        self.labels = {"variables": {}, "values": {}}
         path = Path(filepath)
         suffix = path.suffix.lower()
 
@@ -28,26 +57,357 @@ class DataIngestionEngine:
         self.log("load", f"Loading {suffix} file: {path.name}")
         df = self._load_file(filepath, suffix)
         self.log("load", f"Loaded {len(df)} rows, {len(df.columns)} columns")
+        compaction = self._compact_dtypes(df) if compact else None
 
-        quality_report = self._profile(df)
-        quality_report["column_types"] = self._detect_types(df)
-        quality_report["issues"] = self._flag_issues(df, quality_report)
+        quality_report = self.profile(df, approximate)
+        quality_report["compaction"] = compaction
+        quality_report["labels"] = self.labels
+        quality_report["audit_log"] = self.audit_log
+
+        return df, quality_report
+
+    def profile(self, df: pd.DataFrame, approximate: Optional[bool] = None) -> Dict:
+        """Profile, column types and issues for an already loaded frame.
+
+        ``approximate=None`` uses sketches (see ``_StreamingProfile``) from
+        APPROXIMATE_MIN_ROWS rows up; the report then has an ``approximation``
+        section with error bounds. ``approximate=False`` always recomputes
+        exactly.
+        """
+        if approximate is None:
+            approximate = len(df) >= self.APPROXIMATE_MIN_ROWS
+        if not approximate:
+            scan = _scan_frame(df)
+            report = self._profile(df, scan)
+            report["column_types"] = self._detect_types(df, scan["nunique"])
+            report["issues"] = self._flag_issues(df, report, dup_count=scan["duplicates"])
+            return report
+        self.log("profile", "Profiling dataset with sketches")
+        profile = _StreamingProfile(approximate=True)
+        for start in range(0, max(len(df), 1), self.PROFILE_CHUNK_ROWS):
+            profile.update(df.iloc[start:start + self.PROFILE_CHUNK_ROWS])
+        return self._finish_profile(df, profile)
+
+    def _finish_profile(self, df, profile):
+        report = profile.finalize(df)
+        report["column_types"] = self._detect_types(df, profile.nunique())
+        report["issues"] = self._flag_issues(df, report, dup_count=profile.duplicate_count())
+        if profile.approximate:
+            report["approximation"] = profile.approximation()
+        return report
+
+    def update_profile(self, report: Dict, df: pd.DataFrame, columns, dup_count=None) -> Dict:
+        """Refresh a ``profile`` report in place after edits to ``columns``.
+
+        Only the edited columns are rescanned; issues are rebuilt from the
+        per-column entries (pass ``dup_count`` to skip the duplicate scan).
+        Rows must not have been added or removed.
+        """
+        self.log("profile", f"Updating profile for {len(columns)} edited column(s)")
+        part = df[list(columns)]
+        scan = _scan_frame(part)
+        for col in columns:
+            missing = scan["missing"][col]
+            report["missing_values"][col] = int(missing)
+            report["missing_percentage"][col] = round(float(missing / len(df) * 100), 2)
+        summary = report["numeric_summary"]
+        for col in columns:
+            summary.pop(col, None)
+        for col, stats in scan["numeric"].items():
+            summary[col] = {
+                key: round(float(stats[key]), 4)
+                for key in ("mean", "std", "min", "max", "median")
+            }
+        report["numeric_summary"] = {col: summary[col] for col in df.columns if col in summary}
+        report["column_types"].update(self._detect_types(part, scan["nunique"]))
+        for col in columns:
+            report.get("approximation", {}).get("columns", {}).pop(col, None)
+            report.get("approximation", {}).get("histograms", {}).pop(col, None)
+        report["issues"] = self._flag_issues(df, report, dup_count=dup_count)
+        return report
+
+    def ingest_stream(self, filepath: str, writer, compact: bool = True,
+                      approximate: Optional[bool] = None) -> Tuple[pd.DataFrame, Dict]:
+        """Ingest a CSV block by block without materialising it first.
+
+        The file is parsed twice, one block at a time. The first pass folds
+        each block into a running profile and gathers what dtype compaction
+        needs (value ranges, float32 exactness, distinct values up to
+        CATEGORY_MAX_UNIQUE); the second casts each block to the compacted
+        types and hands it to ``writer.write_batch`` (see
+        ``dataset_store.open_writer``), so the data is written once. The
+        returned frame is built from the memory-mapped table returned by
+        ``writer.commit()``, as ``dataset_store.load_dataset`` builds it:
+        numeric columns without missing values are not copied, the others
+        are materialised. Statistics that need a full column (median,
+        distinct counts for type detection) are finished from it.
+        Raises ``pyarrow.ArrowInvalid`` if a later block contradicts the
+        schema inferred from the first one; callers can fall back to
+        ``ingest``. With ``approximate=None`` the row count is estimated
+        from the first block and the file size to decide whether to profile
+        with sketches (see ``profile``).
+        """
+        self.audit_log = []
+        path = Path(filepath)
+        self.log("load", f"Streaming .csv file: {path.name}")
+
+        encoding, delimiter = _sniff_csv(filepath)
+
+        def open_reader(column_types):
+            return pa_csv.open_csv(
+                filepath,
+                read_options=pa_csv.ReadOptions(
+                    block_size=self.STREAM_BLOCK_SIZE, encoding=encoding,
+                ),
+                parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+                convert_options=pa_csv.ConvertOptions(
+                    column_types=column_types,
+                    null_values=PANDAS_NA_VALUES, strings_can_be_null=True,
+                ),
+            )
+
+        # Dates and times stay text, as pandas reads them: Arrow would
+        # normalise them (ISO 'T', UTC offsets) if it parsed them.
+        reader = open_reader({})
+        temporal = {f.name: pa.string() for f in reader.schema if pa.types.is_temporal(f.type)}
+        if temporal:
+            reader = open_reader(temporal)
+
+        profile = None
+        scan = _CompactionScan(self.CATEGORY_MAX_UNIQUE) if compact else None
+        file_size = os.path.getsize(filepath)
+        for batch in reader:
+            if profile is None:
+                if approximate is None:
+                    blocks = max(1.0, file_size / self.STREAM_BLOCK_SIZE)
+                    approximate = batch.num_rows * blocks >= self.APPROXIMATE_MIN_ROWS
+                profile = _StreamingProfile(approximate=approximate)
+            chunk = batch.to_pandas()
+            profile.update(chunk)
+            if scan is not None:
+                scan.update(chunk)
+        schema = reader.schema
+        if profile is None:  # header-only file
+            profile = _StreamingProfile(approximate=bool(approximate))
+            writer.write_batch(pa.RecordBatch.from_pylist([], schema=schema))
+        else:
+            targets = scan.targets(self, schema, profile) if scan is not None else {}
+            fixed = {f.name: f.type for f in schema if not pa.types.is_null(f.type)}
+            for batch in open_reader(fixed):
+                writer.write_batch(_cast_batch(batch, targets))
+        df = writer.commit().to_pandas(split_blocks=True)
+        self.log("load", f"Loaded {len(df)} rows, {len(df.columns)} columns "
+                         f"in {profile.n_chunks} chunks")
+        compaction = scan.report(self, df) if scan is not None else None
+
+        self.log("profile", "Profiling dataset")
+        quality_report = self._finish_profile(df, profile)
+        quality_report["compaction"] = compaction
+        quality_report["labels"] = {"variables": {}, "values": {}}
         quality_report["audit_log"] = self.audit_log
 
         return df, quality_report
 
     def _load_file(self, filepath, suffix):
         loaders = {
-            ".csv":  lambda f: pd.read_csv(f),
-            ".xlsx": lambda f: pd.read_excel(f),
+            ".csv":  self._read_csv,
+            ".xlsx": self._read_xlsx,
             ".xls":  lambda f: pd.read_excel(f),
-            ".sav":  lambda f: pd.read_spss(f),
-            ".dta":  lambda f: pd.read_stata(f),
+            ".sav":  self._read_spss,
+            ".dta":  self._read_stata,
         }
         return loaders[suffix](filepath)
 
-    def _profile(self, df):
+    # -- converters for xlsx / sav / dta ----------------------------------
+    #
+    # Each reads its source in CONVERT_CHUNK_ROWS chunks with a streaming
+    # reader and records variable and value labels in ``self.labels``. The
+    # upload route stores the result as Arrow and caches it by content hash,
+    # so a file is only converted once.
+
+    def _read_xlsx(self, filepath):
+        import openpyxl
+
+        wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+        try:
+            rows = wb.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None or any(h is None for h in header) \
+                    or len(set(header)) != len(header):
+                # Blank/duplicate headers need pandas' renaming rules.
+                return pd.read_excel(filepath)
+            header = [str(h) for h in header]
+
+            def chunks():
+                batch = []
+                for row in rows:
+                    if all(v is None for v in row):
+                        continue
+                    batch.append(row)
+                    if len(batch) == self.CONVERT_CHUNK_ROWS:
+                        yield pd.DataFrame.from_records(batch, columns=header)
+                        batch = []
+                if batch:
+                    yield pd.DataFrame.from_records(batch, columns=header)
+
+            df = _concat_chunks(chunks(), header)
+        finally:
+            wb.close()
+        self.log("load", f"Converted workbook in read-only mode ({len(df)} rows)")
+        return df
+
+    def _read_stata(self, filepath):
+        with pd.read_stata(filepath, chunksize=self.CONVERT_CHUNK_ROWS) as reader:
+            df = _concat_chunks(reader)
+            variable_labels = reader.variable_labels()
+            label_sets = reader.value_labels()
+            # Stata attaches value-label sets to variables by name; the
+            # reader keeps that mapping alongside its variable list.
+            lbllist = dict(zip(getattr(reader, "_varlist", []), getattr(reader, "_lbllist", [])))
+        self.labels = {
+            "variables": {k: v for k, v in variable_labels.items() if v},
+            "values": {
+                var: {str(code): label for code, label in label_sets[name].items()}
+                for var, name in lbllist.items() if name in label_sets
+            },
+        }
+        self.log("load", f"Converted Stata file in chunks ({len(df)} rows)")
+        return df
+
+    def _read_spss(self, filepath):
+        if pyreadstat is None:
+            raise ValueError("Reading .sav files requires the pyreadstat package")
+        meta = None
+
+        def chunks():
+            nonlocal meta
+            for chunk, meta in pyreadstat.read_file_in_chunks(
+                pyreadstat.read_sav, filepath,
+                chunksize=self.CONVERT_CHUNK_ROWS, apply_value_formats=True,
+            ):
+                yield chunk
+
+        df = _concat_chunks(chunks())
+        if meta is not None:
+            self.labels = {
+                "variables": {k: v for k, v in meta.column_names_to_labels.items() if v},
+                "values": {
+                    var: {_label_key(code): label for code, label in labels.items()}
+                    for var, labels in meta.variable_value_labels.items()
+                },
+            }
+        self.log("load", f"Converted SPSS file in chunks ({len(df)} rows)")
+        return df
+
+    def _read_csv(self, filepath):
+        """Parse a CSV with Arrow's multithreaded reader, falling back to pandas.
+
+        Delimiter and encoding are sniffed from the head of the file. Column
+        types are inferred from the first SCHEMA_SAMPLE_BYTES only and then
+        imposed on the full parse, with dates kept as text as pandas does.
+        Anything Arrow can't reproduce faithfully (a later row contradicting
+        the sampled types, duplicate or blank header names) goes through
+        ``pd.read_csv`` instead.
+        """
+        encoding, delimiter = _sniff_csv(filepath)
+        parse_options = pa_csv.ParseOptions(delimiter=delimiter)
+        try:
+            sample = pa_csv.open_csv(
+                filepath,
+                read_options=pa_csv.ReadOptions(
+                    block_size=self.SCHEMA_SAMPLE_BYTES, encoding=encoding,
+                ),
+                parse_options=parse_options,
+                convert_options=pa_csv.ConvertOptions(
+                    null_values=PANDAS_NA_VALUES, strings_can_be_null=True,
+                ),
+            ).schema
+            names = sample.names
+            if len(set(names)) != len(names) or not all(names):
+                raise ValueError("header needs pandas' column renaming")
+            column_types = {
+                f.name: pa.string() if pa.types.is_temporal(f.type) else f.type
+                for f in sample if not pa.types.is_null(f.type)
+            }
+            table = pa_csv.read_csv(
+                filepath,
+                read_options=pa_csv.ReadOptions(use_threads=True, encoding=encoding),
+                parse_options=parse_options,
+                convert_options=pa_csv.ConvertOptions(
+                    column_types=column_types,
+                    null_values=PANDAS_NA_VALUES, strings_can_be_null=True,
+                ),
+            )
+        except (pa.ArrowInvalid, ValueError, UnicodeError) as e:
+            self.log("load", f"Arrow CSV parse failed ({e}); using pandas", "warning")
+            return pd.read_csv(filepath, sep=delimiter, encoding=encoding)
+
+        table = _dates_as_strings(table)
+        # Columns empty in the sample and the file: pandas reads them as float NaN.
+        table = table.cast(pa.schema([
+            pa.field(f.name, pa.float64()) if pa.types.is_null(f.type) else f
+            for f in table.schema
+        ]))
+        self.log("load", f"Parsed CSV with Arrow (delimiter {delimiter!r}, encoding {encoding})")
+        return table.to_pandas()
+
+    def _compact_dtypes(self, df):
+        """Shrink column dtypes in place and report the bytes saved.
+
+        Integers are downcast to the smallest signed type that holds their
+        range (so 0/1 flags become int8), float64 columns become float32 only
+        when every value survives the round trip exactly, and string columns
+        with at most CATEGORY_MAX_UNIQUE distinct values (and no more than
+        CATEGORY_MAX_UNIQUE_RATIO of their non-missing values) become
+        ``category``. Narrowed columns are widened again by
+        ``data_cleaner.fill_missing`` when an edit needs it.
+        """
+        self.log("compaction", "Compacting column dtypes")
+        bytes_before = int(df.memory_usage(deep=True).sum())
+        converted = {}
+        for col in df.columns:
+            series = df[col]
+            compacted = self._compact_series(series)
+            if compacted is not None:
+                converted[col] = f"{series.dtype} -> {compacted.dtype}"
+                df[col] = compacted
+        bytes_after = int(df.memory_usage(deep=True).sum())
+        self.log("compaction", f"Compacted {len(converted)} columns, "
+                               f"saved {bytes_before - bytes_after} bytes")
+        return {
+            "bytes_before": bytes_before,
+            "bytes_after":  bytes_after,
+            "bytes_saved":  bytes_before - bytes_after,
+            "converted":    converted,
+        }
+
+    def _compact_series(self, series):
+        if pd.api.types.is_bool_dtype(series):
+            return None
+        if pd.api.types.is_integer_dtype(series):
+            down = pd.to_numeric(series, downcast="integer")
+            return down if down.dtype != series.dtype else None
+        if series.dtype == np.float64:
+            down = series.astype(np.float32)
+            same = np.array_equal(
+                down.to_numpy(dtype=np.float64), series.to_numpy(), equal_nan=True
+            )
+            return down if same else None
+        if series.dtype == object:
+            n_valid = int(series.count())
+            if n_valid == 0 or pd.api.types.infer_dtype(series, skipna=True) != "string":
+                return None
+            if self._low_cardinality(series.nunique(), n_valid):
+                return series.astype("category")
+        return None
+
+    def _low_cardinality(self, nunique: int, n_valid: int) -> bool:
+        return nunique <= min(self.CATEGORY_MAX_UNIQUE, self.CATEGORY_MAX_UNIQUE_RATIO * n_valid)
+
+    def _profile(self, df, scan=None):
         self.log("profile", "Profiling dataset")
+        if scan is None:
+            scan = _scan_frame(df)
         profile = {
             "row_count": len(df),
             "column_count": len(df.columns),
@@ -56,33 +416,30 @@ class DataIngestionEngine:
             "missing_percentage": {},
             "numeric_summary": {},
         }
-        for col in df.columns:
-            missing = df[col].isna().sum()
+        for col, missing in scan["missing"].items():
             profile["missing_values"][col] = int(missing)
             profile["missing_percentage"][col] = round(
                 float(missing / len(df) * 100), 2
             )
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
-        for col in numeric_cols:
+        for col, stats in scan["numeric"].items():
             profile["numeric_summary"][col] = {
-                "mean":   round(float(df[col].mean()), 4),
-                "std":    round(float(df[col].std()), 4),
-                "min":    round(float(df[col].min()), 4),
-                "max":    round(float(df[col].max()), 4),
-                "median": round(float(df[col].median()), 4),
+                key: round(float(stats[key]), 4)
+                for key in ("mean", "std", "min", "max", "median")
             }
         return profile
 
-    def _detect_types(self, df):
+    def _detect_types(self, df, nunique=None):
         self.log("type_detection", "Detecting column types")
+        if nunique is None:
+            nunique = _scan_frame(df)["nunique"]
         types = {}
         for col in df.columns:
             col_lower = col.lower()
-            if df[col].dtype in [np.int64, np.float64]:
-                unique_ratio = df[col].nunique() / len(df)
+            if pd.api.types.is_integer_dtype(df[col]) or pd.api.types.is_float_dtype(df[col]):
+                unique_ratio = nunique[col] / len(df)
                 types[col] = "categorical" if unique_ratio < 0.05 else "continuous"
-            elif df[col].dtype == object:
-                types[col] = "categorical" if df[col].nunique() < 15 else "text"
+            elif df[col].dtype == object or isinstance(df[col].dtype, pd.CategoricalDtype):
+                types[col] = "categorical" if nunique[col] < 15 else "text"
             else:
                 types[col] = "other"
             if any(k in col_lower for k in ["date","dob","birth","admit"]):
@@ -97,7 +454,7 @@ class DataIngestionEngine:
                 types[col] = "demographic_categorical"
         return types
 
-    def _flag_issues(self, df, profile):
+    def _flag_issues(self, df, profile, dup_count=None):
         self.log("validation", "Running quality checks")
         issues = []
         for col, pct in profile["missing_percentage"].items():
@@ -109,7 +466,8 @@ class DataIngestionEngine:
                     "message": f"{col} has {pct}% missing values",
                     "recommendation": "Consider imputation or exclusion"
                 })
-        dup_count = int(df.duplicated().sum())
+        if dup_count is None:
+            dup_count = int(df.duplicated().sum())
         if dup_count > 0:
             issues.append({
                 "type": "duplicates",
@@ -154,3 +512,536 @@ class DataIngestionEngine:
                 )
         report["rows_after"] = len(df_clean)
         return df_clean, report
+
+
+_ROW_HASH_MULT = np.uint64(1000003)
+
+
+def _scan_frame(df: pd.DataFrame) -> Dict[str, Any]:
+    """Everything the quality report needs, in one pass over each column.
+
+    Column batches are scanned on the shared column executor by
+    ``_scan_columns``; each batch's row hashes are folded together in batch
+    order, so duplicate rows are counted without hashing the frame a second
+    time.
+    """
+    missing, nunique, numeric = {}, {}, {}
+    row_hash = np.zeros(len(df), dtype=np.uint64)
+    for part in column_executor.map_batches(_scan_columns, df):
+        missing.update(part["missing"])
+        nunique.update(part["nunique"])
+        numeric.update(part["numeric"])
+        row_hash = (row_hash ^ part["row_hash"]) * _ROW_HASH_MULT
+
+    return {
+        "missing": {col: missing[col] for col in df.columns},
+        "nunique": {col: nunique[col] for col in df.columns},
+        "numeric": {col: numeric[col] for col in df.columns if col in numeric},
+        "duplicates": _duplicate_hashes(row_hash) if len(df.columns) else 0,
+    }
+
+
+def _scan_columns(df: pd.DataFrame, columns: List) -> Dict[str, Any]:
+    """Scan one batch of columns for ``_scan_frame``.
+
+    Numeric columns are summarised a dtype block at a time by
+    ``_numeric_block``; the other columns are factorized once for their
+    missing and distinct counts. Every column contributes a 64-bit hash per
+    row (the same scheme as the streaming profile).
+    """
+    missing, nunique, numeric = {}, {}, {}
+    row_hash = np.zeros(len(df), dtype=np.uint64)
+
+    def add_hash(values):
+        nonlocal row_hash
+        row_hash = (row_hash ^ pd.util.hash_array(values, categorize=False)) * _ROW_HASH_MULT
+
+    blocks: Dict[np.dtype, list] = {}
+    for col in columns:
+        dtype = df[col].dtype
+        if isinstance(dtype, np.dtype) and dtype.kind in "iuf":
+            blocks.setdefault(dtype, []).append(col)
+            continue
+        codes, uniques = pd.factorize(df[col])
+        missing[col] = (codes < 0).sum()
+        nunique[col] = len(uniques)
+        add_hash(codes)
+        if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+            # Nullable extension dtypes keep pandas' masked reductions.
+            series = df[col]
+            numeric[col] = {
+                "mean": series.mean(), "std": series.std(), "min": series.min(),
+                "max": series.max(), "median": series.median(),
+            }
+    for cols in blocks.values():
+        values = np.column_stack([df[col].to_numpy() for col in cols])
+        for col, stats in zip(cols, _numeric_block(values)):
+            missing[col] = stats.pop("missing")
+            nunique[col] = stats.pop("nunique")
+            add_hash(stats.pop("hash_values"))
+            numeric[col] = stats
+
+    return {"missing": missing, "nunique": nunique, "numeric": numeric, "row_hash": row_hash}
+
+
+def _duplicate_hashes(hashes: np.ndarray) -> int:
+    # Sorting 64-bit keys is several times faster than a hash-table unique.
+    ordered = np.sort(hashes)
+    return int((ordered[1:] == ordered[:-1]).sum())
+
+
+def _numeric_block(values: np.ndarray):
+    """Profile each column of a 2-D single-dtype block.
+
+    Sums follow pandas' nanops: float columns accumulate in their own dtype
+    for the mean, variance is two-pass in float64 and cast back, and integer
+    columns are promoted to float64. The block is Fortran-ordered so numpy's
+    pairwise summation runs down each column as it does for a 1-D array.
+    One sort along the rows (NaN last) gives the medians and distinct counts.
+    Also returns each column's values with NaN and -0.0 canonicalised, for
+    row hashing.
+    """
+    dtype = values.dtype
+    values = np.asfortranarray(values)
+    n, k = values.shape
+
+    if dtype.kind == "f":
+        mask = np.isnan(values)
+        valid = n - mask.sum(axis=0)
+        filled = np.where(mask, dtype.type(0), values)
+        count = valid.astype(dtype)
+        total = filled.sum(axis=0, dtype=dtype)
+        hashable = np.where(mask, dtype.type(np.nan), values + dtype.type(0))
+    else:
+        mask = None
+        valid = np.full(k, n)
+        filled = values.astype(np.float64)
+        count = valid.astype(np.float64)
+        total = values.sum(axis=0, dtype=np.float64)
+        hashable = values
+    with np.errstate(all="ignore"):
+        mean = np.where(valid > 0, total / count, np.nan)
+
+        avg = filled.sum(axis=0, dtype=np.float64) / count
+        sqr = (avg - filled) ** 2
+        if mask is not None:
+            np.putmask(sqr, mask, 0)
+        var = np.where(valid > 1, sqr.sum(axis=0, dtype=np.float64) / (count - 1), np.nan)
+    if dtype.kind == "f":
+        var = var.astype(dtype)
+    std = np.sqrt(var)
+
+    # min/max as masked reductions rather than from the sort, so the sign of
+    # a zero result is the one pandas reports.
+    if n == 0:
+        lo = hi = np.full(k, np.nan)
+    elif mask is not None:
+        lo = np.where(mask, np.inf, values).min(axis=0)
+        hi = np.where(mask, -np.inf, values).max(axis=0)
+    else:
+        lo, hi = values.min(axis=0), values.max(axis=0)
+
+    ordered = np.sort(values, axis=0)
+    in_range = np.arange(max(n - 1, 0))[:, None] < (valid - 1)
+    nunique = ((ordered[1:] != ordered[:-1]) & in_range).sum(axis=0) + (valid > 0)
+    if dtype.kind != "f":
+        ordered = ordered.astype(np.float64)  # pandas takes int medians in float64
+    median = np.full(k, np.nan)
+    if n:
+        cols = np.arange(k)
+        low = ordered[np.maximum(valid - 1, 0) // 2, cols]
+        high = ordered[np.minimum(valid // 2, n - 1), cols]
+        with np.errstate(all="ignore"):
+            median = np.where(valid % 2 == 1, low, (low + high) / low.dtype.type(2))
+
+    out = []
+    for j in range(k):
+        stats = {"mean": mean[j], "std": std[j], "min": lo[j], "max": hi[j], "median": median[j]}
+        if valid[j] == 0:
+            stats = dict.fromkeys(stats, np.nan)
+        stats.update(missing=n - valid[j], nunique=int(nunique[j]), hash_values=hashable[:, j])
+        out.append(stats)
+    return out
+
+
+def _dates_as_strings(batch):
+    # Arrow infers ISO dates; pandas.read_csv leaves them as text, and the
+    # rest of the pipeline expects that. Accepts a RecordBatch or a Table.
+    if not any(pa.types.is_temporal(f.type) for f in batch.schema):
+        return batch
+    columns = [
+        col.cast(pa.string()) if pa.types.is_temporal(col.type) else col
+        for col in batch.columns
+    ]
+    return type(batch).from_arrays(columns, names=batch.schema.names)
+
+
+def _concat_chunks(chunks: Iterable[pd.DataFrame], columns=None) -> pd.DataFrame:
+    """Convert DataFrame chunks to Arrow and concatenate them into one frame.
+
+    Types are widened across chunks (an int column that gains missing values
+    in a later chunk becomes float) and category dictionaries are unified.
+    A column that cannot be widened (numbers in one chunk, text in another)
+    is stored as text, as ``to_arrow_table`` does for a mixed column read
+    in one piece.
+    """
+    tables = [to_arrow_table(chunk) for chunk in chunks]
+    if not tables:
+        return pd.DataFrame(columns=columns)
+    try:
+        table = pa.concat_tables(tables, promote_options="permissive")
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        table = pa.concat_tables(_conflicts_as_text(tables), promote_options="permissive")
+    return table.unify_dictionaries().to_pandas()
+
+
+def _conflicts_as_text(tables: List[pa.Table]) -> List[pa.Table]:
+    conflicting = []
+    for name in tables[0].schema.names:
+        fields = [pa.schema([t.schema.field(name)]) for t in tables]
+        try:
+            pa.unify_schemas(fields, promote_options="permissive")
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            conflicting.append(name)
+    out = []
+    for table in tables:
+        for name in conflicting:
+            i = table.schema.get_field_index(name)
+            table = table.set_column(i, pa.field(name, pa.string()), table.column(i).cast(pa.string()))
+        out.append(table)
+    return out
+
+
+def _label_key(code) -> str:
+    # SPSS stores numeric codes as doubles; 1.0 reads better as "1".
+    if isinstance(code, float) and code.is_integer():
+        return str(int(code))
+    return str(code)
+
+
+def _sniff_csv(filepath, sample_bytes: int = 64 << 10) -> Tuple[str, str]:
+    """Guess ``(encoding, delimiter)`` from the head of a CSV file."""
+    with open(filepath, "rb") as fh:
+        head = fh.read(sample_bytes)
+    if head.startswith((b"\xff\xfe", b"\xfe\xff")):
+        encoding = "utf-16"
+    else:
+        # Drop a possibly truncated last line so multi-byte characters
+        # split by the sample boundary don't fail the decode.
+        complete = head[:head.rfind(b"\n") + 1] or head
+        encoding = "latin-1"
+        for candidate in ("utf-8", "cp1252"):
+            try:
+                complete.decode(candidate)
+                encoding = candidate
+                break
+            except UnicodeDecodeError:
+                continue
+    text = head.decode(encoding, errors="ignore").lstrip("\ufeff")
+    lines = text.splitlines()
+    delimiter = ","
+    try:
+        sniffed = csv.Sniffer().sniff("\n".join(lines[:50]), delimiters=",;\t|").delimiter
+        if lines and sniffed in lines[0]:
+            delimiter = sniffed
+    except csv.Error:
+        pass
+    return encoding, delimiter
+
+
+class _CompactionScan:
+    """What ``_compact_series`` needs to know about each column, gathered
+    one chunk at a time so a streamed file can be written in its compacted
+    types directly."""
+
+    def __init__(self, max_unique: int):
+        self.max_unique = max_unique
+        self.dtypes = {}    # pandas dtype of the whole column, before compaction
+        self.lo, self.hi = {}, {}
+        self.inexact = set()  # values that do not survive float32
+        self.distinct = {}  # text values, or None past max_unique
+        self.bytes = 0
+
+    def update(self, chunk: pd.DataFrame):
+        self.bytes += int(chunk.memory_usage(deep=True, index=False).sum())
+        for col in chunk.columns:
+            series = chunk[col]
+            dtype = self.dtypes.get(col, series.dtype)
+            # A column with a gap in any chunk is float64 as a whole.
+            self.dtypes[col] = series.dtype if dtype == np.int64 and series.dtype == np.float64 else dtype
+            if pd.api.types.is_bool_dtype(series):
+                continue
+            if pd.api.types.is_integer_dtype(series) or series.dtype == np.float64:
+                values = series.to_numpy()
+                if pd.api.types.is_integer_dtype(series) and len(values):
+                    self.lo[col] = min(self.lo.get(col, values.min()), values.min())
+                    self.hi[col] = max(self.hi.get(col, values.max()), values.max())
+                wide = values.astype(np.float64)
+                if not np.array_equal(wide.astype(np.float32).astype(np.float64), wide, equal_nan=True):
+                    self.inexact.add(col)
+            elif series.dtype == object and self.distinct.get(col, ()) is not None:
+                seen = self.distinct.setdefault(col, set())
+                seen.update(series.dropna().unique())
+                if len(seen) > self.max_unique:
+                    self.distinct[col] = None
+
+    def targets(self, engine: "DataIngestionEngine", schema: pa.Schema,
+                profile: "_StreamingProfile") -> Dict[str, Any]:
+        """``{column: Arrow type or dictionary}`` for the columns to compact,
+        decided as ``_compact_series`` would for the whole column."""
+        out = {}
+        for field in schema:
+            col, dtype = field.name, self.dtypes.get(field.name)
+            if pa.types.is_integer(field.type) and dtype == np.int64 and col in self.lo:
+                for candidate in (np.int8, np.int16, np.int32):
+                    info = np.iinfo(candidate)
+                    if info.min <= self.lo[col] and self.hi[col] <= info.max:
+                        out[col] = pa.from_numpy_dtype(candidate)
+                        break
+            elif dtype == np.float64 and col not in self.inexact:
+                out[col] = pa.float32()
+            elif pa.types.is_string(field.type) and self.distinct.get(col):
+                n_valid = profile.n_rows - profile.missing.get(col, 0)
+                if engine._low_cardinality(len(self.distinct[col]), n_valid):
+                    out[col] = pa.array(sorted(self.distinct[col]), type=pa.string())
+        self._targets = out
+        return out
+
+    def report(self, engine: "DataIngestionEngine", df: pd.DataFrame) -> Dict[str, Any]:
+        bytes_after = int(df.memory_usage(deep=True, index=False).sum())
+        converted = {col: f"{self.dtypes[col]} -> {df[col].dtype}" for col in self._targets}
+        engine.log("compaction", f"Compacted {len(converted)} columns, "
+                                 f"saved {self.bytes - bytes_after} bytes")
+        return {
+            "bytes_before": self.bytes,
+            "bytes_after":  bytes_after,
+            "bytes_saved":  self.bytes - bytes_after,
+            "converted":    converted,
+        }
+
+
+def _cast_batch(batch: pa.RecordBatch, targets: Dict[str, Any]) -> pa.RecordBatch:
+    if not targets:
+        return batch
+    columns = []
+    for name, column in zip(batch.schema.names, batch.columns):
+        target = targets.get(name)
+        if isinstance(target, pa.Array):
+            # One shared dictionary, so every batch of the file agrees.
+            column = pa.DictionaryArray.from_arrays(pc.index_in(column, value_set=target), target)
+        elif target is not None:
+            column = column.cast(target)
+        columns.append(column)
+    return pa.RecordBatch.from_arrays(columns, names=batch.schema.names)
+
+
+class _StreamingProfile:
+    """Running version of ``DataIngestionEngine._profile`` fed one chunk at a time.
+
+    Missing counts, mean/std (Chan's parallel update), min and max are
+    accumulated per chunk; row hashes are kept (8 bytes per row) so the
+    duplicate count covers the whole file. With ``approximate=True`` each
+    column also gets a HyperLogLog sketch for its distinct count, numeric
+    columns a KLL sketch for the median, and a shared reservoir row sample
+    backs the histograms, so ``finalize`` never needs a full column.
+    Profiles of different chunks can be combined with ``merge``.
+    """
+
+    HISTOGRAM_BINS = 20
+
+    def __init__(self, approximate: bool = False, seed: int = 0):
+        self.approximate = approximate
+        self.n_rows = 0
+        self.n_chunks = 0
+        self.columns = None
+        self.missing = {}
+        self.numeric = {}
+        self.distinct: Dict[str, HyperLogLog] = {}
+        self.quantiles: Dict[str, KLLSketch] = {}
+        self.sample = ReservoirSample(seed=seed) if approximate else None
+        self._seed = seed
+        self._row_hashes = []
+
+    def update(self, chunk: pd.DataFrame):
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            self.missing = {col: 0 for col in self.columns}
+        self.n_rows += len(chunk)
+        self.n_chunks += 1
+
+        for col, count in chunk.isna().sum().items():
+            self.missing[col] += int(count)
+
+        numeric = chunk.select_dtypes(include=[np.number])
+        sampled = {}
+        for col in numeric.columns:
+            values = numeric[col].to_numpy(dtype=float, na_value=np.nan)
+            if self.approximate:
+                sampled[col] = values
+                self.quantiles.setdefault(col, KLLSketch(seed=self._seed)).update(values)
+            values = values[~np.isnan(values)]
+            if len(values) == 0:
+                continue
+            acc = self.numeric.setdefault(
+                col, {"n": 0, "mean": 0.0, "m2": 0.0, "min": np.inf, "max": -np.inf}
+            )
+            _merge_moments(acc, {
+                "n": len(values), "mean": float(values.mean()),
+                "m2": float(((values - values.mean()) ** 2).sum()),
+                "min": float(values.min()), "max": float(values.max()),
+            })
+        if self.approximate:
+            self.sample.update(sampled, len(chunk))
+
+        # Hash numerics as float so a column that is int64 in one chunk and
+        # float64 (because of a gap) in the next still hashes consistently.
+        row_hash = np.zeros(len(chunk), dtype=np.uint64)
+        for col in chunk.columns:
+            series = chunk[col].astype(float) if col in numeric.columns else chunk[col]
+            hashes = pd.util.hash_pandas_object(series, index=False).to_numpy()
+            if self.approximate:
+                self.distinct.setdefault(col, HyperLogLog()).update(hashes[series.notna().to_numpy()])
+            row_hash = (row_hash ^ hashes) * _ROW_HASH_MULT
+        self._row_hashes.append(row_hash)
+
+    def merge(self, other: "_StreamingProfile") -> "_StreamingProfile":
+        """Fold in the profile of another part of the same file (in row order)."""
+        if other.columns is None:
+            return self
+        if self.columns is None:
+            self.columns = list(other.columns)
+            self.missing = {col: 0 for col in self.columns}
+        self.n_rows += other.n_rows
+        self.n_chunks += other.n_chunks
+        for col, count in other.missing.items():
+            self.missing[col] = self.missing.get(col, 0) + count
+        for col, acc in other.numeric.items():
+            if col in self.numeric:
+                _merge_moments(self.numeric[col], acc)
+            else:
+                self.numeric[col] = dict(acc)
+        for col, sketch in other.distinct.items():
+            if col in self.distinct:
+                self.distinct[col].merge(sketch)
+            else:
+                self.distinct[col] = sketch
+        for col, sketch in other.quantiles.items():
+            if col in self.quantiles:
+                self.quantiles[col].merge(sketch)
+            else:
+                self.quantiles[col] = sketch
+        if self.sample is not None and other.sample is not None:
+            self.sample.merge(other.sample)
+        self._row_hashes.extend(other._row_hashes)
+        return self
+
+    def duplicate_count(self) -> int:
+        if not self._row_hashes:
+            return 0
+        return _duplicate_hashes(np.concatenate(self._row_hashes))
+
+    def nunique(self):
+        """Estimated distinct counts, or None for an exact profile."""
+        if not self.approximate:
+            return None
+        return {
+            col: int(round(self.distinct[col].estimate())) if col in self.distinct else 0
+            for col in self.columns or []
+        }
+
+    def finalize(self, df: pd.DataFrame) -> Dict:
+        columns = list(df.columns)
+        profile = {
+            "row_count": self.n_rows,
+            "column_count": len(columns),
+            "columns": columns,
+            "missing_values": {},
+            "missing_percentage": {},
+            "numeric_summary": {},
+        }
+        for col in columns:
+            missing = self.missing.get(col, 0)
+            profile["missing_values"][col] = int(missing)
+            profile["missing_percentage"][col] = round(
+                float(missing / self.n_rows * 100), 2
+            ) if self.n_rows else 0.0
+        for col in df.select_dtypes(include=[np.number]).columns:
+            acc = self.numeric.get(col)
+            if acc is None:
+                mean = std = lo = hi = np.nan
+            else:
+                mean = acc["mean"]
+                std = np.sqrt(acc["m2"] / (acc["n"] - 1)) if acc["n"] > 1 else np.nan
+                lo, hi = acc["min"], acc["max"]
+            if self.approximate:
+                median = self.quantiles[col].quantile(0.5) if col in self.quantiles else np.nan
+            else:
+                median = df[col].median()
+            profile["numeric_summary"][col] = {
+                "mean":   round(float(mean), 4),
+                "std":    round(float(std), 4),
+                "min":    round(float(lo), 4),
+                "max":    round(float(hi), 4),
+                "median": round(float(median), 4),
+            }
+        return profile
+
+    def approximation(self) -> Dict:
+        """Error bounds for the sketched statistics, plus sampled histograms.
+
+        ``nunique`` intervals are +/- 2.576 standard errors; median intervals
+        are the values at rank 0.5 -/+ the sketch's rank error; histogram
+        counts are scaled from the reservoir sample with a 99% margin per bin.
+        """
+        columns, histograms = {}, {}
+        for col in self.columns or []:
+            entry = {}
+            sketch = self.distinct.get(col)
+            if sketch is not None:
+                estimate = sketch.estimate()
+                spread = 2.576 * sketch.relative_error * estimate
+                entry["nunique"] = {
+                    "estimate": int(round(estimate)),
+                    "low": int(max(0, np.floor(estimate - spread))),
+                    "high": int(np.ceil(estimate + spread)),
+                    "relative_error": round(float(sketch.relative_error), 4),
+                }
+            quantiles = self.quantiles.get(col)
+            if quantiles is not None and quantiles.n:
+                eps = quantiles.rank_error
+                entry["median"] = {
+                    "estimate": round(quantiles.quantile(0.5), 4),
+                    "low": round(quantiles.quantile(max(0.0, 0.5 - eps)), 4),
+                    "high": round(quantiles.quantile(min(1.0, 0.5 + eps)), 4),
+                    "rank_error": round(eps, 4),
+                }
+                acc = self.numeric[col]
+                hist = self.sample.histogram(col, self.HISTOGRAM_BINS, (acc["min"], acc["max"]))
+                n_valid = acc["n"]
+                histograms[col] = {
+                    "edges": [round(float(e), 4) for e in hist["edges"]],
+                    "counts": [int(round(s * n_valid)) for s in hist["share"]],
+                    "margin": [int(np.ceil(m * n_valid)) for m in hist["margin"]],
+                    "sample_size": int(hist["sample_size"]),
+                }
+            columns[col] = entry
+        return {
+            "method": "sketch",
+            "exact": ["row_count", "missing_values", "missing_percentage",
+                      "mean", "std", "min", "max", "duplicates"],
+            "columns": columns,
+            "histograms": histograms,
+        }
+
+
+def _merge_moments(acc: Dict, part: Dict) -> None:
+    # Chan et al. parallel update of count, mean and M2, plus min/max.
+    n = acc["n"] + part["n"]
+    if n == 0:
+        return
+    delta = part["mean"] - acc["mean"]
+    acc["mean"] += delta * part["n"] / n
+    acc["m2"] += part["m2"] + delta ** 2 * acc["n"] * part["n"] / n
+    acc["n"] = n
+    acc["min"] = min(acc["min"], part["min"])
+    acc["max"] = max(acc["max"], part["max"])
@@ -0,0 +1,213 @@
+import numpy as np
+from typing import Dict, List, Optional
+
+
+class HyperLogLog:
+    """Distinct-count sketch over 64-bit hashes (see ``pd.util.hash_array``).
+
+    ``2 ** precision`` one-byte registers; the relative standard error of
+    ``estimate()`` is ``1.04 / sqrt(2 ** precision)`` (0.8% at the default).
+    Sketches with the same precision merge by taking register maxima.
+    """
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes: np.ndarray) -> None:
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if len(hashes) == 0:
+            return
+        p = self.precision
+        index = hashes >> np.uint64(64 - p)
+        # Rank = 1 + trailing zeros, the binary exponent of the lowest set
+        # bit h & -h (exact in float64, being a power of two). The top p
+        # bits pick the register.
+        lowest = hashes & (~hashes + np.uint64(1))
+        rank = np.frexp(lowest.astype(np.float64))[1]
+        rank = np.minimum(np.where(lowest == 0, 65, rank), 64 - p + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> float:
+        # Ertl's improved estimator ("New cardinality estimation algorithms
+        # for HyperLogLog sketches", 2017): unbiased from empty through the
+        # range where raw HyperLogLog hands over to linear counting, without
+        # empirical bias tables.
+        m = len(self.registers)
+        q = 64 - self.precision
+        counts = np.bincount(self.registers, minlength=q + 2)
+        z = m * _tau(1 - counts[q + 1] / m)
+        for k in range(q, 0, -1):
+            z = 0.5 * (z + counts[k])
+        z += m * _sigma(counts[0] / m)
+        return float(m * m / (2 * np.log(2)) / z)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / np.sqrt(len(self.registers))
+
+
+def _sigma(x: float) -> float:
+    if x == 1:
+        return float("inf")
+    y, z = 1.0, x
+    while True:
+        x *= x
+        z_prev, z = z, z + x * y
+        y += y
+        if z == z_prev:
+            return z
+
+
+def _tau(x: float) -> float:
+    if x == 0 or x == 1:
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = np.sqrt(x)
+        z_prev = z
+        y *= 0.5
+        z -= (1 - x) ** 2 * y
+        if z == z_prev:
+            return z / 3
+
+
+class KLLSketch:
+    """Mergeable quantile sketch (Karnin, Lang & Liberty, 2016).
+
+    Level ``h`` holds items of weight ``2 ** h``; an over-full level is
+    sorted and every other item (random offset) is promoted. Batches larger
+    than ``sample_limit`` first pass through the paper's sampler, which
+    keeps one random item of each block of ``2 ** h`` at level ``h``, so an
+    update never sorts more than ``sample_limit`` values.
+    """
+
+    def __init__(self, k: int = 400, sample_limit: int = 1 << 16, seed: Optional[int] = None):
+        self.k = k
+        self.sample_limit = sample_limit
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self.sampled = False
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.n += len(values)
+        while len(values) > self.sample_limit:
+            level = int(np.ceil(np.log2(len(values) / self.sample_limit)))
+            block = 1 << level
+            full = len(values) // block * block
+            picks = np.arange(0, full, block) + self._rng.integers(0, block, size=full // block)
+            self._add(level, values[picks])
+            values = values[full:]  # the remainder enters at a lower level
+            self.sampled = True
+        self._add(0, values)
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        for level, items in enumerate(other.levels):
+            self._add(level, items)
+        self.n += other.n
+        self.sampled = self.sampled or other.sampled
+        self._compress()
+        return self
+
+    def quantile(self, q: float) -> float:
+        items, weights = self._weighted()
+        if len(items) == 0:
+            return float("nan")
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        position = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        return float(items[order][min(position, len(items) - 1)])
+
+    @property
+    def rank_error(self) -> float:
+        """Normalised rank error at ~99% confidence.
+
+        Uses the published KLL bound ``2.296 / k ** 0.9723``, plus the
+        sampler's error when a batch had to be sampled.
+        """
+        error = 2.296 / self.k ** 0.9723
+        if self.sampled:
+            error += 2.576 * 0.5 / np.sqrt(self.sample_limit)
+        return float(error)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - 1 - level
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _add(self, level: int, items: np.ndarray) -> None:
+        while len(self.levels) <= level:
+            self.levels.append(np.empty(0))
+        self.levels[level] = np.concatenate([self.levels[level], items])
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                items = np.sort(items)
+                keep = items[:1] if len(items) % 2 else items[:0]
+                pairs = items[len(keep):]
+                offset = int(self._rng.integers(0, 2))
+                self.levels[level] = keep
+                self._add(level + 1, pairs[offset::2])
+            level += 1
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(items), float(2 ** level)) for level, items in enumerate(self.levels)
+        ])
+        return items, weights
+
+
+class ReservoirSample:
+    """Uniform row sample of fixed size, kept as the rows with the smallest
+    random priorities so that two samples merge into a sample of the union.
+    """
+
+    def __init__(self, size: int = 10_000, seed: Optional[int] = None):
+        self.size = size
+        self.priorities = np.empty(0)
+        self.columns: Dict[str, np.ndarray] = {}
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, columns: Dict[str, np.ndarray], n_rows: int) -> None:
+        priorities = self._rng.random(n_rows)
+        if n_rows > self.size:
+            keep = np.argpartition(priorities, self.size)[:self.size]
+        else:
+            keep = np.arange(n_rows)
+        self._combine(priorities[keep], {col: np.asarray(v)[keep] for col, v in columns.items()})
+
+    def merge(self, other: "ReservoirSample") -> "ReservoirSample":
+        self._combine(other.priorities, other.columns)
+        return self
+
+    def histogram(self, column: str, bins: int, value_range) -> Dict:
+        """Share of the sampled values in each bin, with a 99% margin."""
+        values = self.columns.get(column, np.empty(0))
+        values = values[~np.isnan(values)]
+        counts, edges = np.histogram(values, bins=bins, range=value_range)
+        share = counts / len(values) if len(values) else counts.astype(float)
+        margin = 2.576 * np.sqrt(share * (1 - share) / max(len(values), 1))
+        return {"edges": edges, "share": share, "margin": margin, "sample_size": len(values)}
+
+    def _combine(self, priorities: np.ndarray, columns: Dict[str, np.ndarray]) -> None:
+        for col, values in columns.items():
+            existing = self.columns.get(col, np.full(len(self.priorities), np.nan))
+            self.columns[col] = np.concatenate([existing, values])
+        self.priorities = np.concatenate([self.priorities, priorities])
+        if len(self.priorities) > self.size:
+            keep = np.argpartition(self.priorities, self.size)[:self.size]
+            self.priorities = self.priorities[keep]
+            self.columns = {col: values[keep] for col, values in self.columns.items()}
@@ -4,6 +4,8 @@ from typing import Dict, Any
 from scipy import stats
 import statsmodels.api as sm
 from statsmodels.stats.outliers_influence import variance_inflation_factor
+from app.services import column_stats
+from app.services.dataset_handle import select_columns
 try:
     from lifelines import KaplanMeierFitter, CoxPHFitter
 except ImportError:
@@ -22,6 +24,22 @@ class StatisticsEngine:
             "status": status
         })
 
+    def run(self, df, outcome: str, predictors: list, duration_col: str = None) -> Dict:
+        """Project to the analysis columns and run the matching model.
+
+        ``df`` may be a DataFrame or a DatasetHandle; only the outcome,
+        predictors and duration column are loaded. With ``duration_col`` the
+        outcome is treated as the event indicator of a survival analysis,
+        otherwise a logistic regression is fitted.
+        """
+        data = select_columns(df, [outcome, duration_col] + list(predictors))
+        if duration_col:
+            result = self.survival_analysis(data, duration_col, outcome)
+        else:
+            result = self.logistic_regression(data, outcome, list(predictors))
+        result["descriptive"] = self.descriptive(data)
+        return result
+
     def descriptive(self, df: pd.DataFrame) -> Dict:
         self.log("descriptive", "Running descriptive statistics")
         results = {"numeric": {}, "categorical": {}}
@@ -35,17 +53,18 @@ class StatisticsEngine:
                 "max":    round(float(df[col].max()), 4),
                 "missing": int(df[col].isna().sum())
             }
-        categorical_cols = df.select_dtypes(include=["object"]).columns
+        categorical_cols = df.select_dtypes(include=["object", "category"]).columns
         for col in categorical_cols:
-            counts = df[col].value_counts().to_dict()
-            total = len(df[col].dropna())
+            summary = column_stats.values(df, col)
+            counts = summary["counts"].to_dict()
+            total = summary["n"]
             results["categorical"][col] = {
                 "counts": {str(k): int(v) for k, v in counts.items()},
                 "percentages": {
                     str(k): round(v/total*100, 2) 
                     for k, v in counts.items()
                 },
-                "missing": int(df[col].isna().sum())
+                "missing": summary["n_missing"]
             }
         self.log("descriptive", "Descriptive statistics complete")
         return results
@@ -61,7 +80,7 @@ class StatisticsEngine:
         # Encode categoricals
         df_encoded = pd.get_dummies(
             df_clean, 
-            columns=[c for c in predictors if df_clean[c].dtype == object],
+            columns=[c for c in predictors if not pd.api.types.is_numeric_dtype(df_clean[c])],
             drop_first=True
         )
         
@@ -1,9 +1,12 @@
 from datetime import datetime, timedelta
-from fastapi import APIRouter, UploadFile, File, HTTPException, Response, Depends, Request, Header
+from fastapi import APIRouter, UploadFile, File, HTTPException, Response, Depends, Request, Header, Query
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional, List
-import pandas as pd, tempfile, os, uuid, sys, io
+import pandas as pd, tempfile, os, uuid, sys, io, hashlib
+import pyarrow as pa
+from contextlib import contextmanager
 
 sys.path.insert(0, '.')
 from app.analytics.ingestion import DataIngestionEngine
@@ -14,32 +17,37 @@ from app.services.auth import (
     register_user, login_user, decode_token,
     get_user_by_email, update_user_profile, create_token,
 )
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
+from app.models.database import DatasetVersion
 from sqlalchemy.orm import Session
 from app.services.methodology_memory import save_template, get_templates, get_template, delete_template, get_community_templates
 from app.services.cohort_builder import build_cohort, get_column_summary
 from app.services.survival_analysis import run_kaplan_meier
 from app.services.audit_trail import log_event, get_audit_log, get_reproducibility_report
 from app.services.protocol_intelligence import parse_protocol_file
-from app.services.data_cleaner import get_cleaning_summary, detect_outliers, impute_missing, recode_variable, detect_duplicates
+from app.services.data_cleaner import get_cleaning_summary, detect_outliers, impute_missing, recode_variable, fill_missing, summarize_column
 from app.services.guided_analysis import recommend_tests
 from app.services.journal_assistant import get_journal_package
 from app.services.instrument_recognition import recognize_instrument
 from app.services.propensity_matching import run_propensity_matching
-from app.services.descriptive_stats import compute_descriptive
+from app.services.descriptive_stats import compute_descriptive, describe_column
 from app.services.collaboration import (
     create_workspace, invite_member, accept_invitation,
     add_comment, get_workspace, get_user_workspaces,
     assign_study_to_workspace, update_study_status
 )
 from app.services.meta_analysis import compute_meta_analysis
+from app.services import column_stats, correlation, dataset_store, persistence, profile_cache
+from app.services.dataset_cache import DatasetCache
+from app.services.dataset_handle import DatasetHandle
+from app.services.dataset_preview import get_preview_page
 from fastapi.responses import StreamingResponse
 
 router = APIRouter()
 
 # In-memory store for prototype
 studies = {}
-datasets = {}
+datasets = DatasetCache()
 
 
 # ============================================================
@@ -47,24 +55,85 @@ datasets = {}
 # ============================================================
 
 def get_dataset_df(dataset_id):
-    if dataset_id in datasets and 'df' in datasets[dataset_id]:
-        return datasets[dataset_id]['df']
-    path = f'/tmp/{dataset_id}.csv'
-    if os.path.exists(path):
-        df = pd.read_csv(path)
-        datasets[dataset_id] = {'df': df}
-        return df
-    raise HTTPException(status_code=404, detail="Dataset not found")
+    entry = datasets.get(dataset_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    return entry['df']
 
 def get_dataset(dataset_id: str):
-    if dataset_id in datasets:
-        return datasets[dataset_id]['df']
-    csv_path = f'/tmp/{dataset_id}.csv'
-    if os.path.exists(csv_path):
-        df = pd.read_csv(csv_path)
-        datasets[dataset_id] = {'df': df, 'created_at': datetime.utcnow().isoformat()}
-        return df
-    raise HTTPException(status_code=404, detail="Dataset not found")
+    return get_dataset_df(dataset_id)
+
+@contextmanager
+def pinned_dataset_df(dataset_id: str):
+    # Keeps the dataset resident (not evicted) while a long-running
+    # request is using it.
+    with datasets.pinned(dataset_id) as entry:
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Dataset not found")
+        yield entry['df']
+
+def get_dataset_handle(dataset_id: str) -> DatasetHandle:
+    # Column-projected access: services load only the columns they use, and
+    # project the resident frame instead when the dataset is already cached.
+    frame = datasets.peek(dataset_id)
+    if frame is None and not dataset_store.dataset_exists(dataset_id):
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    return DatasetHandle(dataset_id, frame)
+
+def apply_cleaning(dataset_id: str, df, operation: str, changed_columns=None, details=None,
+                   kept_rows=None):
+    # Write-behind: the edited frame is served from the cache immediately and
+    # persisted as a new copy-on-write version by the background writer;
+    # bursts of edits to one dataset are coalesced into a single version.
+    # Cached statistics are carried over, recomputing only the edited columns
+    # (see profile_cache.record_edit); the quality report is refreshed by the
+    # writer once the version is committed (see _on_dataset_commit).
+    profile_cache.record_edit(dataset_id, datasets.peek(dataset_id), df, changed_columns, kept_rows)
+    datasets.update_df(dataset_id, df, dirty=True)
+    persistence.mark_dirty(dataset_id, operation, changed_columns, details)
+
+def _on_dataset_commit(dataset_id: str, manifest, df):
+    _record_dataset_version(dataset_id, manifest)
+    _refresh_report(dataset_id, df, manifest["changed_columns"])
+
+def _refresh_report(dataset_id: str, df, changed_columns):
+    # Runs on the write-behind thread, which also owns the metadata writes of
+    # the versions it commits; readers that need an up-to-date report flush.
+    metadata = dataset_store.load_metadata(dataset_id)
+    report = metadata.get("report")
+    if not report:
+        return
+    engine = DataIngestionEngine()
+    if changed_columns is None:
+        report.pop("approximation", None)
+        report.update(engine.profile(df))
+    else:
+        # The cached row hashes belong to the current frame; a newer edit
+        # means this one is scanned instead.
+        dup_count = profile_cache.duplicate_count(dataset_id, df) if datasets.peek(dataset_id) is df else None
+        engine.update_profile(report, df, changed_columns, dup_count=dup_count)
+    dataset_store.save_metadata(dataset_id, metadata)
+
+def _record_dataset_version(dataset_id: str, manifest):
+    db = SessionLocal()
+    try:
+        filename = dataset_store.load_metadata(dataset_id).get("filename")
+        db.add(DatasetVersion(
+            dataset_name=filename or dataset_id,
+            version_label=f"v{manifest['version']} {manifest['operation']}",
+            dataset_id=dataset_id,
+            version_number=manifest["version"],
+            parent_version=manifest["parent"],
+            operation=manifest["operation"],
+            changed_columns=manifest["changed_columns"],
+            path=manifest["path"],
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+persistence.configure(datasets, on_commit=_on_dataset_commit)
+profile_cache.configure(datasets)
 
 
 # ============================================================
@@ -294,21 +363,15 @@ def cleanup_old_data():
     while True:
         time.sleep(3600)  # run every hour
         now = datetime.utcnow()
-        to_delete = []
-        for did, dataset in datasets.items():
-            created = dataset.get('created_at')
-            if created:
-                age = (now - datetime.fromisoformat(created)).seconds
-                if age > 3600:
-                    to_delete.append(did)
-        for did in to_delete:
-            del datasets[did]
+        # Datasets are bounded by the cache's byte budget; this only drops
+        # entries that have been idle past their TTL.
+        datasets.evict_expired()
 
         to_delete_studies = []
-        for sid, study in studies.items():
+        for sid, study in list(studies.items()):
             created = study.get('created_at')
             if created:
-                age = (now - datetime.fromisoformat(created)).seconds
+                age = (now - datetime.fromisoformat(created)).total_seconds()
                 if age > 3600:
                     to_delete_studies.append(sid)
         for sid in to_delete_studies:
@@ -397,18 +460,16 @@ class ColumnSummaryRequest(BaseModel):
 
 @router.post("/cohort/build")
 def cohort_build(req: CohortRequest):
-    if req.dataset_id not in datasets:
-        import os
-        csv_path = f'/tmp/{req.dataset_id}.csv'
-        if os.path.exists(csv_path):
-            df = pd.read_csv(csv_path)
-            datasets[req.dataset_id] = {'df': df, 'created_at': datetime.utcnow().isoformat()}
-        else:
-            raise HTTPException(status_code=404, detail="Dataset not found")
+    handle = get_dataset_handle(req.dataset_id)
+    if handle.frame is None:
+        # Not resident: only the criteria columns are read from the store.
+        result = build_cohort(handle, req.inclusion_criteria, req.exclusion_criteria)
     else:
-        df = datasets[req.dataset_id]['df']
-        df = get_dataset(req.dataset_id)
-    result = build_cohort(df, req.inclusion_criteria, req.exclusion_criteria)
+        # Resident: pinned, criterion masks are cached against the frame.
+        with profile_cache.pinned_frame(req.dataset_id) as df:
+            if df is not None:
+                handle = DatasetHandle(req.dataset_id, df)
+            result = build_cohort(handle, req.inclusion_criteria, req.exclusion_criteria)
     return {
         'original_n':            result['original_n'],
         'after_inclusion_n':     result['after_inclusion_n'],
@@ -421,17 +482,7 @@ def cohort_build(req: CohortRequest):
 
 @router.post("/cohort/column-summary")
 def column_summary(req: ColumnSummaryRequest):
-    if req.dataset_id not in datasets:
-        import os
-        csv_path = f'/tmp/{req.dataset_id}.csv'
-        if os.path.exists(csv_path):
-            df = pd.read_csv(csv_path)
-            datasets[req.dataset_id] = {'df': df, 'created_at': datetime.utcnow().isoformat()}
-        else:
-            raise HTTPException(status_code=404, detail="Dataset not found")
-    else:
-        df = datasets[req.dataset_id]['df']
-        df = get_dataset(req.dataset_id)
+    df = get_dataset_handle(req.dataset_id)
     return get_column_summary(df, req.column)
 
 from app.services.survival_analysis import run_kaplan_meier
@@ -444,20 +495,12 @@ class SurvivalRequest(BaseModel):
 
 @router.post("/survival/kaplan-meier")
 def kaplan_meier(req: SurvivalRequest):
-    if req.dataset_id not in datasets:
-        import os
-        csv_path = f'/tmp/{req.dataset_id}.csv'
-        if os.path.exists(csv_path):
-            df = pd.read_csv(csv_path)
-            datasets[req.dataset_id] = {'df': df, 'created_at': datetime.utcnow().isoformat()}
-        else:
-            raise HTTPException(status_code=404, detail="Dataset not found")
-    else:
-        df = datasets[req.dataset_id]['df']
-        df = get_dataset(req.dataset_id)
     try:
+        df = get_dataset_handle(req.dataset_id)
         result = run_kaplan_meier(df, req.duration_col, req.event_col, req.group_col)
         return result
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -466,7 +509,7 @@ def kaplan_meier(req: SurvivalRequest):
 @router.post("/survival/km")
 def kaplan_meier_v2(req: SurvivalRequest):
     try:
-        df = get_dataset(req.dataset_id)
+        df = get_dataset_handle(req.dataset_id)
         result = run_kaplan_meier(df, req.duration_col, req.event_col, req.group_col)
         return result
     except HTTPException:
@@ -496,7 +539,7 @@ async def extract_protocol(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 from app.services.data_cleaner import (
-    detect_outliers, detect_duplicates, impute_missing,
+    detect_outliers, impute_missing,
     recode_variable, get_cleaning_summary
 )
 
@@ -517,8 +560,12 @@ class RecodeRequest(BaseModel):
 
 @router.get("/clean/{dataset_id}/summary")
 def cleaning_summary(dataset_id: str):
-    df = get_dataset_df(dataset_id)
-    return get_cleaning_summary(df)
+    with pinned_dataset_df(dataset_id) as df:
+        return get_cleaning_summary(
+            df,
+            profile_cache.column_stats(dataset_id, df, "cleaning", summarize_column),
+            profile_cache.duplicate_count(dataset_id, df),
+        )
 
 @router.post("/clean/outliers")
 def outlier_detection(req: OutlierRequest):
@@ -529,9 +576,11 @@ def outlier_detection(req: OutlierRequest):
 def impute(req: ImputeRequest):
     df = get_dataset_df(req.dataset_id)
     result = impute_missing(df, req.column, req.method)
-    datasets[req.dataset_id]['df'] = df.fillna(
-        {req.column: result.get('fill_value')}
-    ) if result.get('fill_value') is not None else df
+    if result.get('fill_value') is not None:
+        df = df.copy(deep=False)
+        df[req.column] = fill_missing(df[req.column], result['fill_value'])
+        apply_cleaning(req.dataset_id, df, "impute", [req.column],
+                       {"method": req.method, "fill_value": result['fill_value']})
     log_event("system", "IMPUTE", 
               {"column": req.column, "method": req.method, "imputed": result.get('imputed_count')},
               dataset_id=req.dataset_id)
@@ -541,6 +590,11 @@ def impute(req: ImputeRequest):
 def recode(req: RecodeRequest):
     df = get_dataset_df(req.dataset_id)
     result = recode_variable(df, req.column, req.mapping)
+    if 'error' not in result:
+        original = df[req.column].astype(object)
+        df = df.copy(deep=False)
+        df[req.column] = original.map(req.mapping).fillna(original)
+        apply_cleaning(req.dataset_id, df, "recode", [req.column], {"mapping": req.mapping})
     log_event("system", "RECODE",
               {"column": req.column, "mapping": req.mapping},
               dataset_id=req.dataset_id)
@@ -550,13 +604,15 @@ def recode(req: RecodeRequest):
 def remove_duplicates(dataset_id: str):
     df = get_dataset_df(dataset_id)
     before = len(df)
-    df_clean = df.drop_duplicates()
-    datasets[dataset_id]['df'] = df_clean
-    df_clean.to_csv(f'/tmp/{dataset_id}.csv', index=False)
+    keep = ~df.duplicated().to_numpy()
+    removed = before - int(keep.sum())
+    if removed:  # otherwise there is nothing to commit as a new version
+        apply_cleaning(dataset_id, df[keep], "remove_duplicates",
+                       details={"removed": removed}, kept_rows=keep.nonzero()[0])
     log_event("system", "REMOVE_DUPLICATES",
-              {"removed": before - len(df_clean)},
+              {"removed": removed},
               dataset_id=dataset_id)
-    return {"removed": before - len(df_clean), "rows_remaining": len(df_clean)}
+    return {"removed": removed, "rows_remaining": before - removed}
 
 
 # ------------------- PYDANTIC MODELS -------------------
@@ -653,29 +709,62 @@ def root():
 def privacy():
     return {"privacy": "Your data is processed securely and not shared with third parties."}
 
+UPLOAD_CHUNK_BYTES = 1 << 20
+
+def _spool_chunk(tmp, digest, chunk: bytes) -> None:
+    tmp.write(chunk)
+    digest.update(chunk)
+
+def _ingest_into_store(dataset_id: str, path: str, suffix: str):
+    engine = DataIngestionEngine()
+    if suffix == ".csv":
+        try:
+            with dataset_store.open_writer(dataset_id) as writer:
+                df, report = engine.ingest_stream(path, writer)
+            return df, report
+        except pa.ArrowInvalid:
+            # Later rows contradict the types inferred from the first block;
+            # re-read the whole file with pandas instead.
+            pass
+    df, report = engine.ingest(path)
+    dataset_store.save_dataset(dataset_id, df)
+    return df, report
+
 @router.post("/upload")
 async def upload(file: UploadFile = File(...)):
     try:
         suffix = os.path.splitext(file.filename)[1].lower()
+        digest = hashlib.sha256()
         with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            content = await file.read()
-            tmp.write(content)
+            # Disk writes, hashing and decoding run in the threadpool so the
+            # event loop keeps serving other requests during large uploads.
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                await run_in_threadpool(_spool_chunk, tmp, digest, chunk)
             tmp_path = tmp.name
-        engine = DataIngestionEngine()
-        df, report = engine.ingest(tmp_path)
-        os.unlink(tmp_path)
+        content_key = f"{digest.hexdigest()}{suffix}"
         dataset_id = str(uuid.uuid4())
-        datasets[dataset_id] = {
-            "df": df,
+        try:
+            report = await run_in_threadpool(dataset_store.link_content, content_key, dataset_id)
+            deduplicated = report is not None
+            if deduplicated:
+                df = await run_in_threadpool(dataset_store.load_dataset, dataset_id)
+            else:
+                df, report = await run_in_threadpool(_ingest_into_store, dataset_id, tmp_path, suffix)
+                await run_in_threadpool(dataset_store.register_content, content_key, dataset_id, report)
+        finally:
+            os.unlink(tmp_path)
+        metadata = {
             "report": report,
             "filename": file.filename,
             "created_at": datetime.utcnow().isoformat()
         }
-        df.to_csv(f'/tmp/{dataset_id}.csv', index=False)
+        await run_in_threadpool(dataset_store.save_metadata, dataset_id, metadata)
+        await run_in_threadpool(datasets.put, dataset_id, df, **metadata)
         log_event(
             "system",
             "UPLOAD",
-            {"dataset_id": dataset_id, "filename": file.filename},
+            {"dataset_id": dataset_id, "filename": file.filename,
+             "content_sha256": content_key[:64], "deduplicated": deduplicated},
             dataset_id=dataset_id,
         )
         return {
@@ -685,7 +774,12 @@ async def upload(file: UploadFile = File(...)):
             "columns": report["column_count"],
             "column_types": report["column_types"],
             "missing_percentage": report["missing_percentage"],
-            "numeric_summary": report["numeric_summary"]
+            "numeric_summary": report["numeric_summary"],
+            # Variable / value labels from SPSS and Stata files (empty for CSV).
+            "labels": report.get("labels", {"variables": {}, "values": {}}),
+            # Error bounds when the upload was profiled with sketches; see
+            # POST /dataset/{id}/profile/exact.
+            "approximation": report.get("approximation"),
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -702,11 +796,14 @@ def create_study(payload: StudyPayload):
 
 @router.post("/study/{study_id}/analyse")
 def analyse(study_id: str, payload: AnalysePayload):
-    df = get_dataset_df(payload.dataset_id)
+    df = get_dataset_handle(payload.dataset_id)
     stats = StatisticsEngine().run(df, payload.outcome_column, payload.predictor_columns, payload.duration_column)
-    rigor = RigorScoreEngine().score(df, payload.outcome_column, payload.predictor_columns)
+    persistence.flush(payload.dataset_id)  # the report is refreshed on commit
+    report = dataset_store.load_metadata(payload.dataset_id).get("report", {})
+    rigor = RigorScoreEngine().score(report, stats)
     result = {"statistics": stats, "rigor": rigor}
     studies[study_id]['analysis'] = result
+    studies[study_id]['dataset_id'] = payload.dataset_id
     log_event(
         "system",
         "ANALYSE",
@@ -721,6 +818,9 @@ def report(study_id: str):
     study = studies.get(study_id)
     if not study or 'analysis' not in study:
         raise HTTPException(status_code=404, detail="Study or analysis not found")
+    # Durability barrier: the report must describe data that is in the store.
+    if study.get('dataset_id'):
+        persistence.flush(study['dataset_id'])
     pdf_bytes = ReportGenerator().generate(study)
     log_event("system", "DOWNLOAD_REPORT", {"study_id": study_id}, study_id=study_id)
     return StreamingResponse(io.BytesIO(pdf_bytes), media_type="application/pdf", headers={"Content-Disposition": f"attachment; filename=report_{study_id}.pdf"})
@@ -745,15 +845,6 @@ def get_template_ep(template_id: str):
 def delete_template_ep(template_id: str):
     return delete_template(template_id)
 
-@router.post("/cohort/build")
-def build_cohort_ep(req: CohortRequest):
-    result = build_cohort(req.dataset_id, req.inclusion_criteria, req.exclusion_criteria)
-    return {"stats": result.get("stats", {})}
-
-@router.post("/cohort/column-summary")
-def column_summary_ep(req: ColumnSummaryRequest):
-    return get_column_summary(req.dataset_id, req.column)
-
 @router.post("/survival/kaplan-meier")
 def kaplan_meier_ep(req: SurvivalRequest):
     return run_kaplan_meier(req.dataset_id, req.duration_col, req.event_col, req.group_col)
@@ -778,38 +869,6 @@ async def protocol_extract_ep(file: UploadFile = File(...)):
         os.remove(tmp_path)
     return result
 
-@router.get("/clean/{dataset_id}/summary")
-def cleaning_summary_ep(dataset_id: str):
-    return get_cleaning_summary(dataset_id)
-
-@router.post("/clean/outliers")
-def outliers_ep(req: OutlierRequest):
-    return detect_outliers(req.dataset_id, req.column, req.method)
-
-@router.post("/clean/impute")
-def impute_ep(req: ImputeRequest):
-    df = get_dataset_df(req.dataset_id)
-    df = impute_missing(df, req.column, req.method)
-    datasets[req.dataset_id]['df'] = df
-    df.to_csv(f"/tmp/{req.dataset_id}.csv", index=False)
-    return {"status": "imputed", "column": req.column, "method": req.method}
-
-@router.post("/clean/recode")
-def recode_ep(req: RecodeRequest):
-    df = get_dataset_df(req.dataset_id)
-    df = recode_variable(df, req.column, req.mapping)
-    datasets[req.dataset_id]['df'] = df
-    df.to_csv(f"/tmp/{req.dataset_id}.csv", index=False)
-    return {"status": "recoded", "column": req.column}
-
-@router.delete("/clean/{dataset_id}/duplicates")
-def remove_duplicates_ep(dataset_id: str):
-    df = get_dataset_df(dataset_id)
-    df = detect_duplicates(df, drop=True)
-    datasets[dataset_id]['df'] = df
-    df.to_csv(f"/tmp/{dataset_id}.csv", index=False)
-    return {"status": "duplicates_removed"}
-
 @router.get("/instrument/{dataset_id}")
 def instrument_recognition(dataset_id: str):
     df = get_dataset_df(dataset_id)
@@ -818,22 +877,100 @@ def instrument_recognition(dataset_id: str):
 
 @router.get("/descriptive/{dataset_id}")
 def descriptive_stats(dataset_id: str):
-    df = get_dataset_df(dataset_id)
-    return compute_descriptive(df)
+    with pinned_dataset_df(dataset_id) as df:
+        return compute_descriptive(
+            df,
+            profile_cache.column_stats(dataset_id, df, "descriptive", describe_column),
+            correlation.matrix(dataset_id, df),
+        )
+
+@router.get("/descriptive/{dataset_id}/correlations")
+def correlation_matrix(
+    dataset_id: str,
+    method: str = Query("pearson"),
+    top: Optional[int] = Query(None, ge=1),
+    row_start: int = Query(0, ge=0),
+    col_start: int = Query(0, ge=0),
+    size: int = Query(100, ge=1, le=500),
+):
+    # Either the ``top`` strongest pairs or one tile of the matrix; wide
+    # datasets are never sent whole.
+    if method not in correlation.METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown correlation method '{method}'")
+    with pinned_dataset_df(dataset_id) as df:
+        result = correlation.matrix(dataset_id, df, method)
+    if top is not None:
+        return {"dataset_id": dataset_id, "method": method, "n_columns": len(result["columns"]),
+                "top_pairs": correlation.top_pairs(result, top)}
+    return {"dataset_id": dataset_id, "method": method, **correlation.tile(result, row_start, col_start, size)}
+
+@router.get("/dataset/{dataset_id}/versions")
+def dataset_versions(dataset_id: str):
+    get_dataset_handle(dataset_id)
+    persistence.flush(dataset_id)
+    return {
+        "dataset_id": dataset_id,
+        "current": dataset_store.current_version(dataset_id),
+        "versions": dataset_store.list_versions(dataset_id),
+    }
+
+@router.post("/dataset/{dataset_id}/profile/exact")
+def recompute_exact_profile(dataset_id: str):
+    # Large uploads are profiled with sketches (report["approximation"]);
+    # this replaces the approximate statistics with exact ones.
+    with pinned_dataset_df(dataset_id) as df:
+        engine = DataIngestionEngine()
+        exact = engine.profile(df, approximate=False)
+    persistence.flush(dataset_id)  # don't race the writer's report refresh
+    metadata = dataset_store.load_metadata(dataset_id)
+    report = metadata.get("report", {})
+    report.pop("approximation", None)
+    report.update(exact)
+    metadata["report"] = report
+    dataset_store.save_metadata(dataset_id, metadata)
+    return {
+        "dataset_id": dataset_id,
+        "rows": report["row_count"],
+        "columns": report["column_count"],
+        "column_types": report["column_types"],
+        "missing_percentage": report["missing_percentage"],
+        "numeric_summary": report["numeric_summary"],
+        "issues": report["issues"],
+    }
+
+PREVIEW_PAGE_ROWS = 1000
+PREVIEW_MAX_ROWS = 10_000
+
 
 @router.get("/dataset/{dataset_id}/preview")
-def dataset_preview(dataset_id: str):
-    df = get_dataset_df(dataset_id)
-    safe_df = df.where(pd.notna(df), "")
-    rows = safe_df.astype(str).to_dict(orient="records")
-    info = datasets.get(dataset_id, {})
+def dataset_preview(
+    dataset_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(PREVIEW_PAGE_ROWS, ge=0, le=PREVIEW_MAX_ROWS),
+    columns: Optional[List[str]] = Query(None),
+    sort_by: Optional[str] = None,
+    descending: bool = False,
+    filter_column: Optional[str] = None,
+    filter_operator: Optional[str] = None,
+    filter_value: str = "",
+):
+    # Pages are bounded; callers that need every row page with offset/limit
+    # (see getDatasetRows in the frontend api).
+    handle = get_dataset_handle(dataset_id)
+    try:
+        page = get_preview_page(
+            handle, offset, limit, columns, sort_by, descending,
+            filter_column, filter_operator, filter_value,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    info = dataset_store.load_metadata(dataset_id)
     return {
         "dataset_id": dataset_id,
         "filename": info.get("filename", f"{dataset_id}.csv"),
-        "headers": [str(c) for c in safe_df.columns.tolist()],
-        "rows": rows,
-        "row_count": int(len(safe_df)),
-        "column_count": int(len(safe_df.columns)),
+        **page,
+        "row_count": int(len(handle)),
+        "column_count": int(len(handle.columns)),
         "column_types": info.get("report", {}).get("column_types", {}),
     }
 
@@ -854,11 +991,14 @@ def create_study(payload: StudyPayload):
 
 @router.post("/study/{study_id}/analyse")
 def analyse(study_id: str, payload: AnalysePayload):
-    df = get_dataset_df(payload.dataset_id)
+    df = get_dataset_handle(payload.dataset_id)
     stats = StatisticsEngine().run(df, payload.outcome_column, payload.predictor_columns, payload.duration_column)
-    rigor = RigorScoreEngine().score(df, payload.outcome_column, payload.predictor_columns)
+    persistence.flush(payload.dataset_id)  # the report is refreshed on commit
+    report = dataset_store.load_metadata(payload.dataset_id).get("report", {})
+    rigor = RigorScoreEngine().score(report, stats)
     result = {"statistics": stats, "rigor": rigor}
     studies[study_id]['analysis'] = result
+    studies[study_id]['dataset_id'] = payload.dataset_id
     log_event(
         "system",
         "ANALYSE",
@@ -873,6 +1013,9 @@ def report(study_id: str):
     study = studies.get(study_id)
     if not study or 'analysis' not in study:
         raise HTTPException(status_code=404, detail="Study or analysis not found")
+    # Durability barrier: the report must describe data that is in the store.
+    if study.get('dataset_id'):
+        persistence.flush(study['dataset_id'])
     pdf_bytes = ReportGenerator().generate(study)
     log_event("system", "DOWNLOAD_REPORT", {"study_id": study_id}, study_id=study_id)
     return StreamingResponse(
@@ -888,26 +1031,30 @@ def report(study_id: str):
 
 @router.post("/guided/recommend")
 def guided_recommend_ep(req: GuidedAnalysisRequest):
-    df = get_dataset_df(req.dataset_id)
     column_types = {}
     numeric_summary = {}
-    for col in df.columns:
-        if pd.api.types.is_numeric_dtype(df[col]):
-            column_types[col] = 'clinical_continuous'
-            numeric_summary[col] = {
-                'mean':   round(float(df[col].mean()), 2),
-                'std':    round(float(df[col].std()), 2),
-                'unique': int(df[col].nunique()),
-            }
-        else:
-            column_types[col] = 'demographic_categorical'
+    with profile_cache.pinned_frame(req.dataset_id) as df:
+        if df is None:
+            raise HTTPException(status_code=404, detail="Dataset not found")
+        for col in df.columns:
+            if pd.api.types.is_numeric_dtype(df[col]):
+                column_types[col] = 'clinical_continuous'
+                stats = column_stats.numeric(df, col)
+                numeric_summary[col] = {
+                    'mean':   round(stats['mean'], 2) if stats['n'] else float('nan'),
+                    'std':    round(stats['sd'], 2) if stats['n'] else float('nan'),
+                    'unique': stats['n_unique'],
+                }
+            else:
+                column_types[col] = 'demographic_categorical'
+        n_participants = len(df)
     result = recommend_tests(
         outcome_col=req.outcome_col,
         predictor_cols=req.predictor_cols,
         study_design=req.study_design,
         column_types=column_types,
         numeric_summary=numeric_summary,
-        n_participants=len(df),
+        n_participants=n_participants,
         research_question=req.research_question,
     )
     return result
@@ -918,9 +1065,8 @@ def kaplan_meier_ep(req: SurvivalRequest):
 
 @router.post("/psm/match")
 def psm_match(req: PSMRequest):
-    df = get_dataset_df(req.dataset_id)
     result = run_propensity_matching(
-        df=df,
+        df=get_dataset_handle(req.dataset_id),
         treatment_col=req.treatment_col,
         covariate_cols=req.covariate_cols,
         caliper=req.caliper,
@@ -948,15 +1094,6 @@ def meta_analyse(req: MetaAnalysisRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/cohort/build")
-def build_cohort_ep(req: CohortRequest):
-    result = build_cohort(req.dataset_id, req.inclusion_criteria, req.exclusion_criteria)
-    return {"stats": result.get("stats", {})}
-
-@router.post("/cohort/column-summary")
-def column_summary_ep(req: ColumnSummaryRequest):
-    return get_column_summary(req.dataset_id, req.column)
-
 
 # ============================================================
 # COLLABORATION ROUTES
@@ -59,6 +59,24 @@ def run_migrations():
                 cursor.execute(f"ALTER TABLE users ADD COLUMN {col_name} {col_def}")
                 print(f"[migration] Added column users.{col_name}")
 
+        # dataset_versions gained copy-on-write lineage columns. Skipped when
+        # the table doesn't exist yet; create_tables() builds it complete.
+        cursor.execute("PRAGMA table_info(dataset_versions)")
+        existing_cols = {row[1] for row in cursor.fetchall()}
+
+        new_cols = [
+            ("dataset_id",      "TEXT"),
+            ("version_number",  "INTEGER"),
+            ("parent_version",  "INTEGER"),
+            ("operation",       "TEXT"),
+            ("changed_columns", "JSON"),
+            ("path",            "TEXT"),
+        ]
+        for col_name, col_def in new_cols:
+            if existing_cols and col_name not in existing_cols:
+                cursor.execute(f"ALTER TABLE dataset_versions ADD COLUMN {col_name} {col_def}")
+                print(f"[migration] Added column dataset_versions.{col_name}")
+
         conn.commit()
         conn.close()
     except Exception as exc:
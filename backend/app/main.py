@@ -21,6 +21,7 @@ from app.api.assessments import router as assessments_router
 from app.routers.analysis_router import router as analysis_router
 from app.routers.descriptive_stats import router as descriptive_stats_router
 from app.routers.analysis_recommender import router as analysis_recommender_router
+from app.services import persistence
 
 app = FastAPI(
     title="ResearchFlow API",
@@ -74,6 +75,11 @@ async def on_startup():
     run_migrations()
     create_tables()
 
+@app.on_event("shutdown")
+def on_shutdown():
+    # Persist cleaning edits still queued in the write-behind writer.
+    persistence.flush()
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     start = time.time()
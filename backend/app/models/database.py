@@ -88,6 +88,13 @@ class DatasetVersion(Base):
     version_label = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
     project_id = Column(String, ForeignKey("projects.id"))
+    # Copy-on-write lineage in the dataset store (see services/dataset_store.py)
+    dataset_id = Column(String, index=True)
+    version_number = Column(Integer)
+    parent_version = Column(Integer)
+    operation = Column(String)
+    changed_columns = Column(JSON)
+    path = Column(String)
     project = relationship("Project", back_populates="dataset_versions")
 
 class Dataset(Base):
@@ -1,14 +1,19 @@
 import io
-import os
-from typing import List
+import json
+from contextlib import contextmanager
+from typing import List, Optional
 
-import pandas as pd
 from fastapi import APIRouter, HTTPException
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
+from app.services import column_stats, dataset_store, profile_cache
+from app.services.dataset_handle import DatasetHandle, select_columns
 from app.services.descriptive_stats_service import (
     build_table1,
+    column_type_info,
+    compute_variable_stats_batch,
     compute_variable_stats_categorical,
     compute_variable_stats_continuous,
     detect_column_types,
@@ -22,11 +27,32 @@ router = APIRouter(prefix="/descriptive-stats", tags=["descriptive-stats"])
 # Helpers
 # ---------------------------------------------------------------------------
 
-def _load_df(dataset_id: str) -> pd.DataFrame:
-    csv_path = f"/tmp/{dataset_id}.csv"
-    if os.path.exists(csv_path):
-        return pd.read_csv(csv_path)
-    raise HTTPException(status_code=404, detail="Dataset not found")
+@contextmanager
+def _dataset_frame(dataset_id: str, columns: Optional[List[str]] = None):
+    """The dataset's live frame, whose column statistics are cached (see
+    column_stats) and survive cleaning edits to other columns.
+
+    If ``columns`` is given and the dataset is not resident, only those
+    columns are read from the store (unknown names are skipped).
+    """
+    if columns is not None and not profile_cache.is_resident(dataset_id):
+        if not dataset_store.dataset_exists(dataset_id):
+            raise HTTPException(status_code=404, detail="Dataset not found")
+        yield select_columns(DatasetHandle(dataset_id), columns)
+        return
+    with profile_cache.pinned_frame(dataset_id) as df:
+        if df is None:
+            raise HTTPException(status_code=404, detail="Dataset not found")
+        yield df
+
+
+def _table1_columns(req) -> List[str]:
+    return [v.name for v in req.variables] + ([req.group_by] if req.group_by else [])
+
+
+def _check_group_by(df, group_by: Optional[str]) -> None:
+    if group_by is not None and group_by not in df.columns:
+        raise HTTPException(status_code=400, detail=f"Column '{group_by}' not found in dataset")
 
 
 # ---------------------------------------------------------------------------
@@ -37,6 +63,8 @@ class VariableStatsRequest(BaseModel):
     dataset_id: str
     variable_name: str
     variable_type: str  # "categorical" | "continuous"
+    # histogram bins; by default 10-15, from the sample size
+    bins: Optional[int] = Field(None, ge=1, le=column_stats.HISTOGRAM_BASE_BINS)
 
 
 class Table1Variable(BaseModel):
@@ -44,10 +72,17 @@ class Table1Variable(BaseModel):
     type: str  # "categorical" | "continuous"
 
 
+class BatchVariableStatsRequest(BaseModel):
+    dataset_id: str
+    variables: List[Table1Variable]
+    stream: bool = False  # NDJSON, one line per variable as it is computed
+
+
 class Table1Request(BaseModel):
     dataset_id: str
     variables: List[Table1Variable]
     summary_type: str = "auto"  # "mean_sd" | "median_iqr" | "auto"
+    group_by: Optional[str] = None  # stratify by this column
 
 
 # ---------------------------------------------------------------------------
@@ -57,59 +92,100 @@ class Table1Request(BaseModel):
 @router.get("/columns/{dataset_id}")
 def get_column_types(dataset_id: str):
     """Return all column names with detected types and missing-value counts."""
-    df = _load_df(dataset_id)
-    columns = detect_column_types(df)
+    with _dataset_frame(dataset_id) as df:
+        cached = profile_cache.column_stats(dataset_id, df, "column_types", column_type_info)
+        columns = detect_column_types(df, cached)
     return {"dataset_id": dataset_id, "columns": columns}
 
 
 @router.post("/variable")
 def variable_stats(req: VariableStatsRequest):
     """Compute detailed statistics for a single variable."""
-    df = _load_df(req.dataset_id)
-    try:
-        if req.variable_type == "categorical":
-            return compute_variable_stats_categorical(df, req.variable_name)
-        elif req.variable_type == "continuous":
-            return compute_variable_stats_continuous(df, req.variable_name)
-        else:
+    with _dataset_frame(req.dataset_id, [req.variable_name]) as df:
+        try:
+            if req.variable_type == "categorical":
+                return compute_variable_stats_categorical(df, req.variable_name)
+            elif req.variable_type == "continuous":
+                return compute_variable_stats_continuous(df, req.variable_name, req.bins)
+            else:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unknown variable_type '{req.variable_type}'. Use 'categorical' or 'continuous'.",
+                )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        except HTTPException:
+            raise
+        except Exception as exc:
+            raise HTTPException(status_code=500, detail=str(exc))
+
+
+@router.post("/variables")
+def variable_stats_batch(req: BatchVariableStatsRequest):
+    """Statistics for several variables in one request (see /variable)."""
+    variables = [{"name": v.name, "type": v.type} for v in req.variables]
+    for var in variables:
+        if var["type"] not in ("categorical", "continuous"):
             raise HTTPException(
                 status_code=400,
-                detail=f"Unknown variable_type '{req.variable_type}'. Use 'categorical' or 'continuous'.",
+                detail=f"Unknown variable_type '{var['type']}'. Use 'categorical' or 'continuous'.",
             )
-    except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc))
-    except HTTPException:
-        raise
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=str(exc))
+    columns = [var["name"] for var in variables]
+    with _dataset_frame(req.dataset_id, columns) as df:
+        missing = [var["name"] for var in variables if var["name"] not in df.columns]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Column '{missing[0]}' not found in dataset")
+        if not req.stream:
+            try:
+                results = list(compute_variable_stats_batch(df, variables))
+            except Exception as exc:
+                raise HTTPException(status_code=500, detail=str(exc))
+            return {"dataset_id": req.dataset_id, "variables": results}
+
+    def lines():
+        # The frame is pinned again for as long as the response streams.
+        with _dataset_frame(req.dataset_id, columns) as df:
+            try:
+                for result in compute_variable_stats_batch(df, variables):
+                    yield json.dumps(jsonable_encoder(result)) + "\n"
+            except Exception as exc:
+                yield json.dumps({"error": str(exc)}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 @router.post("/table1")
 def generate_table1(req: Table1Request):
     """Generate a Table 1 for the selected variables."""
-    df = _load_df(req.dataset_id)
     variables = [{"name": v.name, "type": v.type} for v in req.variables]
-    try:
-        return build_table1(df, variables, req.summary_type)
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=str(exc))
+    with _dataset_frame(req.dataset_id, _table1_columns(req)) as df:
+        _check_group_by(df, req.group_by)
+        try:
+            return build_table1(df, variables, req.summary_type, req.group_by)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        except Exception as exc:
+            raise HTTPException(status_code=500, detail=str(exc))
 
 
 @router.post("/table1/export")
 def export_table1_docx(req: Table1Request):
     """Generate and download a DOCX-formatted Table 1."""
-    df = _load_df(req.dataset_id)
     variables = [{"name": v.name, "type": v.type} for v in req.variables]
-    try:
-        result = build_table1(df, variables, req.summary_type)
-        docx_bytes = generate_table1_docx(result["n_total"], result["table"])
-        return StreamingResponse(
-            io.BytesIO(docx_bytes),
-            media_type=(
-                "application/vnd.openxmlformats-officedocument"
-                ".wordprocessingml.document"
-            ),
-            headers={"Content-Disposition": "attachment; filename=table1.docx"},
-        )
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=str(exc))
+    with _dataset_frame(req.dataset_id, _table1_columns(req)) as df:
+        _check_group_by(df, req.group_by)
+        try:
+            result = build_table1(df, variables, req.summary_type, req.group_by)
+            docx_bytes = generate_table1_docx(result["n_total"], result["table"], result.get("groups"))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        except Exception as exc:
+            raise HTTPException(status_code=500, detail=str(exc))
+    return StreamingResponse(
+        io.BytesIO(docx_bytes),
+        media_type=(
+            "application/vnd.openxmlformats-officedocument"
+            ".wordprocessingml.document"
+        ),
+        headers={"Content-Disposition": "attachment; filename=table1.docx"},
+    )
@@ -1,5 +1,11 @@
+from functools import reduce
+from typing import Any, Dict, List, Optional
+
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Any
+
+from app.services import column_stats, profile_cache
+from app.services.dataset_handle import DatasetHandle, select_columns
 
 OPERATORS = {
     'equals':         lambda col, val: col == val,
@@ -14,44 +20,90 @@ OPERATORS = {
     'is_not_missing': lambda col, val: col.notna(),
 }
 
+# Operators whose result depends only on each row's value; on a
+# non-numeric column they are evaluated once per distinct value and
+# spread to the rows through the column's cached codes.
+_PER_VALUE = {'equals', 'not_equals', 'contains', 'not_contains'}
+
+# Set bits per byte, for counting rows in a packed mask.
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+# Each criterion is compiled to a bitmask over the rows (np.packbits),
+# cached per dataset frame by profile_cache so a cleaning edit drops only
+# the masks of the edited columns. A build then only combines the cached
+# masks of its criteria with bitwise operations and counts the set bits.
+
+def criterion_mask(df: pd.DataFrame, criterion: Dict[str, Any]) -> Optional[np.ndarray]:
+    """Packed row bitmask of one criterion, or None if it cannot be
+    applied (unknown column or operator, or the operator fails)."""
+    column = criterion.get('column')
+    operator = criterion.get('operator')
+    value = criterion.get('value', '')
+    if column not in df.columns or operator not in OPERATORS:
+        return None
+    return profile_cache.frame_stat(
+        df, f"criterion_{operator}_{value!r}", column,
+        lambda df, col: _compile(df, col, operator, value),
+    )
+
+def _compile(df: pd.DataFrame, column, operator: str, value) -> Optional[np.ndarray]:
+    series = df[column]
+    try:
+        if operator in _PER_VALUE and not pd.api.types.is_numeric_dtype(series):
+            factorised = column_stats.codes(df, column)
+            row_codes = factorised['codes']
+            hits = _as_bool(OPERATORS[operator](pd.Series(factorised['uniques']), value))
+            present = row_codes >= 0
+            mask = np.zeros(len(series), dtype=bool)
+            mask[present] = hits[row_codes[present]]
+            # Missing values stringify differently (None, nan, NaT), so
+            # those rows are evaluated as they are.
+            if not present.all():
+                mask[~present] = _as_bool(OPERATORS[operator](series[~present], value))
+        else:
+            mask = _as_bool(OPERATORS[operator](series, value))
+    except Exception:
+        return None
+    return np.packbits(mask)
+
+def _as_bool(condition: pd.Series) -> np.ndarray:
+    return condition.to_numpy(dtype=bool, na_value=False)
+
+def _criteria_bits(df: pd.DataFrame, criteria: List[Dict[str, Any]]) -> np.ndarray:
+    masks = [m for m in (criterion_mask(df, c) for c in criteria) if m is not None]
+    if not masks:
+        return np.packbits(np.ones(len(df), dtype=bool))
+    return reduce(np.bitwise_and, masks)
+
+def _unpack(bits: np.ndarray, n: int) -> np.ndarray:
+    return np.unpackbits(bits, count=n).view(bool)
+
+def _count(bits: np.ndarray) -> int:
+    return int(_POPCOUNT[bits].sum(dtype=np.int64))
+
 def apply_criteria(df, criteria):
-    mask = pd.Series([True] * len(df), index=df.index)
-    for criterion in criteria:
-        column   = criterion.get('column')
-        operator = criterion.get('operator')
-        value    = criterion.get('value', '')
-        if column not in df.columns or operator not in OPERATORS:
-            continue
-        try:
-            condition = OPERATORS[operator](df[column], value)
-            mask = mask & condition
-        except Exception:
-            continue
-    return df[mask]
+    return df[_unpack(_criteria_bits(df, criteria), len(df))]
 
 def build_cohort(df, inclusion_criteria, exclusion_criteria):
-    original_n        = len(df)
-    after_inclusion   = apply_criteria(df, inclusion_criteria) if inclusion_criteria else df
-    inclusion_n       = len(after_inclusion)
+    # ``df`` may be a DatasetHandle, in which case ``final_df`` is a lazy
+    # row-filtered handle. Masks are cached when the criteria are evaluated
+    # on a dataset's current frame; otherwise only the criteria columns are
+    # loaded and the masks computed for this build.
+    source = df.frame if isinstance(df, DatasetHandle) else df
+    if source is None:
+        source = select_columns(
+            df, [c.get('column') for c in inclusion_criteria + exclusion_criteria]
+        )
+    original_n = len(df)
+    keep = _criteria_bits(source, inclusion_criteria)
+    inclusion_n = _count(keep)
 
+    # Exclusion criteria apply to the included rows only.
     if exclusion_criteria:
-        exclusion_mask = pd.Series([True] * len(after_inclusion), index=after_inclusion.index)
-        for criterion in exclusion_criteria:
-            column   = criterion.get('column')
-            operator = criterion.get('operator')
-            value    = criterion.get('value', '')
-            if column not in after_inclusion.columns or operator not in OPERATORS:
-                continue
-            try:
-                condition = OPERATORS[operator](after_inclusion[column], value)
-                exclusion_mask = exclusion_mask & condition
-            except Exception:
-                continue
-        final_df = after_inclusion[~exclusion_mask]
-    else:
-        final_df = after_inclusion
+        keep = keep & ~_criteria_bits(source, exclusion_criteria)
+    final_n = _count(keep)
+    final_df = df[_unpack(keep, original_n)]
 
-    final_n = len(final_df)
     return {
         'original_n':            original_n,
         'after_inclusion_n':     inclusion_n,
@@ -0,0 +1,110 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+# Shared pool for per-column statistics. Columns are split into contiguous
+# batches, each batch runs as one task, and results are collected in batch
+# order, so the output never depends on which worker finished first.
+#
+# "thread" suits the numpy/pandas reductions that release the GIL and shares
+# the frame for free; "process" sidesteps the GIL for Python-heavy work but
+# pickles each batch's columns to its worker, so functions run there must be
+# module-level and read only the columns they are given.
+
+COLUMN_WORKERS = int(os.getenv("COLUMN_WORKERS", str(os.cpu_count() or 1)))
+COLUMN_EXECUTOR = os.getenv("COLUMN_EXECUTOR", "thread")
+# Frames smaller than this (rows x columns) are processed inline; the pool
+# round-trip would cost more than it saves.
+MIN_PARALLEL_CELLS = int(os.getenv("COLUMN_MIN_PARALLEL_CELLS", "1000000"))
+# Batches per worker: more, smaller batches even out wide and narrow columns.
+BATCHES_PER_WORKER = 4
+
+_pool: Optional[Executor] = None
+_pool_key = None
+_lock = threading.Lock()
+
+
+def configure(workers: Optional[int] = None, kind: Optional[str] = None) -> None:
+    """Change the worker count or pool kind; the old pool is shut down."""
+    global COLUMN_WORKERS, COLUMN_EXECUTOR
+    if kind is not None and kind not in ("thread", "process"):
+        raise ValueError(f"Unknown column executor: {kind}")
+    with _lock:
+        if workers is not None:
+            COLUMN_WORKERS = max(1, int(workers))
+        if kind is not None:
+            COLUMN_EXECUTOR = kind
+        _shutdown_locked()
+
+
+def map_columns(func: Callable[[pd.DataFrame, Any], Any], df: pd.DataFrame,
+                columns: Optional[List] = None, workers: Optional[int] = None) -> Dict[Any, Any]:
+    """``{col: func(df, col)}`` for ``columns`` (default: all), in column order."""
+    columns = list(df.columns) if columns is None else list(columns)
+    results: Dict[Any, Any] = {}
+    for part in map_batches(partial(_apply_each, func), df, columns, workers):
+        results.update(part)
+    return {col: results[col] for col in columns}
+
+
+def map_batches(func: Callable[[pd.DataFrame, List], Any], df: pd.DataFrame,
+                columns: Optional[List] = None, workers: Optional[int] = None) -> List[Any]:
+    """``func(df, batch)`` for each batch of ``columns``, in batch order.
+
+    With the process pool ``df`` is narrowed to ``df[batch]`` before it is
+    sent to the worker.
+    """
+    columns = list(df.columns) if columns is None else list(columns)
+    workers = COLUMN_WORKERS if workers is None else max(1, workers)
+    if workers == 1 or len(columns) < 2 or len(df) * len(columns) < MIN_PARALLEL_CELLS:
+        return [func(df, columns)] if columns else []
+
+    n_batches = min(len(columns), workers * BATCHES_PER_WORKER)
+    size = -(-len(columns) // n_batches)
+    batches = [columns[i:i + size] for i in range(0, len(columns), size)]
+    pool, kind = _executor(workers)
+    if kind == "process":
+        futures = [pool.submit(func, df[batch], batch) for batch in batches]
+    else:
+        futures = [pool.submit(func, df, batch) for batch in batches]
+    return [future.result() for future in futures]
+
+
+def _apply_each(func, df: pd.DataFrame, batch: List) -> Dict[Any, Any]:
+    return {col: func(df, col) for col in batch}
+
+
+def _executor(workers: int):
+    global _pool, _pool_key
+    with _lock:
+        kind = COLUMN_EXECUTOR
+        if _pool is None or _pool_key != (kind, workers):
+            _shutdown_locked()
+            if kind == "process":
+                # Forking a threaded server can copy held locks into the
+                # child; start workers from a clean interpreter instead.
+                context = multiprocessing.get_context("spawn")
+                _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            else:
+                _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="columns")
+            _pool_key = (kind, workers)
+        return _pool, kind
+
+
+def _shutdown_locked() -> None:
+    global _pool, _pool_key
+    if _pool is not None:
+        _pool.shutdown(wait=False)
+    _pool, _pool_key = None, None
+
+
+@atexit.register
+def _shutdown() -> None:
+    with _lock:
+        _shutdown_locked()
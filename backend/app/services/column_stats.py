@@ -0,0 +1,198 @@
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services import profile_cache
+
+# Base statistics shared by the descriptive services (dashboard, column
+# types, variable stats, Table 1, guided analysis). Each is computed once
+# per column of a dataset's current frame and cached by profile_cache, which
+# drops a column's entries when a cleaning edit touches it and all of them
+# when rows change. Any other frame is computed directly. Values are
+# unrounded; callers format them.
+
+# Histograms are kept as cumulative counts over this many equal-width base
+# bins, so any coarser histogram is read off in O(bins). 5040 is divisible
+# by every bin count up to 10 and by 12, 14, 15, 16, 20, 24, 30, ...; other
+# counts get edges snapped to the nearest base edge. Counts are consistent
+# with the edges reported here, but those differ from np.histogram's in the
+# last bits, so a value lying on a bin edge can be counted in the adjacent
+# bin compared with np.histogram.
+HISTOGRAM_BASE_BINS = 5040
+
+
+def numeric(df: pd.DataFrame, col) -> Dict[str, Any]:
+    """Moments and quantiles of the column coerced to numbers."""
+    return numeric_batch(df, [col])[col]
+
+
+def numeric_batch(df: pd.DataFrame, columns: List) -> Dict[Any, Dict[str, Any]]:
+    """``numeric`` for several columns; the uncached ones are computed
+    together, as one float64 frame reduced column-wise."""
+    return profile_cache.frame_stats(df, "numeric", columns, _numeric)
+
+
+def values(df: pd.DataFrame, col) -> Dict[str, Any]:
+    """Value counts of the non-missing values as stored."""
+    return profile_cache.frame_stat(df, "values", col, _values)
+
+
+def text(df: pd.DataFrame, col) -> Dict[str, Any]:
+    """Value counts of the non-missing values as strings, plus ``codes``
+    (per row, -1 if missing) into ``labels`` for cross-tabulation."""
+    return profile_cache.frame_stat(df, "text", col, _text)
+
+
+def codes(df: pd.DataFrame, col) -> Dict[str, Any]:
+    """The column factorised once: ``codes`` per row (-1 if missing) into
+    ``uniques``, in order of first appearance (category order for a
+    categorical column, whose codes are used as they are)."""
+    return profile_cache.frame_stat(df, "codes", col, _codes)
+
+
+def histogram_base(df: pd.DataFrame, col) -> Dict[str, Any]:
+    """Base histogram of the finite values: ``{n, lo, hi, cumulative}``."""
+    return histogram_base_batch(df, [col])[col]
+
+
+def histogram_base_batch(df: pd.DataFrame, columns: List) -> Dict[Any, Dict[str, Any]]:
+    return profile_cache.frame_stats(df, "histogram_base", columns, _histogram_base)
+
+
+def histogram(base: Dict[str, Any], n_bins: int) -> Tuple[np.ndarray, np.ndarray]:
+    """``(edges, counts)`` for ``n_bins`` bins, merged from ``base``."""
+    n_bins = max(1, min(int(n_bins), HISTOGRAM_BASE_BINS))
+    at = np.rint(np.linspace(0, HISTOGRAM_BASE_BINS, n_bins + 1)).astype(np.int64)
+    return _edges(base["lo"], base["hi"], at), np.diff(base["cumulative"][at])
+
+
+def numeric_frame(df: pd.DataFrame, columns: List) -> pd.DataFrame:
+    """``columns`` coerced to float64 (unparseable values become NaN)."""
+    return pd.DataFrame({col: _as_float(df[col]) for col in columns}, index=df.index)
+
+
+def _numeric(df: pd.DataFrame, columns: List) -> Dict[Any, Dict[str, Any]]:
+    frame = numeric_frame(df, columns)
+    n = frame.count()
+    quartiles = frame.quantile([0.25, 0.75])
+    summary = {
+        "mean": frame.mean(), "sd": frame.std(), "median": frame.median(),
+        "q1": quartiles.loc[0.25], "q3": quartiles.loc[0.75],
+        "min": frame.min(), "max": frame.max(),
+        "skewness": frame.skew(), "kurtosis": frame.kurt(),
+    }
+    nunique = frame.nunique()
+    out = {}
+    for col in columns:
+        stats = {
+            "n_total": int(len(df)),
+            "n_missing": int(df[col].isna().sum()),
+            "n": int(n[col]),
+            "n_unique": int(nunique[col]),
+        }
+        if n[col] == 0:
+            stats.update(dict.fromkeys(summary))
+        else:
+            stats.update((key, float(values[col])) for key, values in summary.items())
+        out[col] = stats
+    return out
+
+
+def _histogram_base(df: pd.DataFrame, columns: List) -> Dict[Any, Dict[str, Any]]:
+    frame = numeric_frame(df, columns)
+    out = {}
+    for col in columns:
+        values = frame[col].to_numpy()
+        values = values[np.isfinite(values)]
+        cumulative = np.zeros(HISTOGRAM_BASE_BINS + 1, dtype=np.int64)
+        lo = hi = 0.0
+        if len(values):
+            lo, hi = float(values.min()), float(values.max())
+            if lo == hi:  # as np.histogram
+                lo, hi = lo - 0.5, hi + 0.5
+            at = ((values - lo) * (HISTOGRAM_BASE_BINS / (hi - lo))).astype(np.int64)
+            np.minimum(at, HISTOGRAM_BASE_BINS - 1, out=at)  # the last bin includes the maximum
+            # Move values the multiplication put across an edge, with the
+            # edges computed exactly as ``histogram`` reports them.
+            at -= values < _edges(lo, hi, at)
+            at += (values >= _edges(lo, hi, at + 1)) & (at < HISTOGRAM_BASE_BINS - 1)
+            np.cumsum(np.bincount(at, minlength=HISTOGRAM_BASE_BINS), out=cumulative[1:])
+        out[col] = {"n": int(len(values)), "lo": lo, "hi": hi, "cumulative": cumulative}
+    return out
+
+
+def _edges(lo: float, hi: float, at: np.ndarray) -> np.ndarray:
+    return lo + (hi - lo) * (at / HISTOGRAM_BASE_BINS)
+
+
+def _as_float(values: pd.Series) -> pd.Series:
+    try:
+        values = pd.to_numeric(values, errors="coerce")
+    except Exception:
+        # Values that cannot be coerced at all (lists, dicts)
+        return pd.Series(float("nan"), index=values.index)
+    return values.astype("float64")
+
+
+def _codes(df: pd.DataFrame, col) -> Dict[str, Any]:
+    column = df[col]
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return {"codes": column.cat.codes.to_numpy().astype(np.intp), "uniques": column.cat.categories}
+    row_codes, uniques = pd.factorize(column)
+    return {"codes": row_codes, "uniques": pd.Index(uniques)}
+
+
+def _values(df: pd.DataFrame, col) -> Dict[str, Any]:
+    factorised = codes(df, col)
+    if isinstance(df[col].dtype, pd.CategoricalDtype):
+        # Like value_counts on a categorical: every category, ties in
+        # category order, which is also the order modes are ranked in.
+        return _counts(factorised["codes"], factorised["uniques"], keep_empty=True, sort_modes=False)
+    return _counts(factorised["codes"], factorised["uniques"])
+
+
+def _text(df: pd.DataFrame, col) -> Dict[str, Any]:
+    factorised = codes(df, col)
+    row_codes, uniques = factorised["codes"], factorised["uniques"]
+    if isinstance(df[col].dtype, pd.CategoricalDtype):
+        # As strings the values are ranked by first appearance, not category.
+        seen = pd.unique(row_codes[row_codes >= 0])
+        remap = np.full(len(uniques), -1, dtype=np.intp)
+        remap[seen] = np.arange(len(seen))
+        row_codes = np.where(row_codes >= 0, remap[row_codes], -1)
+        uniques = uniques[seen]
+    # Distinct values can share a string (1 and "1"); merge their codes.
+    merged, labels = pd.factorize(pd.Series(uniques, dtype=uniques.dtype).astype(str))
+    if len(labels) < len(uniques):
+        row_codes = np.where(row_codes >= 0, merged[row_codes], -1)
+    result = _counts(row_codes, pd.Index(labels, dtype=object))
+    result.update(codes=row_codes, labels=pd.Index(labels, dtype=object))
+    return result
+
+
+def _counts(row_codes: np.ndarray, uniques: pd.Index, keep_empty: bool = False,
+            sort_modes: bool = True) -> Dict[str, Any]:
+    present = row_codes >= 0
+    counts = np.bincount(row_codes[present], minlength=len(uniques))
+    # Most frequent first, ties in order of first appearance (as value_counts).
+    order = np.argsort(-counts, kind="stable")
+    if not keep_empty:
+        order = order[counts[order] > 0]
+    mode = None
+    if present.any():
+        modes = np.asarray(uniques[counts == counts.max()], dtype=object)
+        if sort_modes:
+            try:
+                modes = np.sort(modes)
+            except TypeError:
+                pass  # unorderable mix, as Series.mode
+        mode = modes[0]
+    return {
+        "n_total": int(len(row_codes)),
+        "n_missing": int((~present).sum()),
+        "n": int(present.sum()),
+        "n_unique": int((counts > 0).sum()),
+        "counts": pd.Series(counts[order], index=uniques[order], name="count"),
+        "mode": mode,
+    }
@@ -0,0 +1,172 @@
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services import column_stats, profile_cache
+
+# Correlation matrices over the numeric columns, computed block by block
+# with matrix products on standardised data. Without missing values a block
+# is one product; otherwise six products over the zero-filled data and its
+# missingness mask give each pair's sums over the rows where both are
+# present (pairwise-complete, as DataFrame.corr). Spearman correlates the
+# average ranks, taken over each column's own non-missing values. Columns
+# are standardised one block at a time, as the products need them.
+#
+# Matrices are cached per dataset frame by profile_cache; after a cleaning
+# edit only the rows and columns of the edited columns are recomputed.
+
+METHODS = ("pearson", "spearman")
+CORRELATION_BLOCK_SIZE = int(os.getenv("CORRELATION_BLOCK_SIZE", "256"))
+
+
+def matrix(dataset_id: str, df: pd.DataFrame, method: str = "pearson") -> Dict[str, Any]:
+    """``{"columns": [...], "matrix": ndarray}`` for the numeric columns."""
+    if method not in METHODS:
+        raise ValueError(f"Unknown correlation method: {method}")
+    return profile_cache.matrix_stats(
+        dataset_id, df, f"correlation_{method}", lambda df, known: _update(df, known, method)
+    )
+
+
+def correlate(df: pd.DataFrame, columns: Optional[List] = None, method: str = "pearson") -> np.ndarray:
+    """Uncached correlation matrix of ``columns`` (default: the numeric ones)."""
+    if columns is None:
+        columns = _numeric_columns(df)
+    return _rows(df, columns, method, np.arange(len(columns)))
+
+
+def top_pairs(result: Dict[str, Any], k: int = 50) -> List[Dict[str, Any]]:
+    """The ``k`` pairs of distinct columns with the largest ``|r|``."""
+    columns, mat = result["columns"], result["matrix"]
+    i, j = np.triu_indices(len(columns), k=1)
+    r = mat[i, j]
+    keep = np.flatnonzero(np.isfinite(r))
+    if k < len(keep):
+        keep = keep[np.argpartition(-np.abs(r[keep]), k)[:k]]
+    keep = keep[np.argsort(-np.abs(r[keep]), kind="stable")]
+    return [{"a": columns[i[p]], "b": columns[j[p]], "r": round(float(r[p]), 3)} for p in keep]
+
+
+def tile(result: Dict[str, Any], row_start: int, col_start: int, size: int) -> Dict[str, Any]:
+    """A ``size`` x ``size`` window of the matrix (clipped at the edges)."""
+    columns, mat = result["columns"], result["matrix"]
+    rows = slice(row_start, row_start + size)
+    cols = slice(col_start, col_start + size)
+    values = np.round(mat[rows, cols], 3)
+    return {
+        "row_columns": columns[rows],
+        "col_columns": columns[cols],
+        "row_start": row_start,
+        "col_start": col_start,
+        "n_columns": len(columns),
+        "matrix": [[v if np.isfinite(v) else None for v in row] for row in values.tolist()],
+    }
+
+
+def _numeric_columns(df: pd.DataFrame) -> List:
+    return df.select_dtypes(include=[np.number]).columns.tolist()
+
+
+def _update(df: pd.DataFrame, known: Optional[Dict], method: str) -> Dict[str, Any]:
+    columns = _numeric_columns(df)
+    position = {col: i for i, col in enumerate(known["columns"])} if known else {}
+    reuse = [col for col in columns if col in position and col not in known["stale"]]
+    if known and len(reuse) == len(columns) == len(position):
+        return {"columns": columns, "matrix": known["matrix"]}
+
+    mat = np.full((len(columns), len(columns)), np.nan)
+    if reuse:
+        new_at = np.array([columns.index(col) for col in reuse])
+        old_at = np.array([position[col] for col in reuse])
+        mat[np.ix_(new_at, new_at)] = known["matrix"][np.ix_(old_at, old_at)]
+        reused = set(reuse)
+        fresh = np.array([i for i, col in enumerate(columns) if col not in reused], dtype=int)
+    else:
+        fresh = np.arange(len(columns))
+    if len(fresh):
+        rows = _rows(df, columns, method, fresh)
+        mat[fresh, :] = rows
+        mat[:, fresh] = rows.T
+    return {"columns": columns, "matrix": mat}
+
+
+def _prepare(df: pd.DataFrame, columns: List, method: str) -> Dict[str, Any]:
+    """Standardised values of one block of columns, zero where missing."""
+    frame = column_stats.numeric_frame(df, columns)
+    if method == "spearman":
+        frame = frame.rank()
+    values = frame.to_numpy(dtype=np.float64)
+    present = ~np.isnan(values)
+    complete = present.all(axis=0)
+    # Centring and scaling first keeps the sums of squares well conditioned.
+    # With missing values each pair uses a subset of rows, whose mean an
+    # outlier outside the subset would pull the full-column mean away from;
+    # the median stays close to it.
+    with np.errstate(all="ignore"):
+        centre = np.nanmean(values, axis=0)
+        if not complete.all():
+            centre[~complete] = np.nanmedian(values[:, ~complete], axis=0)
+        values -= centre
+        values /= np.nanstd(values, axis=0, ddof=1)
+    values[~present] = 0.0
+    return {
+        "values": np.asfortranarray(values),
+        "present": np.asfortranarray(present),
+        "complete": bool(complete.all()),
+    }
+
+
+def _rows(df: pd.DataFrame, columns: List, method: str, rows: np.ndarray) -> np.ndarray:
+    """Correlations of the columns at ``rows`` with every column.
+
+    Columns are prepared one block at a time as the products reach them, so
+    the ranks and float copies of the whole frame never exist at once.
+    """
+    n_cols = len(columns)
+    out = np.empty((len(rows), n_cols))
+    step = CORRELATION_BLOCK_SIZE
+    # For the full matrix only blocks on or above the diagonal are computed.
+    symmetric = len(rows) == n_cols and (rows == np.arange(n_cols)).all()
+    # Right-hand blocks are kept only if a later row block will reuse them.
+    keep = len(rows) > step
+    prepared: Dict[int, Dict[str, Any]] = {}
+
+    def block(b):
+        data = prepared.get(b)
+        if data is None:
+            data = _prepare(df, columns[b:b + step], method)
+            if keep:
+                prepared[b] = data
+        return data
+
+    for a in range(0, len(rows), step):
+        left = block(a) if symmetric else _prepare(df, [columns[i] for i in rows[a:a + step]], method)
+        for b in range(0, n_cols, step):
+            if symmetric and b < a:
+                out[a:a + step, b:b + step] = out[b:b + step, a:a + step].T
+                continue
+            out[a:a + step, b:b + step] = _block(left, block(b))
+        if symmetric:
+            prepared.pop(a, None)  # every later row block starts past it
+    diagonal = out[np.arange(len(rows)), rows]
+    out[np.arange(len(rows)), rows] = np.where(np.isfinite(diagonal), 1.0, np.nan)
+    return out
+
+
+def _block(left: Dict[str, Any], right: Dict[str, Any]) -> np.ndarray:
+    xa, xb = left["values"], right["values"]
+    with np.errstate(all="ignore"):
+        if left["complete"] and right["complete"]:
+            r = xa.T @ xb / (len(xa) - 1)
+        else:
+            # The masks are kept as bool and widened one block at a time.
+            ma, mb = left["present"].astype(np.float64), right["present"].astype(np.float64)
+            n = ma.T @ mb
+            sum_a, sum_b = xa.T @ mb, ma.T @ xb
+            ss_a, ss_b = (xa * xa).T @ mb, ma.T @ (xb * xb)
+            cov = xa.T @ xb - sum_a * sum_b / n
+            r = cov / np.sqrt((ss_a - sum_a ** 2 / n) * (ss_b - sum_b ** 2 / n))
+            r[n < 2] = np.nan
+    return np.clip(r, -1.0, 1.0)
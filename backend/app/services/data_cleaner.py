@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+from app.services import column_executor
 
 def detect_outliers(df: pd.DataFrame, column: str, method: str = 'iqr') -> Dict[str, Any]:
     if column not in df.columns:
@@ -38,15 +40,35 @@ def detect_outliers(df: pd.DataFrame, column: str, method: str = 'iqr') -> Dict[
         'max':             round(float(series.max()), 3),
     }
 
-def detect_duplicates(df: pd.DataFrame) -> Dict[str, Any]:
-    dup_mask    = df.duplicated()
-    dup_count   = int(dup_mask.sum())
+def detect_duplicates(df: pd.DataFrame, dup_count: Optional[int] = None) -> Dict[str, Any]:
+    if dup_count is None:
+        dup_count = int(df.duplicated().sum())
     return {
         'duplicate_count': dup_count,
-        'duplicate_pct':   round(float(dup_mask.mean() * 100), 1),
+        'duplicate_pct':   round(float(dup_count / len(df) * 100), 1) if len(df) else float('nan'),
         'total_rows':      len(df),
     }
 
+def fill_missing(series: pd.Series, value) -> pd.Series:
+    # Category columns only accept known labels, so register the fill value first.
+    if isinstance(series.dtype, pd.CategoricalDtype) and pd.notna(value) \
+            and value not in series.cat.categories:
+        series = series.cat.add_categories([value])
+    # Columns narrowed at ingest (int8, float32, ...) go back to 64 bits
+    # rather than overflowing or rounding the fill value.
+    elif series.dtype.kind in "iuf" and series.dtype.itemsize < 8 and not _holds(series.dtype, value):
+        series = series.astype(np.float64 if series.dtype.kind == "f" else np.int64)
+    return series.fillna(value)
+
+def _holds(dtype: np.dtype, value) -> bool:
+    if not isinstance(value, (int, float, np.number)) or isinstance(value, bool):
+        return True  # non-numeric fills change the dtype anyway
+    try:
+        with np.errstate(all='ignore'):
+            return dtype.type(value).item() == value
+    except OverflowError:
+        return False
+
 def impute_missing(df: pd.DataFrame, column: str, method: str = 'mean') -> Dict[str, Any]:
     if column not in df.columns:
         return {'error': 'Column not found'}
@@ -55,30 +77,27 @@ def impute_missing(df: pd.DataFrame, column: str, method: str = 'mean') -> Dict[
     if missing_before == 0:
         return {'message': 'No missing values', 'imputed': 0}
 
-    df_copy = df.copy()
-    series  = pd.to_numeric(df_copy[column], errors='coerce')
+    series  = pd.to_numeric(df[column], errors='coerce')
 
     if method == 'mean':
         fill_val = series.mean()
     elif method == 'median':
         fill_val = series.median()
     elif method == 'mode':
-        mode = df_copy[column].mode()
+        mode = df[column].mode()
         fill_val = mode[0] if len(mode) > 0 else None
     elif method == 'zero':
         fill_val = 0
     else:
         fill_val = series.mean()
 
-    if fill_val is not None:
-        df_copy[column] = df_copy[column].fillna(fill_val)
-
-    missing_after = int(df_copy[column].isna().sum())
+    # Only the target column is touched; no full-frame copy.
+    missing_after = missing_before if fill_val is None or pd.isna(fill_val) else 0
 
     return {
         'column':         column,
         'method':         method,
-        'fill_value':     round(float(fill_val), 3) if isinstance(fill_val, float) else fill_val,
+        'fill_value':     round(float(fill_val), 3) if isinstance(fill_val, (float, np.floating)) else fill_val,
         'imputed_count':  missing_before - missing_after,
         'missing_before': missing_before,
         'missing_after':  missing_after,
@@ -88,9 +107,8 @@ def recode_variable(df: pd.DataFrame, column: str, mapping: Dict) -> Dict[str, A
     if column not in df.columns:
         return {'error': 'Column not found'}
     before = df[column].value_counts().to_dict()
-    df_copy = df.copy()
-    df_copy[column] = df_copy[column].map(mapping).fillna(df_copy[column])
-    after = df_copy[column].value_counts().to_dict()
+    original = df[column].astype(object)  # categoricals reject new labels
+    after = original.map(mapping).fillna(original).value_counts().to_dict()
     return {
         'column':       column,
         'before':       {str(k): int(v) for k, v in before.items()},
@@ -98,25 +116,37 @@ def recode_variable(df: pd.DataFrame, column: str, mapping: Dict) -> Dict[str, A
         'recoded_count': sum(1 for v in mapping.values() if v is not None),
     }
 
-def get_cleaning_summary(df: pd.DataFrame) -> Dict[str, Any]:
+def summarize_column(df: pd.DataFrame, column: str) -> Dict[str, Any]:
+    """Per-column part of the cleaning summary: missing % and outlier count."""
+    entry = {'missing_pct': round(float(df[column].isna().mean() * 100), 1), 'outliers': 0}
+    if pd.api.types.is_numeric_dtype(df[column]):
+        entry['outliers'] = detect_outliers(df, column).get('outlier_count', 0)
+    return entry
+
+def get_cleaning_summary(
+    df: pd.DataFrame,
+    column_summaries: Optional[Dict[str, Dict[str, Any]]] = None,
+    dup_count: Optional[int] = None,
+) -> Dict[str, Any]:
+    """``column_summaries`` (from ``summarize_column``) and ``dup_count`` may
+    be passed in precomputed; anything missing is computed from ``df``."""
+    if column_summaries is None:
+        column_summaries = column_executor.map_columns(summarize_column, df)
     summary = {
         'total_rows':    len(df),
         'total_columns': len(df.columns),
         'missing':       {},
         'outliers':      {},
-        'duplicates':    detect_duplicates(df),
+        'duplicates':    detect_duplicates(df, dup_count),
         'recommendations': [],
     }
 
     for col in df.columns:
-        missing_pct = round(float(df[col].isna().mean() * 100), 1)
-        if missing_pct > 0:
-            summary['missing'][col] = missing_pct
-
-        if pd.api.types.is_numeric_dtype(df[col]):
-            outlier_info = detect_outliers(df, col)
-            if outlier_info.get('outlier_count', 0) > 0:
-                summary['outliers'][col] = outlier_info['outlier_count']
+        entry = column_summaries[col]
+        if entry['missing_pct'] > 0:
+            summary['missing'][col] = entry['missing_pct']
+        if entry['outliers'] > 0:
+            summary['outliers'][col] = entry['outliers']
 
     if summary['duplicates']['duplicate_count'] > 0:
         summary['recommendations'].append(
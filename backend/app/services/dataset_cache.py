@@ -0,0 +1,205 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from app.services import dataset_store, profile_cache
+
+DEFAULT_MAX_BYTES = int(os.getenv("DATASET_CACHE_MAX_BYTES", str(1 << 30)))  # 1 GiB
+DEFAULT_TTL_SECONDS = float(os.getenv("DATASET_CACHE_TTL_SECONDS", "3600"))
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+class DatasetCache:
+    """Byte-budgeted LRU cache of dataset entries backed by the dataset store.
+
+    Entries are plain dicts (``df`` plus metadata such as ``report`` and
+    ``filename``). Entries idle for longer than ``ttl_seconds`` or pushed out
+    by the byte budget are dropped and transparently reloaded from the store
+    on the next ``get``. Pinned entries and entries with unsaved changes
+    (which the write-behind persistence commits as a new version) are never
+    evicted.
+
+    Each worker process has its own cache over the shared store. Entries
+    remember the store generation they were loaded at, and an entry that
+    another worker has since rewritten is reloaded rather than served stale.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._last_access: Dict[str, float] = {}
+        self._pins: Dict[str, int] = {}
+        self._dirty: set = set()
+        self._generations: Dict[str, Any] = {}
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+
+    # -- mapping-style access ------------------------------------------------
+
+    def __contains__(self, dataset_id: str) -> bool:
+        with self._lock:
+            return dataset_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, dataset_id: str, default: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Return the entry for ``dataset_id``, reloading it from the store if evicted."""
+        with self._lock:
+            self.evict_expired()
+            entry = self._entries.get(dataset_id)
+            if entry is not None and not self._is_stale(dataset_id):
+                self._touch(dataset_id)
+                return entry
+        # Read the generation before the data so a concurrent rewrite is
+        # caught on the next access rather than masked.
+        generation = dataset_store.generation(dataset_id)
+        if generation is None and not dataset_store.dataset_exists(dataset_id):
+            return default
+        df = dataset_store.load_dataset(dataset_id)
+        metadata = dataset_store.load_metadata(dataset_id)
+        with self._lock:
+            if dataset_id in self._entries and not self._is_stale(dataset_id):  # loaded concurrently
+                self._touch(dataset_id)
+                return self._entries[dataset_id]
+            self._discard(dataset_id)
+            return self._insert(dataset_id, {**metadata, "df": df}, generation)
+
+    def peek(self, dataset_id: str) -> Optional[pd.DataFrame]:
+        """Return the resident frame for ``dataset_id`` without loading it."""
+        with self._lock:
+            entry = self._entries.get(dataset_id)
+            if entry is None or self._is_stale(dataset_id):
+                return None
+            self._touch(dataset_id)
+            return entry["df"]
+
+    def put(self, dataset_id: str, df: pd.DataFrame, dirty: bool = False, **metadata) -> Dict[str, Any]:
+        """Insert or replace an entry. ``dirty`` marks data not yet in the store."""
+        with self._lock:
+            entry = {**self._entries.get(dataset_id, {}), **metadata, "df": df}
+            # Cached statistics follow the frame through profile_cache.record_edit.
+            self._remove(dataset_id)
+            if dirty:
+                self._dirty.add(dataset_id)
+            generation = None if dirty else dataset_store.generation(dataset_id)
+            return self._insert(dataset_id, entry, generation)
+
+    def update_df(self, dataset_id: str, df: pd.DataFrame, dirty: bool = False) -> Dict[str, Any]:
+        return self.put(dataset_id, df, dirty=dirty)
+
+    def is_dirty(self, dataset_id: str) -> bool:
+        with self._lock:
+            return dataset_id in self._dirty
+
+    def mark_clean(self, dataset_id: str) -> None:
+        with self._lock:
+            self._dirty.discard(dataset_id)
+            self._generations[dataset_id] = dataset_store.generation(dataset_id)
+            self._enforce_budget()
+
+    # -- pinning -------------------------------------------------------------
+
+    @contextmanager
+    def pinned(self, dataset_id: str):
+        """Keep ``dataset_id`` resident for the duration of the block and yield its entry."""
+        with self._lock:
+            self._pins[dataset_id] = self._pins.get(dataset_id, 0) + 1
+        try:
+            yield self.get(dataset_id)
+        finally:
+            with self._lock:
+                self._pins[dataset_id] -= 1
+                if not self._pins[dataset_id]:
+                    del self._pins[dataset_id]
+                self._enforce_budget()
+
+    # -- eviction ------------------------------------------------------------
+
+    def evict(self, dataset_id: str) -> bool:
+        """Drop ``dataset_id`` from memory unless it is pinned or not yet stored.
+
+        Dirty entries stay resident until persistence has committed them
+        (see ``mark_clean``); writing them here would bypass versioning.
+        """
+        with self._lock:
+            if dataset_id not in self._entries or self._pins.get(dataset_id):
+                return False
+            if dataset_id in self._dirty or not dataset_store.dataset_exists(dataset_id):
+                return False
+            self._discard(dataset_id)
+            return True
+
+    def evict_expired(self) -> int:
+        with self._lock:
+            now = time.monotonic()
+            expired = [
+                did for did, last in self._last_access.items()
+                if now - last > self.ttl_seconds
+            ]
+            return sum(1 for did in expired if self.evict(did))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "pinned": sorted(self._pins),
+                "dirty": sorted(self._dirty),
+            }
+
+    # -- internals -----------------------------------------------------------
+
+    def _insert(self, dataset_id: str, entry: Dict[str, Any], generation=None) -> Dict[str, Any]:
+        entry.setdefault("created_at", datetime.utcnow().isoformat())
+        size = frame_nbytes(entry["df"])
+        self._entries[dataset_id] = entry
+        self._sizes[dataset_id] = size
+        self._generations[dataset_id] = generation
+        self._total_bytes += size
+        self._touch(dataset_id)
+        self._enforce_budget(keep=dataset_id)
+        return entry
+
+    def _discard(self, dataset_id: str) -> None:
+        self._remove(dataset_id)
+        profile_cache.discard(dataset_id)
+
+    def _remove(self, dataset_id: str) -> None:
+        if dataset_id in self._entries:
+            del self._entries[dataset_id]
+            self._total_bytes -= self._sizes.pop(dataset_id)
+            self._last_access.pop(dataset_id, None)
+            self._generations.pop(dataset_id, None)
+            self._dirty.discard(dataset_id)
+
+    def _is_stale(self, dataset_id: str) -> bool:
+        # Unsaved entries are authoritative; anything else must match the store.
+        if dataset_id in self._dirty:
+            return False
+        return self._generations.get(dataset_id) != dataset_store.generation(dataset_id)
+
+    def _touch(self, dataset_id: str) -> None:
+        self._entries.move_to_end(dataset_id)
+        self._last_access[dataset_id] = time.monotonic()
+
+    def _enforce_budget(self, keep: Optional[str] = None) -> None:
+        # Least recently used first; the entry just inserted is kept even if
+        # it alone exceeds the budget so the current request can use it.
+        for did in list(self._entries):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if did != keep:
+                self.evict(did)
@@ -0,0 +1,108 @@
+from typing import Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from app.services import dataset_store
+
+
+class DatasetHandle:
+    """Lazy, column-projected view of a stored dataset.
+
+    Behaves like the read-only slice of the DataFrame API the analysis
+    services use (``columns``, ``len``, ``handle[col]``, ``handle[[cols]]``
+    and boolean row filtering) but only decodes the columns a caller asks
+    for. When the dataset is already resident in memory, ``frame`` is
+    projected instead of touching the store.
+    """
+
+    def __init__(self, dataset_id: str, frame: Optional[pd.DataFrame] = None,
+                 rows: Optional[np.ndarray] = None):
+        self.dataset_id = dataset_id
+        self._frame = frame
+        self._rows = rows  # positional boolean mask over the stored rows
+        self._columns: Optional[pd.Index] = None
+        self._n_rows: Optional[int] = None
+
+    @property
+    def columns(self) -> pd.Index:
+        if self._columns is None:
+            if self._frame is not None:
+                self._columns = self._frame.columns
+            else:
+                self._columns = pd.Index(dataset_store.column_names(self.dataset_id))
+        return self._columns
+
+    @property
+    def frame(self) -> Optional[pd.DataFrame]:
+        """The resident frame this handle projects, unless row-filtered."""
+        return self._frame if self._rows is None else None
+
+    def __len__(self) -> int:
+        if self._rows is not None:
+            return int(self._rows.sum())
+        if self._n_rows is None:
+            if self._frame is not None:
+                self._n_rows = len(self._frame)
+            else:
+                self._n_rows = dataset_store.open_table(self.dataset_id).num_rows
+        return self._n_rows
+
+    def select(self, columns: Iterable[str]) -> pd.DataFrame:
+        """Materialise only ``columns`` (in the given order) as a DataFrame."""
+        columns = list(dict.fromkeys(columns))
+        missing = [c for c in columns if c not in self.columns]
+        if missing:
+            raise KeyError(f"{missing} not in index")
+        if self._frame is not None:
+            df = self._frame[columns]
+        else:
+            df = dataset_store.load_dataset(self.dataset_id, columns)
+        if self._rows is not None:
+            df = df[self._rows]
+        return df
+
+    def take(self, columns: Iterable[str], positions: np.ndarray) -> pd.DataFrame:
+        """Materialise ``columns`` for the rows at ``positions`` only.
+
+        Positions are relative to this handle's rows. Unlike ``select`` only
+        the requested rows are decoded, so the cost is independent of the
+        dataset size.
+        """
+        columns = list(dict.fromkeys(columns))
+        missing = [c for c in columns if c not in self.columns]
+        if missing:
+            raise KeyError(f"{missing} not in index")
+        positions = np.asarray(positions, dtype=np.int64)
+        if self._rows is not None:
+            positions = np.flatnonzero(self._rows)[positions]
+        if self._frame is not None:
+            return self._frame[columns].iloc[positions]
+        table = dataset_store.open_table(self.dataset_id).select(columns)
+        df = table.take(pa.array(positions)).to_pandas()
+        df.index = positions
+        return df
+
+    def to_pandas(self) -> pd.DataFrame:
+        return self.select(self.columns)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.select([key])[key]
+        if isinstance(key, (pd.Series, np.ndarray)) and key.dtype == bool:
+            mask = np.asarray(key)
+            if self._rows is not None:
+                rows = self._rows.copy()
+                rows[rows] = mask
+                mask = rows
+            return DatasetHandle(self.dataset_id, self._frame, mask)
+        return self.select(key)
+
+
+def select_columns(data: Union[pd.DataFrame, DatasetHandle], columns: Iterable[str]) -> pd.DataFrame:
+    """Project a DataFrame or DatasetHandle to ``columns`` (unknown names skipped)."""
+    present = [c for c in dict.fromkeys(columns) if c and c in data.columns]
+    if isinstance(data, DatasetHandle):
+        return data.select(present)
+    return data[present]
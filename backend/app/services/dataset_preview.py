@@ -0,0 +1,107 @@
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services import dataset_store
+from app.services.cohort_builder import OPERATORS
+from app.services.dataset_handle import DatasetHandle
+
+# Whole-dataset sort orders, reused while a grid pages through one sort.
+SORT_ORDERS_MAX = 8
+_sort_orders: "OrderedDict[Tuple[str, str, bool], Tuple[Any, Any, np.ndarray]]" = OrderedDict()
+_sort_lock = threading.Lock()
+
+
+def get_preview_page(
+    handle: DatasetHandle,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    columns: Optional[List[str]] = None,
+    sort_by: Optional[str] = None,
+    descending: bool = False,
+    filter_column: Optional[str] = None,
+    filter_operator: Optional[str] = None,
+    filter_value: Any = "",
+) -> Dict[str, Any]:
+    """Return one window of rows, stringified for display.
+
+    Filtering and sorting read only the filter and sort columns; the page
+    itself is then taken row-wise, so converting and serialising cost the
+    same regardless of dataset size. Filters use the cohort builder's
+    operators. Raises ``ValueError`` for unknown columns or operators.
+    """
+    headers = [str(c) for c in handle.columns] if columns is None else list(columns)
+    unknown = [c for c in headers + [sort_by, filter_column] if c and c not in handle.columns]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+
+    positions = None  # None means every row in stored order
+    if filter_column:
+        if filter_operator not in OPERATORS:
+            raise ValueError(f"Unknown filter operator '{filter_operator}'")
+        series = handle[filter_column].reset_index(drop=True)
+        try:
+            mask = OPERATORS[filter_operator](series, filter_value)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Cannot apply '{filter_operator}' to '{filter_column}': {e}")
+        positions = np.flatnonzero(mask.to_numpy(dtype=bool))
+    if sort_by:
+        order = _sort_order(handle, sort_by, descending)
+        if positions is not None:
+            # The sort is stable, so filtering the full order keeps ties in
+            # stored order just as sorting the filtered rows would.
+            keep = np.zeros(len(handle), dtype=bool)
+            keep[positions] = True
+            order = order[keep[order]]
+        positions = order
+
+    total = len(handle) if positions is None else len(positions)
+    stop = total if limit is None else min(total, offset + limit)
+    window = np.arange(offset, stop) if positions is None else positions[offset:stop]
+
+    page = handle.take(headers, window)
+    # Convert only this page; categoricals must become object before
+    # blank-filling since "" isn't one of their categories.
+    rows = page.astype(object).where(pd.notna(page), "").astype(str).to_dict(orient="records")
+    return {
+        "headers": headers,
+        "rows": rows,
+        "offset": offset,
+        "limit": limit,
+        "total_rows": total,
+        "has_more": stop < total,
+    }
+
+
+def _sort_order(handle: DatasetHandle, column: str, descending: bool) -> np.ndarray:
+    """Positions of every stored row sorted by ``column``, cached until the
+    dataset changes: a resident frame is replaced by each edit, and the store
+    generation changes when the dataset is rewritten."""
+    frame = handle.frame
+    generation = dataset_store.generation(handle.dataset_id) if frame is None else None
+    key = (handle.dataset_id, column, descending)
+    with _sort_lock:
+        cached = _sort_orders.get(key)
+        if cached is not None:
+            frame_ref, cached_generation, order = cached
+            if frame is not None:
+                current = frame_ref is not None and frame_ref() is frame
+            else:
+                current = frame_ref is None and cached_generation == generation
+            if current:
+                _sort_orders.move_to_end(key)
+                return order
+    series = handle[column].reset_index(drop=True)
+    order = series.sort_values(
+        ascending=not descending, kind="stable", na_position="last"
+    ).index.to_numpy()
+    with _sort_lock:
+        _sort_orders[key] = (weakref.ref(frame) if frame is not None else None, generation, order)
+        _sort_orders.move_to_end(key)
+        while len(_sort_orders) > SORT_ORDERS_MAX:
+            _sort_orders.popitem(last=False)
+    return order
@@ -0,0 +1,430 @@
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# Uploaded datasets are persisted as uncompressed Arrow IPC (Feather v2) files
+# so reloads skip CSV parsing and keep the dtypes inferred at ingest. The
+# directory is shared by every worker process on the host: workers memory-map
+# the same files, so the OS keeps one copy of each dataset in the page cache
+# however many workers read it. Point DATASET_STORE_DIR at a tmpfs such as
+# /dev/shm to keep the store itself in shared memory.
+STORE_DIR = os.getenv(
+    "DATASET_STORE_DIR",
+    os.path.join(tempfile.gettempdir(), "researchflow_datasets"),
+)
+
+# Datasets uploaded before the columnar store existed were dumped here.
+_LEGACY_CSV = "/tmp/{dataset_id}.csv"
+
+
+def _object_path(content_key: str, ext: str) -> str:
+    return os.path.join(STORE_DIR, "objects", f"{content_key}{ext}")
+
+
+def _data_path(dataset_id: str) -> str:
+    return os.path.join(STORE_DIR, f"{dataset_id}.arrow")
+
+
+def _meta_path(dataset_id: str) -> str:
+    return os.path.join(STORE_DIR, f"{dataset_id}.json")
+
+
+def _version_dir(dataset_id: str) -> str:
+    return os.path.join(STORE_DIR, dataset_id)
+
+
+def _atomic_write(path: str, write) -> None:
+    os.makedirs(STORE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _write_json(path: str, obj: Any) -> None:
+    payload = json.dumps(obj, default=str)
+
+    def write(tmp):
+        with open(tmp, "w") as fh:
+            fh.write(payload)
+
+    _atomic_write(path, write)
+
+
+def _read_json(path: str) -> Any:
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def _write_table(path: str, table: pa.Table) -> None:
+    _atomic_write(
+        path,
+        lambda tmp: feather.write_feather(table, tmp, compression="uncompressed"),
+    )
+
+
+def _map_table(path: str) -> pa.Table:
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def _arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """Stringify object columns Arrow cannot type (e.g. mixed int/str values)."""
+    fixed = {}
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        try:
+            pa.array(df[col], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            series = df[col]
+            fixed[col] = series.where(series.isna(), series.astype(str))
+    return df.assign(**fixed) if fixed else df
+
+
+def to_arrow_table(df: pd.DataFrame) -> pa.Table:
+    return pa.Table.from_pandas(_arrow_safe(df), preserve_index=False)
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def dataset_exists(dataset_id: str) -> bool:
+    return (
+        os.path.exists(_data_path(dataset_id))
+        or os.path.exists(_LEGACY_CSV.format(dataset_id=dataset_id))
+    )
+
+
+def save_dataset(
+    dataset_id: str,
+    df: pd.DataFrame,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Persist ``df`` (and optionally its metadata) and return the file path.
+
+    Once a dataset has cleaning versions the full frame is committed as a
+    new ``replace`` version rather than overwriting the base file.
+    """
+    if current_version(dataset_id) > 0:
+        path = commit_version(dataset_id, df, "replace")["path"]
+    else:
+        path = _data_path(dataset_id)
+        _write_table(path, to_arrow_table(df))
+    if metadata is not None:
+        save_metadata(dataset_id, metadata)
+    return path
+
+
+class DatasetWriter:
+    """Writes a dataset incrementally, one Arrow record batch at a time.
+
+    The file only becomes visible under ``dataset_id`` once ``commit()``
+    succeeds; leaving the ``with`` block on an exception discards it.
+    """
+
+    def __init__(self, dataset_id: str):
+        os.makedirs(STORE_DIR, exist_ok=True)
+        self.dataset_id = dataset_id
+        self._path = _data_path(dataset_id)
+        self._tmp_path = f"{self._path}.{uuid.uuid4().hex}.tmp"
+        self._sink = None
+        self._writer = None
+
+    def write_batch(self, batch: pa.RecordBatch) -> None:
+        if self._writer is None:
+            self._sink = pa.OSFile(self._tmp_path, "wb")
+            self._writer = pa.ipc.new_file(self._sink, batch.schema)
+        self._writer.write_batch(batch)
+
+    def commit(self) -> pa.Table:
+        """Publish the written batches and return them memory-mapped."""
+        if self._writer is None:
+            raise ValueError("No data written")
+        self._close()
+        os.replace(self._tmp_path, self._path)
+        return open_table(self.dataset_id)
+
+    def abort(self) -> None:
+        self._close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def _close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._sink.close()
+            self._writer = self._sink = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.abort()
+        return False
+
+
+def open_writer(dataset_id: str) -> DatasetWriter:
+    return DatasetWriter(dataset_id)
+
+
+def open_table(dataset_id: str) -> pa.Table:
+    """Memory-map a stored dataset as an Arrow table without reading it.
+
+    Column buffers are backed by the OS page cache, so concurrent readers of
+    the same dataset share memory and only the columns actually converted
+    are paged in. Raises ``FileNotFoundError`` when the dataset is unknown.
+    """
+    return _open_version(dataset_id, current_version(dataset_id))
+
+
+def column_names(dataset_id: str) -> List[str]:
+    return open_table(dataset_id).column_names
+
+
+def load_dataset(dataset_id: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Load a stored dataset, optionally restricted to ``columns``.
+
+    Unknown names in ``columns`` are skipped so callers can report missing
+    columns the same way they would for a full frame. Raises
+    ``FileNotFoundError`` when the dataset is unknown.
+    """
+    table = open_table(dataset_id)
+    if columns is not None:
+        present = set(table.column_names)
+        table = table.select([c for c in dict.fromkeys(columns) if c in present])
+    # split_blocks keeps each column in its own block so null-free numeric
+    # columns are handed to pandas without copying out of the mapping.
+    return table.to_pandas(split_blocks=True)
+
+
+def save_metadata(dataset_id: str, metadata: Dict[str, Any]) -> None:
+    _write_json(_meta_path(dataset_id), metadata)
+
+
+def load_metadata(dataset_id: str) -> Dict[str, Any]:
+    path = _meta_path(dataset_id)
+    if not os.path.exists(path):
+        return {}
+    return _read_json(path)
+
+
+def delete_dataset(dataset_id: str) -> None:
+    for path in (_data_path(dataset_id), _meta_path(dataset_id)):
+        if os.path.exists(path):
+            os.remove(path)
+    shutil.rmtree(_version_dir(dataset_id), ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# Copy-on-write versions
+# ---------------------------------------------------------------------------
+#
+# Version 0 is the ingested file ``<id>.arrow``. Every later version is an
+# immutable manifest ``<id>/v<n>.json`` naming, for each column in order, the
+# file that holds it. A cleaning op that changes k columns writes only those
+# k columns to ``<id>/v<n>.arrow`` and points every other column at its
+# parent's file, so versions share unchanged column buffers on disk and, once
+# memory-mapped, in memory. ``<id>/HEAD`` holds the current version number.
+
+@contextmanager
+def _version_lock(dataset_id: str):
+    # Serialises version commits across worker processes.
+    os.makedirs(_version_dir(dataset_id), exist_ok=True)
+    with open(os.path.join(_version_dir(dataset_id), ".lock"), "w") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def generation(dataset_id: str) -> Optional[Tuple[int, int, int]]:
+    """Cheap token that changes whenever any worker rewrites ``dataset_id``.
+
+    Built from the base file's inode and mtime (replaced atomically on every
+    save) and the current version number, so processes can tell whether a
+    frame they hold in memory is still current without reading the data.
+    Returns ``None`` for unknown datasets.
+    """
+    try:
+        st = os.stat(_data_path(dataset_id))
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, current_version(dataset_id))
+
+
+def current_version(dataset_id: str) -> int:
+    head = os.path.join(_version_dir(dataset_id), "HEAD")
+    if not os.path.exists(head):
+        return 0
+    with open(head) as fh:
+        return int(fh.read().strip())
+
+
+def _manifest_path(dataset_id: str, version: int) -> str:
+    return os.path.join(_version_dir(dataset_id), f"v{version}.json")
+
+
+def _base_manifest(dataset_id: str) -> Dict[str, Any]:
+    path = _data_path(dataset_id)
+    if not os.path.exists(path):
+        _migrate_legacy_csv(dataset_id)
+    rel = os.path.relpath(path, STORE_DIR)
+    return {
+        "version": 0,
+        "parent": None,
+        "operation": "ingest",
+        "changed_columns": None,
+        "columns": [[name, rel] for name in _map_table(path).column_names],
+        "path": path,
+    }
+
+
+def get_version(dataset_id: str, version: int) -> Dict[str, Any]:
+    if version == 0:
+        return _base_manifest(dataset_id)
+    path = _manifest_path(dataset_id, version)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Dataset {dataset_id} has no version {version}")
+    return _read_json(path)
+
+
+def list_versions(dataset_id: str) -> List[Dict[str, Any]]:
+    """Lineage of ``dataset_id`` from the ingested file to the current version."""
+    versions = [get_version(dataset_id, v) for v in range(current_version(dataset_id) + 1)]
+    return [{k: v for k, v in m.items() if k != "columns"} for m in versions]
+
+
+def _open_version(dataset_id: str, version: int) -> pa.Table:
+    manifest = get_version(dataset_id, version)
+    files: Dict[str, pa.Table] = {}
+    arrays = []
+    for name, rel in manifest["columns"]:
+        if rel not in files:
+            files[rel] = _map_table(os.path.join(STORE_DIR, rel))
+        arrays.append(files[rel].column(name))
+    names = [name for name, _ in manifest["columns"]]
+    if arrays:
+        return pa.Table.from_arrays(arrays, names=names)
+    # No columns left: keep the row count from any file in the lineage.
+    return _map_table(_data_path(dataset_id)).select([])
+
+
+def load_version(dataset_id: str, version: int, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    table = _open_version(dataset_id, version)
+    if columns is not None:
+        present = set(table.column_names)
+        table = table.select([c for c in dict.fromkeys(columns) if c in present])
+    return table.to_pandas(split_blocks=True)
+
+
+def commit_version(
+    dataset_id: str,
+    df: pd.DataFrame,
+    operation: str,
+    changed_columns: Optional[List[str]] = None,
+    details: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Record ``df`` as the next version of ``dataset_id`` and return its manifest.
+
+    With ``changed_columns`` only those columns are written; columns of
+    ``df`` not listed must be unchanged from the current version. Without
+    it (row-level operations such as dropping duplicates) every column is
+    written.
+    """
+    with _version_lock(dataset_id):
+        parent = current_version(dataset_id)
+        parent_files = dict(map(tuple, get_version(dataset_id, parent)["columns"]))
+        version = parent + 1
+
+        data_path = os.path.join(_version_dir(dataset_id), f"v{version}.arrow")
+        rel = os.path.relpath(data_path, STORE_DIR)
+        if changed_columns is None:
+            written = list(df.columns)
+        else:
+            written = [c for c in df.columns if c in set(changed_columns) or c not in parent_files]
+        if written:
+            _write_table(data_path, to_arrow_table(df[written]))
+
+        written_set = set(written)
+        manifest = {
+            "version": version,
+            "parent": parent,
+            "operation": operation,
+            "details": details or {},
+            "changed_columns": written if changed_columns is not None else None,
+            "columns": [
+                [name, rel if name in written_set else parent_files[name]]
+                for name in df.columns
+            ],
+            "created_at": datetime.utcnow().isoformat(),
+            "path": _manifest_path(dataset_id, version),
+        }
+        _write_json(manifest["path"], manifest)
+
+        def write_head(tmp):
+            with open(tmp, "w") as fh:
+                fh.write(str(version))
+
+        _atomic_write(os.path.join(_version_dir(dataset_id), "HEAD"), write_head)
+    return manifest
+
+
+# ---------------------------------------------------------------------------
+# Content-addressed deduplication
+# ---------------------------------------------------------------------------
+#
+# The first dataset ingested from a given upload is hard-linked under
+# objects/<content_key>.arrow together with its ingest report. Dataset files
+# are only ever replaced (never rewritten in place), so cleaning a dataset
+# gives it a new inode and leaves the shared object untouched.
+
+def _link_or_copy(src: str, dst: str) -> None:
+    tmp = f"{dst}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+def register_content(content_key: str, dataset_id: str, report: Dict[str, Any]) -> None:
+    """Record ``dataset_id``'s freshly ingested file as the copy of ``content_key``."""
+    os.makedirs(os.path.dirname(_object_path(content_key, "")), exist_ok=True)
+    _link_or_copy(_data_path(dataset_id), _object_path(content_key, ".arrow"))
+    _write_json(_object_path(content_key, ".json"), report)
+
+
+def link_content(content_key: str, dataset_id: str) -> Optional[Dict[str, Any]]:
+    """Point ``dataset_id`` at previously ingested content without re-parsing it.
+
+    Returns the stored ingest report, or ``None`` if ``content_key`` is new.
+    """
+    data = _object_path(content_key, ".arrow")
+    meta = _object_path(content_key, ".json")
+    if not (os.path.exists(data) and os.path.exists(meta)):
+        return None
+    os.makedirs(STORE_DIR, exist_ok=True)
+    _link_or_copy(data, _data_path(dataset_id))
+    return _read_json(meta)
+
+
+def _migrate_legacy_csv(dataset_id: str) -> None:
+    csv_path = _LEGACY_CSV.format(dataset_id=dataset_id)
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"Dataset {dataset_id} not found")
+    save_dataset(dataset_id, pd.read_csv(csv_path))
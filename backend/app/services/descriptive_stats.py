@@ -1,81 +1,114 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
-def compute_descriptive(df: pd.DataFrame) -> Dict[str, Any]:
+from app.services import column_executor, column_stats, correlation, normality
+
+# Above this many numeric columns the summary lists the strongest pairs
+# instead of the full matrix; tiles are served by /descriptive/{id}/correlations.
+MAX_MATRIX_COLUMNS = 50
+TOP_PAIRS = 50
+
+def describe_column(df: pd.DataFrame, col: str) -> Optional[Dict[str, Any]]:
+    """Summary row for one column (None for an all-missing numeric column)."""
+    if df[[col]].select_dtypes(include=[np.number]).shape[1]:
+        return _describe_numeric(df, col)
+    return _describe_categorical(df, col)
+
+
+def _describe_numeric(df: pd.DataFrame, col: str) -> Optional[Dict[str, Any]]:
+    stats = column_stats.numeric(df, col)
+    if stats['n'] == 0:
+        return None
+    return {
+        'variable':  col,
+        'n':         stats['n'],
+        'missing':   stats['n_missing'],
+        'missing_pct': round(stats['n_missing'] / stats['n_total'] * 100, 1),
+        'mean':      round(stats['mean'], 2),
+        'sd':        round(stats['sd'], 2),
+        'median':    round(stats['median'], 2),
+        'q1':        round(stats['q1'], 2),
+        'q3':        round(stats['q3'], 2),
+        'iqr':       round(stats['q3'] - stats['q1'], 2),
+        'min':       round(stats['min'], 2),
+        'max':       round(stats['max'], 2),
+        'skewness':  round(stats['skewness'], 3),
+        'kurtosis':  round(stats['kurtosis'], 3),
+    }
+
+
+def _normality_fields(result: Dict[str, Any]) -> Dict[str, Any]:
+    p = round(result['p_value'], 4) if result['p_value'] is not None else None
+    return {
+        'normality_test': result['test'],
+        'normality_p':    p,
+        'shapiro_p':      p if result['test'] == 'shapiro' else None,
+        'normal':         result['normal'],
+    }
+
+
+def _describe_categorical(df: pd.DataFrame, col: str) -> Dict[str, Any]:
+    stats    = column_stats.values(df, col)
+    vc       = stats['counts']
+    vc       = vc[vc > 0]  # unused categories of a category column
+    pct      = vc / vc.sum() * 100
+    freq_table = [
+        {'value': str(k), 'n': int(v), 'pct': round(float(pct[k]), 1)}
+        for k, v in vc.items()
+    ]
+    return {
+        'variable':   col,
+        'n':          stats['n'],
+        'missing':    stats['n_missing'],
+        'missing_pct':round(stats['n_missing'] / stats['n_total'] * 100, 1) if stats['n_total'] else float('nan'),
+        'n_unique':   stats['n_unique'],
+        'mode':       str(stats['mode']) if stats['mode'] is not None else '',
+        'freq_table': freq_table[:20],
+    }
+
+
+def compute_descriptive(
+    df: pd.DataFrame,
+    column_rows: Optional[Dict[str, Any]] = None,
+    correlations: Optional[Dict] = None,
+) -> Dict[str, Any]:
+    """``column_rows`` (from ``describe_column``) and ``correlations`` (from
+    ``correlation.matrix``) may be passed in precomputed."""
     numeric_cols     = df.select_dtypes(include=[np.number]).columns.tolist()
     categorical_cols = df.select_dtypes(exclude=[np.number]).columns.tolist()
+    if column_rows is None:
+        column_rows = column_executor.map_columns(describe_column, df)
 
-    numeric_summary = []
-    for col in numeric_cols:
-        series = df[col].dropna()
-        if len(series) == 0:
-            continue
-        q1  = float(series.quantile(0.25))
-        q3  = float(series.quantile(0.75))
-        row = {
-            'variable':  col,
-            'n':         int(series.count()),
-            'missing':   int(df[col].isna().sum()),
-            'missing_pct': round(float(df[col].isna().mean() * 100), 1),
-            'mean':      round(float(series.mean()), 2),
-            'sd':        round(float(series.std()), 2),
-            'median':    round(float(series.median()), 2),
-            'q1':        round(q1, 2),
-            'q3':        round(q3, 2),
-            'iqr':       round(q3 - q1, 2),
-            'min':       round(float(series.min()), 2),
-            'max':       round(float(series.max()), 2),
-            'skewness':  round(float(series.skew()), 3),
-            'kurtosis':  round(float(series.kurtosis()), 3),
-        }
-        try:
-            from scipy import stats as scipy_stats
-            if len(series) >= 3 and len(series) <= 5000:
-                stat, p = scipy_stats.shapiro(series[:5000])
-                row['shapiro_p']  = round(float(p), 4)
-                row['normal']     = p > 0.05
-            else:
-                row['shapiro_p']  = None
-                row['normal']     = None
-        except Exception:
-            row['shapiro_p'] = None
-            row['normal']    = None
-        numeric_summary.append(row)
-
-    categorical_summary = []
-    for col in categorical_cols:
-        series   = df[col].dropna()
-        vc       = series.value_counts()
-        pct      = series.value_counts(normalize=True) * 100
-        freq_table = [
-            {'value': str(k), 'n': int(v), 'pct': round(float(pct[k]), 1)}
-            for k, v in vc.items()
-        ]
-        categorical_summary.append({
-            'variable':   col,
-            'n':          int(series.count()),
-            'missing':    int(df[col].isna().sum()),
-            'missing_pct':round(float(df[col].isna().mean() * 100), 1),
-            'n_unique':   int(series.nunique()),
-            'mode':       str(series.mode()[0]) if len(series.mode()) > 0 else '',
-            'freq_table': freq_table[:20],
-        })
+    # Normality is tested for the whole numeric block at once, not per row.
+    normal = normality.test_columns(df, numeric_cols)
+    numeric_summary = [
+        {**column_rows[col], **_normality_fields(normal[col])}
+        for col in numeric_cols if column_rows[col] is not None
+    ]
+    categorical_summary = [column_rows[col] for col in categorical_cols]
 
-    correlation = {}
+    corr = {}
     if len(numeric_cols) > 1:
-        corr_matrix = df[numeric_cols].corr().round(3)
-        correlation = {
-            'columns': numeric_cols,
-            'matrix':  corr_matrix.values.tolist(),
-        }
+        if correlations is None:
+            correlations = {'columns': numeric_cols, 'matrix': correlation.correlate(df, numeric_cols)}
+        if len(numeric_cols) <= MAX_MATRIX_COLUMNS:
+            corr = {
+                'columns': numeric_cols,
+                'matrix':  correlation.tile(correlations, 0, 0, len(numeric_cols))['matrix'],
+            }
+        else:
+            corr = {
+                'columns':   numeric_cols,
+                'top_pairs': correlation.top_pairs(correlations, TOP_PAIRS),
+            }
 
     return {
         'n_rows':               len(df),
         'n_cols':               len(df.columns),
         'numeric_summary':      numeric_summary,
         'categorical_summary':  categorical_summary,
-        'correlation':          correlation,
+        'correlation':          corr,
         'numeric_cols':         numeric_cols,
         'categorical_cols':     categorical_cols,
     }
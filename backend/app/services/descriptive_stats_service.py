@@ -1,20 +1,28 @@
 import io
-from typing import Any, Dict, List, Optional
+import os
+from typing import Any, Dict, Iterator, List, Optional
 
 import numpy as np
 import pandas as pd
 from scipy import stats as scipy_stats
 
+from app.services import column_executor, column_stats
+
+# Stratified Table 1 compares every pair of groups for the SMD.
+TABLE1_MAX_GROUPS = int(os.getenv("TABLE1_MAX_GROUPS", "100"))
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
-def _get_histogram_bins(series: pd.Series, n_bins: int = 12) -> List[Dict[str, Any]]:
-    clean = series.dropna()
-    if len(clean) < 2:
+def _get_histogram_bins(base: Dict[str, Any], n_bins: Optional[int] = None) -> List[Dict[str, Any]]:
+    if base["n"] < 2:
         return []
-    hist, edges = np.histogram(clean, bins=n_bins)
+    if n_bins is None:
+        n_bins = min(15, max(10, int(np.sqrt(base["n"]))))
+        if column_stats.HISTOGRAM_BASE_BINS % n_bins:
+            n_bins -= 1  # 11 and 13 would not have exactly equal widths
+    edges, hist = column_stats.histogram(base, n_bins)
     return [
         {
             "bin_start": round(float(edges[i]), 4),
@@ -29,44 +37,47 @@ def _get_histogram_bins(series: pd.Series, n_bins: int = 12) -> List[Dict[str, A
 # Column-type detection
 # ---------------------------------------------------------------------------
 
-def detect_column_types(df: pd.DataFrame) -> List[Dict[str, Any]]:
-    """Return metadata for every column: name, detected type, missing counts."""
-    columns: List[Dict[str, Any]] = []
-    for col in df.columns:
-        n_total = len(df[col])
-        n_missing = int(df[col].isna().sum())
-        pct_missing = round(float(n_missing / n_total * 100), 1) if n_total > 0 else 0.0
-
-        if pd.api.types.is_datetime64_any_dtype(df[col]):
-            col_type = "date"
-        elif pd.api.types.is_bool_dtype(df[col]):
-            col_type = "categorical"
-        elif pd.api.types.is_numeric_dtype(df[col]):
-            n_unique = int(df[col].nunique())
-            col_type = "continuous" if n_unique > 10 else "categorical"
+def detect_column_types(
+    df: pd.DataFrame, cached: Optional[Dict[str, Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
+    """Return metadata for every column: name, detected type, missing counts.
+
+    ``cached`` maps column names to earlier ``column_type_info`` results.
+    """
+    if cached is None:
+        cached = {}
+    missing = [col for col in df.columns if col not in cached]
+    computed = column_executor.map_columns(column_type_info, df, missing)
+    return [cached[col] if col in cached else computed[col] for col in df.columns]
+
+
+def column_type_info(df: pd.DataFrame, col: str) -> Dict[str, Any]:
+    n_total = len(df[col])
+    n_missing = int(df[col].isna().sum())
+    pct_missing = round(float(n_missing / n_total * 100), 1) if n_total > 0 else 0.0
+
+    if pd.api.types.is_datetime64_any_dtype(df[col]):
+        col_type = "date"
+    elif pd.api.types.is_bool_dtype(df[col]):
+        col_type = "categorical"
+    elif pd.api.types.is_numeric_dtype(df[col]):
+        n_unique = column_stats.numeric(df, col)["n_unique"]
+        col_type = "continuous" if n_unique > 10 else "categorical"
+    else:
+        # Try to parse as numeric
+        stats = column_stats.numeric(df, col)
+        total_non_null = n_total - n_missing
+        if total_non_null > 0 and stats["n"] / total_non_null > 0.8:
+            col_type = "continuous" if stats["n_unique"] > 10 else "categorical"
         else:
-            # Try to parse as numeric
-            try:
-                numeric_series = pd.to_numeric(df[col], errors="coerce")
-                total_non_null = df[col].notna().sum()
-                valid_count = numeric_series.notna().sum()
-                if total_non_null > 0 and valid_count / total_non_null > 0.8:
-                    n_unique = int(numeric_series.nunique())
-                    col_type = "continuous" if n_unique > 10 else "categorical"
-                else:
-                    col_type = "categorical"
-            except Exception:
-                col_type = "categorical"
-
-        columns.append(
-            {
-                "name": col,
-                "type": col_type,
-                "n_missing": n_missing,
-                "pct_missing": pct_missing,
-            }
-        )
-    return columns
+            col_type = "categorical"
+
+    return {
+        "name": col,
+        "type": col_type,
+        "n_missing": n_missing,
+        "pct_missing": pct_missing,
+    }
 
 
 # ---------------------------------------------------------------------------
@@ -79,13 +90,12 @@ def compute_variable_stats_categorical(
     if variable_name not in df.columns:
         raise ValueError(f"Column '{variable_name}' not found in dataset")
 
-    col = df[variable_name]
-    n_total = int(len(col))
-    n_missing = int(col.isna().sum())
+    stats = column_stats.text(df, variable_name)
+    n_total = stats["n_total"]
+    n_missing = stats["n_missing"]
     pct_missing = round(float(n_missing / n_total * 100), 1) if n_total > 0 else 0.0
-    series = col.dropna().astype(str)
 
-    if len(series) == 0:
+    if stats["n"] == 0:
         return {
             "type": "categorical",
             "variable": variable_name,
@@ -97,17 +107,15 @@ def compute_variable_stats_categorical(
             "frequencies": [],
         }
 
-    vc = series.value_counts()
-    n_valid = len(series)
+    n_valid = stats["n"]
     frequencies = [
         {
             "category": str(k),
             "n": int(v),
             "pct": round(float(v / n_valid * 100), 1),
         }
-        for k, v in vc.items()
+        for k, v in stats["counts"].items()
     ]
-    mode_val = str(series.mode().iloc[0]) if len(series.mode()) > 0 else ""
 
     return {
         "type": "categorical",
@@ -115,29 +123,31 @@ def compute_variable_stats_categorical(
         "n_total": n_total,
         "n_missing": n_missing,
         "pct_missing": pct_missing,
-        "n_unique": int(series.nunique()),
-        "mode": mode_val,
+        "n_unique": stats["n_unique"],
+        "mode": str(stats["mode"]) if stats["mode"] is not None else "",
         "frequencies": frequencies,
     }
 
 
 def compute_variable_stats_continuous(
-    df: pd.DataFrame, variable_name: str
+    df: pd.DataFrame, variable_name: str, n_bins: Optional[int] = None
 ) -> Dict[str, Any]:
     if variable_name not in df.columns:
         raise ValueError(f"Column '{variable_name}' not found in dataset")
 
-    col = df[variable_name]
-    n_total = int(len(col))
-    n_missing = int(col.isna().sum())
-    pct_missing = round(float(n_missing / n_total * 100), 1) if n_total > 0 else 0.0
+    return _continuous_stats(
+        variable_name, column_stats.numeric(df, variable_name), column_stats.histogram_base(df, variable_name), n_bins
+    )
 
-    try:
-        series = pd.to_numeric(col, errors="coerce").dropna()
-    except Exception:
-        series = col.dropna()
 
-    if len(series) == 0:
+def _continuous_stats(
+    variable_name: str, stats: Dict[str, Any], base: Dict[str, Any], n_bins: Optional[int] = None
+) -> Dict[str, Any]:
+    n_total = stats["n_total"]
+    n_missing = stats["n_missing"]
+    pct_missing = round(float(n_missing / n_total * 100), 1) if n_total > 0 else 0.0
+
+    if stats["n"] == 0:
         return {
             "type": "continuous",
             "variable": variable_name,
@@ -156,11 +166,8 @@ def compute_variable_stats_continuous(
             "histogram_bins": [],
         }
 
-    q1 = float(series.quantile(0.25))
-    q3 = float(series.quantile(0.75))
-    skewness = float(series.skew()) if len(series) > 2 else 0.0
-    kurt = float(series.kurtosis()) if len(series) > 3 else 0.0
-    n_bins = min(15, max(10, int(np.sqrt(len(series)))))
+    skewness = stats["skewness"] if stats["n"] > 2 else 0.0
+    kurt = stats["kurtosis"] if stats["n"] > 3 else 0.0
 
     return {
         "type": "continuous",
@@ -168,19 +175,41 @@ def compute_variable_stats_continuous(
         "n_total": n_total,
         "n_missing": n_missing,
         "pct_missing": pct_missing,
-        "mean": round(float(series.mean()), 3),
-        "sd": round(float(series.std()), 3),
-        "median": round(float(series.median()), 3),
-        "q1": round(q1, 3),
-        "q3": round(q3, 3),
-        "min": round(float(series.min()), 3),
-        "max": round(float(series.max()), 3),
+        "mean": round(stats["mean"], 3),
+        "sd": round(stats["sd"], 3),
+        "median": round(stats["median"], 3),
+        "q1": round(stats["q1"], 3),
+        "q3": round(stats["q3"], 3),
+        "min": round(stats["min"], 3),
+        "max": round(stats["max"], 3),
         "skewness": round(skewness, 3),
         "kurtosis": round(kurt, 3),
-        "histogram_bins": _get_histogram_bins(series, n_bins),
+        "histogram_bins": _get_histogram_bins(base, n_bins),
     }
 
 
+def compute_variable_stats_batch(
+    df: pd.DataFrame, variables: List[Dict[str, str]]
+) -> Iterator[Dict[str, Any]]:
+    """Yield ``compute_variable_stats_*`` for each variable, in order.
+
+    The continuous variables' moments, quantiles and base histograms are
+    computed up front in one pass over all of them; each result is yielded
+    as soon as its frequency table or histogram is done.
+    """
+    for var in variables:
+        if var["name"] not in df.columns:
+            raise ValueError(f"Column '{var['name']}' not found in dataset")
+    continuous = [var["name"] for var in variables if var["type"] == "continuous"]
+    numeric = column_stats.numeric_batch(df, continuous)
+    bases = column_stats.histogram_base_batch(df, continuous)
+    for var in variables:
+        if var["type"] == "continuous":
+            yield _continuous_stats(var["name"], numeric[var["name"]], bases[var["name"]])
+        else:
+            yield compute_variable_stats_categorical(df, var["name"])
+
+
 # ---------------------------------------------------------------------------
 # Table 1 builder
 # ---------------------------------------------------------------------------
@@ -189,28 +218,34 @@ def build_table1(
     df: pd.DataFrame,
     variables: List[Dict[str, str]],
     summary_type: str,
+    group_by: Optional[str] = None,
 ) -> Dict[str, Any]:
+    """Table 1 with an Overall column, stratified by ``group_by`` if given
+    (see ``_stratify``)."""
     n_total = int(len(df))
     table: List[Dict[str, Any]] = []
+    numeric = column_stats.numeric_batch(df, [
+        var["name"] for var in variables
+        if var["type"] != "categorical" and var["name"] in df.columns
+    ])
 
     for var in variables:
         var_name = var["name"]
         var_type = var["type"]
 
-        if var_name not in df.columns:
+        if var_name not in df.columns or var_name == group_by:
             continue
 
         if var_type == "categorical":
-            col = df[var_name].dropna().astype(str)
-            vc = col.value_counts()
-            n_valid = len(col)
+            col = column_stats.text(df, var_name)
+            n_valid = col["n"]
             rows = (
                 [
                     {
                         "label": str(k),
                         "value": f"{int(v)} ({round(float(v) / n_valid * 100, 1)}%)",
                     }
-                    for k, v in vc.items()
+                    for k, v in col["counts"].items()
                 ]
                 if n_valid > 0
                 else []
@@ -224,26 +259,26 @@ def build_table1(
                 }
             )
         else:
-            col_numeric = pd.to_numeric(df[var_name], errors="coerce").dropna()
-            if len(col_numeric) == 0:
+            col_numeric = numeric[var_name]
+            if col_numeric["n"] == 0:
                 continue
 
-            skewness = float(col_numeric.skew()) if len(col_numeric) > 2 else 0.0
+            skewness = col_numeric["skewness"] if col_numeric["n"] > 2 else 0.0
             use_median = (
                 summary_type == "median_iqr"
                 or (summary_type == "auto" and abs(skewness) > 1)
             )
 
             if use_median:
-                q1 = round(float(col_numeric.quantile(0.25)), 1)
-                q3 = round(float(col_numeric.quantile(0.75)), 1)
-                med = round(float(col_numeric.median()), 1)
+                q1 = round(col_numeric["q1"], 1)
+                q3 = round(col_numeric["q3"], 1)
+                med = round(col_numeric["median"], 1)
                 value = f"{med} [{q1}\u2013{q3}]"
                 label = f"{var_name}, median [IQR]"
                 actual_type = "median_iqr"
             else:
-                mean = round(float(col_numeric.mean()), 1)
-                sd = round(float(col_numeric.std()), 1)
+                mean = round(col_numeric["mean"], 1)
+                sd = round(col_numeric["sd"], 1)
                 value = f"{mean} \u00b1 {sd}"
                 label = f"{var_name}, mean \u00b1 SD"
                 actual_type = "mean_sd"
@@ -257,53 +292,283 @@ def build_table1(
                 }
             )
 
-    return {"n_total": n_total, "table": table}
+    if group_by is None:
+        return {"n_total": n_total, "table": table}
+    return {"n_total": n_total, "table": table, "group_by": group_by, **_stratify(df, table, group_by)}
+
+
+def _stratify(df: pd.DataFrame, table: List[Dict[str, Any]], group_by: str) -> Dict[str, Any]:
+    """Add per-group values, a between-group test and the standardised
+    difference to each Table 1 entry.
+
+    All continuous variables are summarised in one groupby over a float
+    frame and tested together (t-test/ANOVA, or Kruskal-Wallis for
+    median [IQR] rows); categorical variables are cross-tabulated from
+    their cached value codes and tested by chi-square. The SMD is
+    the largest over pairs of groups (Yang & Dalton's multinomial form for
+    categorical variables). Rows with a missing group appear only in Overall.
+    Raises ``ValueError`` if ``group_by`` has more than TABLE1_MAX_GROUPS
+    values.
+    """
+    try:
+        codes, labels = pd.factorize(df[group_by], sort=True)
+    except TypeError:
+        codes, labels = pd.factorize(df[group_by])
+    k = len(labels)
+    if k > TABLE1_MAX_GROUPS:
+        raise ValueError(
+            f"Column '{group_by}' has {k} distinct values; "
+            f"stratifying supports at most {TABLE1_MAX_GROUPS} groups"
+        )
+    present = codes >= 0
+    group_n = np.bincount(codes[present], minlength=k)
+    if k == 0:
+        for entry in table:
+            for row in entry["rows"]:
+                row["group_values"] = []
+            entry.update(test=None, p_value=None, smd=None)
+        return {"groups": [], "n_missing_group": int(len(df))}
+
+    continuous = [e["variable"] for e in table if e["type"] == "continuous"]
+    categorical = [e["variable"] for e in table if e["type"] == "categorical"]
+    ranked = [e["variable"] for e in table if e["summary_type"] == "median_iqr"]
+    numeric = _grouped_continuous(df, continuous, ranked, codes, k)
+    counts = _grouped_counts(df, categorical, codes, k)
+
+    for entry in table:
+        var_name = entry["variable"]
+        if entry["type"] == "continuous":
+            stats = numeric[var_name]
+            for row in entry["rows"]:
+                row["group_values"] = [
+                    _format_summary(entry["summary_type"], stats, g) if stats["n"][g] else "\u2014"
+                    for g in range(k)
+                ]
+            if entry["summary_type"] == "median_iqr":
+                entry["test"], p_value = "kruskal_wallis", stats["p_kruskal"]
+            else:
+                entry["test"] = "t_test" if k == 2 else "anova"
+                p_value = stats["p_anova"]
+            smd = stats["smd"]
+        else:
+            crosstab = counts[var_name].reindex([row["label"] for row in entry["rows"]], fill_value=0)
+            totals = crosstab.sum(axis=0).to_numpy()
+            for row, (_, group_counts) in zip(entry["rows"], crosstab.iterrows()):
+                row["group_values"] = [
+                    f"{int(v)} ({round(float(v) / t * 100, 1)}%)" if t else "\u2014"
+                    for v, t in zip(group_counts.to_numpy(), totals)
+                ]
+            entry["test"] = "chi_square"
+            p_value, smd = _chi_square(crosstab.to_numpy()), _categorical_smd(crosstab.to_numpy())
+        entry["p_value"] = round(float(p_value), 4) if _finite(p_value) else None
+        entry["smd"] = round(float(smd), 3) if _finite(smd) else None
+
+    return {
+        "groups": [{"label": str(label), "n": int(n)} for label, n in zip(labels, group_n)],
+        "n_missing_group": int((~present).sum()),
+    }
+
+
+def _finite(value) -> bool:
+    return value is not None and bool(np.isfinite(value))
+
+
+def _format_summary(summary_type: str, stats: Dict[str, Any], g: int) -> str:
+    if summary_type == "median_iqr":
+        return f"{round(stats['median'][g], 1)} [{round(stats['q1'][g], 1)}\u2013{round(stats['q3'][g], 1)}]"
+    return f"{round(stats['mean'][g], 1)} \u00b1 {round(stats['sd'][g], 1)}"
+
+
+def _grouped_continuous(
+    df: pd.DataFrame, columns: List[str], ranked: List[str], codes: np.ndarray, k: int
+) -> Dict[str, Dict[str, Any]]:
+    """Per-group summaries and tests; Kruskal-Wallis only for ``ranked``."""
+    if not columns:
+        return {}
+    present = codes >= 0
+    frame = column_stats.numeric_frame(df, columns)[present]
+    keys = codes[present]
+    grouped = frame.groupby(keys)
+    groups = range(k)
+    n = grouped.count().reindex(groups, fill_value=0).to_numpy(dtype=float)
+    mean = grouped.mean().reindex(groups).to_numpy()
+    sd = grouped.std().reindex(groups).to_numpy()
+    median = grouped.median().reindex(groups).to_numpy()
+    quartiles = grouped.quantile([0.25, 0.75]).reindex(pd.MultiIndex.from_product([groups, [0.25, 0.75]]))
+    q1 = quartiles.xs(0.25, level=1).to_numpy()
+    q3 = quartiles.xs(0.75, level=1).to_numpy()
+    # Ranking is the expensive part, so it is done only where it is reported.
+    rank_sums = (
+        frame[ranked].rank().groupby(keys).sum()
+        .reindex(index=groups, columns=columns, fill_value=0).to_numpy()
+    )
+    is_ranked = np.isin(np.arange(len(columns)), [columns.index(col) for col in ranked])
+    ties = np.zeros(len(columns))
+    for j in np.flatnonzero(is_ranked):
+        counts = frame.iloc[:, j].value_counts().to_numpy(dtype=float)
+        ties[j] = (counts ** 3 - counts).sum()
+
+    with np.errstate(all="ignore"):
+        total = n.sum(axis=0)
+        n_groups = (n > 0).sum(axis=0)
+        # One-way ANOVA; with two groups F = t^2 and the p-value is the t-test's.
+        grand = np.nansum(n * mean, axis=0) / total
+        between = np.nansum(n * (mean - grand) ** 2, axis=0)
+        within = np.nansum((n - 1) * sd ** 2, axis=0)
+        f_stat = (between / (n_groups - 1)) / (within / (total - n_groups))
+        p_anova = scipy_stats.f.sf(f_stat, n_groups - 1, total - n_groups)
+        # Kruskal-Wallis on the pooled ranks, with the tie correction.
+        h = 12 / (total * (total + 1)) * np.nansum(rank_sums ** 2 / n, axis=0) - 3 * (total + 1)
+        h /= 1 - ties / (total ** 3 - total)
+        p_kruskal = scipy_stats.chi2.sf(h, n_groups - 1)
+        smd = _max_pairwise(k, len(columns), lambda g: np.abs(
+            (mean[g] - mean[g + 1:]) / np.sqrt((sd[g] ** 2 + sd[g + 1:] ** 2) / 2)
+        ))
+    valid = n_groups >= 2
+    p_anova = np.where(valid, p_anova, np.nan)
+    p_kruskal = np.where(valid & is_ranked, p_kruskal, np.nan)
+
+    return {
+        col: {
+            "n": n[:, j], "mean": mean[:, j], "sd": sd[:, j], "median": median[:, j],
+            "q1": q1[:, j], "q3": q3[:, j],
+            "p_anova": p_anova[j], "p_kruskal": p_kruskal[j], "smd": smd[j],
+        }
+        for j, col in enumerate(columns)
+    }
+
+
+def _grouped_counts(
+    df: pd.DataFrame, columns: List[str], codes: np.ndarray, k: int
+) -> Dict[str, pd.DataFrame]:
+    """``{column: counts}`` with a row per value (as text) and a column per
+    group, counted with one bincount over the cached value codes."""
+    out = {}
+    for col in columns:
+        text = column_stats.text(df, col)
+        values, labels = text["codes"], text["labels"]
+        both = (values >= 0) & (codes >= 0)
+        counts = np.bincount(values[both] * k + codes[both], minlength=len(labels) * k)
+        out[col] = pd.DataFrame(counts.reshape(len(labels), k), index=labels, columns=range(k))
+    return out
+
+
+def _chi_square(crosstab: np.ndarray) -> Optional[float]:
+    crosstab = crosstab[crosstab.sum(axis=1) > 0][:, crosstab.sum(axis=0) > 0]
+    if crosstab.shape[0] < 2 or crosstab.shape[1] < 2:
+        return None
+    return float(scipy_stats.chi2_contingency(crosstab)[1])
+
+
+def _categorical_smd(crosstab: np.ndarray) -> Optional[float]:
+    totals = crosstab.sum(axis=0)
+    shares = (crosstab[:, totals > 0] / totals[totals > 0]).T  # group x level
+    if crosstab.shape[0] < 2 or shares.shape[0] < 2:
+        return None
+    shares = shares[:, 1:]  # the first level is the reference
+    covs = _multinomial_cov(shares)
+
+    def against_later(g):
+        diff = shares[g] - shares[g + 1:]
+        pooled = (covs[g] + covs[g + 1:]) / 2
+        quad = np.einsum("pi,pij,pj->p", diff, np.linalg.pinv(pooled), diff)
+        return np.sqrt(np.maximum(quad, 0))[:, None]
+
+    return float(_max_pairwise(len(shares), 1, against_later)[0])
+
+
+def _multinomial_cov(shares: np.ndarray) -> np.ndarray:
+    # diag(p) - p p' for each row p of ``shares``
+    return shares[:, :, None] * (np.eye(shares.shape[1]) - shares[:, None, :])
+
+
+def _max_pairwise(k: int, m: int, against_later) -> np.ndarray:
+    """Largest non-NaN value over all pairs of ``k`` groups, per column.
+
+    ``against_later(g)`` returns the ``(k - g - 1, m)`` values of group ``g``
+    paired with each later group; going one group at a time keeps memory at
+    O(k * m) rather than O(k * k * m).
+    """
+    best = np.full(m, -np.inf)
+    for g in range(k - 1):
+        values = against_later(g)
+        best = np.maximum(best, np.where(np.isnan(values), -np.inf, values).max(axis=0))
+    return np.where(np.isneginf(best), np.nan, best)
 
 
 # ---------------------------------------------------------------------------
 # DOCX export
 # ---------------------------------------------------------------------------
 
-def generate_table1_docx(n_total: int, table: List[Dict[str, Any]]) -> bytes:
+def generate_table1_docx(
+    n_total: int, table: List[Dict[str, Any]], groups: Optional[List[Dict[str, Any]]] = None
+) -> bytes:
+    """``groups`` (from a stratified ``build_table1``) adds a column per group
+    plus p-value and SMD columns."""
     from docx import Document  # type: ignore
     from docx.shared import Pt  # type: ignore
 
+    groups = groups or []
+    extra = ["p-value", "SMD"] if groups else []
+
     doc = Document()
     doc.add_heading("Table 1. Baseline Characteristics", level=1)
 
-    dtable = doc.add_table(rows=1, cols=2)
+    dtable = doc.add_table(rows=1, cols=2 + len(groups) + len(extra))
     dtable.style = "Table Grid"
 
     # Header
     hdr = dtable.rows[0].cells
     hdr[0].text = "Characteristic"
     hdr[1].text = f"Overall (N={n_total})"
+    for i, group in enumerate(groups):
+        hdr[2 + i].text = f"{group['label']} (n={group['n']})"
+    for i, title in enumerate(extra):
+        hdr[2 + len(groups) + i].text = title
     for cell in hdr:
         for para in cell.paragraphs:
             for run in para.runs:
                 run.bold = True
 
+    def fill(cells, r=None, row_data=None):
+        # Overall and group values of ``r``; test columns from ``row_data``.
+        if r is not None:
+            cells[1].text = r["value"]
+            for i, value in enumerate(r.get("group_values", [])):
+                cells[2 + i].text = value
+        if row_data is not None and groups:
+            cells[-2].text = _format_p(row_data.get("p_value"))
+            smd = row_data.get("smd")
+            cells[-1].text = "" if smd is None else f"{smd:.3f}"
+
     # Data rows
     for row_data in table:
         if row_data["type"] == "continuous":
             for r in row_data["rows"]:
                 dr = dtable.add_row()
                 dr.cells[0].text = r["label"]
-                dr.cells[1].text = r["value"]
+                fill(dr.cells, r, row_data)
         else:
             # Bold variable label row
             lr = dtable.add_row()
             lp = lr.cells[0].paragraphs[0]
             lp.add_run(row_data["variable"]).bold = True
             lr.cells[1].text = ""
+            fill(lr.cells, row_data=row_data)
             # Indented category rows
             for r in row_data["rows"]:
                 cr = dtable.add_row()
                 cp = cr.cells[0].paragraphs[0]
                 cp.paragraph_format.left_indent = Pt(12)
                 cp.add_run(f"  {r['label']}")
-                cr.cells[1].text = r["value"]
+                fill(cr.cells, r)
 
     buf = io.BytesIO()
     doc.save(buf)
     return buf.getvalue()
+
+
+def _format_p(p_value: Optional[float]) -> str:
+    if p_value is None:
+        return ""
+    return "<0.001" if p_value < 0.001 else f"{p_value:.3f}"
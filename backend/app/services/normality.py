@@ -0,0 +1,128 @@
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import stats as scipy_stats
+
+from app.services import column_stats, profile_cache
+
+# Normality tests for whole numeric blocks. Shapiro-Wilk is used up to
+# SHAPIRO_MAX_N values (its p-value approximation is not valid beyond);
+# larger columns get D'Agostino-Pearson's K^2, which needs only the sample
+# skewness and kurtosis and so is computed for all of them at once from the
+# shared column statistics. With NORMALITY_MAX_SAMPLE set, large columns are
+# tested on a fixed random subsample of that many values instead, since at
+# hundreds of thousands of rows K^2 rejects trivial departures.
+
+SHAPIRO_MIN_N = 3
+SHAPIRO_MAX_N = 5000
+NORMALITY_MAX_SAMPLE = int(os.getenv("NORMALITY_MAX_SAMPLE", "0"))  # 0: test every value
+_SAMPLE_SEED = 0
+
+
+def test_columns(df: pd.DataFrame, columns: Optional[List] = None, alpha: float = 0.05) -> Dict[Any, Dict[str, Any]]:
+    """``{col: {test, statistic, p_value, n, sample_size, normal}}`` for
+    ``columns`` (default: the numeric ones). ``test`` and the values are
+    None when a column has too few distinct values to be tested."""
+    if columns is None:
+        columns = df.select_dtypes(include=[np.number]).columns.tolist()
+    results = profile_cache.frame_stats(df, "normality", columns, _test_columns)
+    return {
+        col: {**result, "normal": bool(result["p_value"] > alpha) if result["p_value"] is not None else None}
+        for col, result in results.items()
+    }
+
+
+def test_values(values, alpha: float = 0.05) -> Dict[str, Any]:
+    """``test_columns`` for a single vector, e.g. model residuals."""
+    return test_columns(pd.DataFrame({"values": np.asarray(values)}), ["values"], alpha)["values"]
+
+
+def _test_columns(df: pd.DataFrame, columns: List) -> Dict[Any, Dict[str, Any]]:
+    base = column_stats.numeric_batch(df, columns)
+    small = [col for col in columns if base[col]["n"] <= SHAPIRO_MAX_N]
+    large = [col for col in columns if base[col]["n"] > SHAPIRO_MAX_N]
+    out = {}
+
+    if small:
+        frame = column_stats.numeric_frame(df, small)
+        for col in small:
+            values = frame[col].dropna().to_numpy()
+            statistic = p_value = None
+            if len(values) >= SHAPIRO_MIN_N and np.ptp(values) > 0:
+                statistic, p_value = scipy_stats.shapiro(values)
+            out[col] = _result("shapiro", statistic, p_value, len(values))
+
+    if large:
+        n = np.array([base[col]["n"] for col in large], dtype=float)
+        skew = np.array([_nan(base[col]["skewness"]) for col in large])
+        kurt = np.array([_nan(base[col]["kurtosis"]) for col in large])
+        sample_size = n.copy()
+        if NORMALITY_MAX_SAMPLE and (n > NORMALITY_MAX_SAMPLE).any():
+            sampled = [col for col, size in zip(large, n) if size > NORMALITY_MAX_SAMPLE]
+            sample = _subsample(column_stats.numeric_frame(df, sampled), NORMALITY_MAX_SAMPLE)
+            at = [large.index(col) for col in sampled]
+            sample_size[at] = sample.count().to_numpy()
+            skew[at] = sample.skew().to_numpy()
+            kurt[at] = sample.kurt().to_numpy()
+        # pandas reports zero skewness for a constant column; it cannot be tested.
+        constant = np.array([base[col]["min"] == base[col]["max"] for col in large])
+        skew[constant] = np.nan
+        statistic, p_value = _dagostino_pearson(sample_size, skew, kurt)
+        for j, col in enumerate(large):
+            out[col] = _result("dagostino_pearson", statistic[j], p_value[j], int(n[j]), int(sample_size[j]))
+
+    return out
+
+
+def _result(test: str, statistic, p_value, n: int, sample_size: Optional[int] = None) -> Dict[str, Any]:
+    tested = p_value is not None and np.isfinite(p_value)
+    return {
+        "test": test if tested else None,
+        "statistic": float(statistic) if tested else None,
+        "p_value": float(p_value) if tested else None,
+        "n": n,
+        "sample_size": n if sample_size is None else sample_size,
+    }
+
+
+def _nan(value) -> float:
+    return float("nan") if value is None else value
+
+
+def _subsample(frame: pd.DataFrame, size: int) -> pd.DataFrame:
+    # One shared random order; each column keeps its first ``size``
+    # non-missing values in that order.
+    order = np.random.default_rng(_SAMPLE_SEED).permutation(len(frame))
+    shuffled = frame.iloc[order]
+    return shuffled.where(shuffled.notna().cumsum() <= size)
+
+
+def _dagostino_pearson(n: np.ndarray, skew: np.ndarray, kurt: np.ndarray):
+    """K^2 and its p-value (as ``scipy.stats.normaltest``) for arrays of
+    sample sizes and pandas' bias-corrected skewness and excess kurtosis."""
+    with np.errstate(all="ignore"):
+        # Back to the moment ratios sqrt(b1) and b2 the test is defined on.
+        g1 = skew * (n - 2) / np.sqrt(n * (n - 1))
+        b2 = (kurt * (n - 2) * (n - 3) / (n - 1) - 6) / (n + 1) + 3
+
+        y = g1 * np.sqrt((n + 1) * (n + 3) / (6 * (n - 2)))
+        beta2 = 3 * (n * n + 27 * n - 70) * (n + 1) * (n + 3) / ((n - 2) * (n + 5) * (n + 7) * (n + 9))
+        w2 = -1 + np.sqrt(2 * (beta2 - 1))
+        delta = 1 / np.sqrt(0.5 * np.log(w2))
+        alpha = np.sqrt(2 / (w2 - 1))
+        y = np.where(y == 0, 1, y)
+        z_skew = delta * np.log(y / alpha + np.sqrt((y / alpha) ** 2 + 1))
+
+        mean_b2 = 3 * (n - 1) / (n + 1)
+        var_b2 = 24 * n * (n - 2) * (n - 3) / ((n + 1) ** 2 * (n + 3) * (n + 5))
+        x = (b2 - mean_b2) / np.sqrt(var_b2)
+        sqrt_beta1 = 6 * (n * n - 5 * n + 2) / ((n + 7) * (n + 9)) * np.sqrt(6 * (n + 3) * (n + 5) / (n * (n - 2) * (n - 3)))
+        a = 6 + 8 / sqrt_beta1 * (2 / sqrt_beta1 + np.sqrt(1 + 4 / sqrt_beta1 ** 2))
+        denom = 1 + x * np.sqrt(2 / (a - 4))
+        term2 = np.sign(denom) * np.where(denom == 0, np.nan, np.abs((1 - 2 / a) / denom) ** (1 / 3))
+        z_kurt = (1 - 2 / (9 * a) - term2) / np.sqrt(2 / (9 * a))
+
+        statistic = z_skew ** 2 + z_kurt ** 2
+    return statistic, scipy_stats.chi2.sf(statistic, 2)
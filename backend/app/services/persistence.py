@@ -0,0 +1,172 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.services import dataset_store
+
+logger = logging.getLogger("researchflow")
+
+# Edits to a dataset within this window are coalesced into one store write.
+WRITE_DELAY_SECONDS = float(os.getenv("WRITE_BEHIND_DELAY_SECONDS", "0.5"))
+
+# Write-behind persistence for cleaning operations. Routes apply an edit to
+# the cached frame (marked dirty) and call ``mark_dirty``; a background thread
+# commits the accumulated edits as a single dataset version once the dataset
+# has been quiet for WRITE_DELAY_SECONDS. ``flush`` is the durability barrier
+# for callers that need the store to reflect every edit made so far.
+
+_cache = None
+_on_commit: Optional[Callable[[str, Dict[str, Any]], None]] = None
+_pending: Dict[str, Dict[str, Any]] = {}
+_writing: set = set()
+_cond = threading.Condition()
+_thread: Optional[threading.Thread] = None
+
+
+def configure(cache, on_commit: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> None:
+    """Attach the dataset cache whose dirty entries are persisted.
+
+    ``on_commit(dataset_id, manifest, df)`` is called on the writing thread
+    after each version of ``df`` is committed.
+    """
+    global _cache, _on_commit
+    _cache = cache
+    _on_commit = on_commit
+
+
+def mark_dirty(
+    dataset_id: str,
+    operation: str,
+    changed_columns: Optional[List[str]] = None,
+    details: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Queue a write of the cached frame for ``dataset_id``.
+
+    ``changed_columns=None`` means every column (row-level operations).
+    """
+    with _cond:
+        job = _pending.setdefault(dataset_id, {"ops": [], "changed": set()})
+        job["ops"].append({
+            "operation": operation,
+            "changed_columns": changed_columns,
+            "details": details or {},
+        })
+        if changed_columns is None or job["changed"] is None:
+            job["changed"] = None
+        else:
+            job["changed"].update(changed_columns)
+        job["due"] = time.monotonic() + WRITE_DELAY_SECONDS
+        _ensure_worker()
+        _cond.notify_all()
+
+
+def is_pending(dataset_id: str) -> bool:
+    with _cond:
+        return dataset_id in _pending or dataset_id in _writing
+
+
+def flush(dataset_id: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+    """Block until queued edits (for ``dataset_id``, or all) are in the store.
+
+    Pending writes are performed on the calling thread rather than waiting
+    for the worker's delay. Returns False if ``timeout`` expired first or a
+    write failed (the failed edits stay queued for the worker to retry).
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        with _cond:
+            ids = [dataset_id] if dataset_id is not None else list(set(_pending) | _writing)
+            todo = [did for did in ids if did in _pending and did not in _writing]
+            busy = [did for did in ids if did in _writing]
+            if not todo and not busy:
+                return True
+            if not todo:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                _cond.wait(remaining)
+                continue
+            jobs = {did: _take(did) for did in todo}
+        results = [_write(did, job) for did, job in jobs.items()]
+        if not all(results):
+            return False
+
+
+def _ensure_worker() -> None:
+    global _thread
+    if _thread is None or not _thread.is_alive():
+        _thread = threading.Thread(target=_run, name="dataset-write-behind", daemon=True)
+        _thread.start()
+
+
+def _take(dataset_id: str) -> Dict[str, Any]:
+    # Caller holds _cond.
+    _writing.add(dataset_id)
+    return _pending.pop(dataset_id)
+
+
+def _run() -> None:
+    while True:
+        with _cond:
+            while True:
+                now = time.monotonic()
+                due = [did for did, job in _pending.items()
+                       if job["due"] <= now and did not in _writing]
+                if due:
+                    break
+                waits = [job["due"] - now for did, job in _pending.items() if did not in _writing]
+                _cond.wait(min(waits) if waits else None)
+            jobs = {did: _take(did) for did in due}
+        for did, job in jobs.items():
+            _write(did, job)
+
+
+def _requeue(dataset_id: str, job: Dict[str, Any]) -> None:
+    # Caller holds _cond. Edits queued since the job was taken come after it.
+    newer = _pending.get(dataset_id)
+    if newer is not None:
+        job["ops"].extend(newer["ops"])
+        job["changed"] = None if job["changed"] is None or newer["changed"] is None \
+            else job["changed"] | newer["changed"]
+    job["due"] = time.monotonic() + WRITE_DELAY_SECONDS
+    _pending[dataset_id] = job
+
+
+def _write(dataset_id: str, job: Dict[str, Any]) -> bool:
+    try:
+        with _cache.pinned(dataset_id) as entry:
+            if entry is None or not _cache.is_dirty(dataset_id):
+                return True  # deleted, or already written
+            ops = job["ops"]
+            changed = None if job["changed"] is None else sorted(job["changed"])
+            if len(ops) == 1:
+                operation, details = ops[0]["operation"], ops[0]["details"]
+            else:
+                operation = "+".join(dict.fromkeys(op["operation"] for op in ops))
+                details = {"operations": ops}
+            df = entry["df"]
+            manifest = dataset_store.commit_version(dataset_id, df, operation, changed, details)
+            with _cond:
+                # A newer edit queued during the write keeps the entry dirty.
+                if dataset_id not in _pending and _cache.peek(dataset_id) is df:
+                    _cache.mark_clean(dataset_id)
+    except Exception:
+        # The entry stays dirty (and so resident); the edits are retried.
+        logger.exception("Write-behind persistence failed for dataset %s", dataset_id)
+        with _cond:
+            _requeue(dataset_id, job)
+        return False
+    else:
+        # The version is committed; a failing callback must not write it again.
+        if _on_commit is not None:
+            try:
+                _on_commit(dataset_id, manifest, df)
+            except Exception:
+                logger.exception("Post-commit hook failed for dataset %s", dataset_id)
+        return True
+    finally:
+        with _cond:
+            _writing.discard(dataset_id)
+            _cond.notify_all()
@@ -0,0 +1,187 @@
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services import column_executor
+
+# Statistics derived from a dataset's current frame, reused across requests.
+# Entries are kept per column (or per column of a matrix), so a cleaning edit only
+# drops what it touched, and the duplicate count is maintained as a per-row
+# hash that edits adjust in place. An artifact belongs to one frame object:
+# if the cache hands out a different frame (reloaded after eviction, or
+# changed by another worker) without ``record_edit`` having been told, the
+# artifact is rebuilt from scratch.
+
+_cache = None
+_lock = threading.Lock()
+_artifacts: Dict[str, Dict[str, Any]] = {}
+
+
+def configure(cache) -> None:
+    """Attach the dataset cache that ``pinned_frame`` reads from."""
+    global _cache
+    _cache = cache
+
+
+def is_resident(dataset_id: str) -> bool:
+    """Whether the dataset's current frame is in memory (``pinned_frame``
+    would not load it)."""
+    return _cache.peek(dataset_id) is not None
+
+
+@contextmanager
+def pinned_frame(dataset_id: str):
+    """Yield the dataset's current (possibly unsaved) frame, or None.
+
+    While pinned, ``frame_stat`` recognises the frame and caches for it.
+    """
+    with _cache.pinned(dataset_id) as entry:
+        if entry is None:
+            yield None
+            return
+        with _lock:
+            _artifact(dataset_id, entry["df"])
+        yield entry["df"]
+
+
+def column_stats(dataset_id: str, df: pd.DataFrame, kind: str,
+                 compute: Callable[[pd.DataFrame, Any], Any]) -> Dict[Any, Any]:
+    """``compute(df, column)`` for every column, reusing cached results."""
+    with _lock:
+        known = dict(_artifact(dataset_id, df)["columns"].get(kind, {}))
+    missing = [col for col in df.columns if col not in known]
+    computed = column_executor.map_columns(compute, df, missing)
+    if computed:
+        with _lock:
+            art = _artifacts.get(dataset_id)
+            if art is not None and art["frame"]() is df:
+                art["columns"].setdefault(kind, {}).update(computed)
+    known.update(computed)
+    return {col: known[col] for col in df.columns}
+
+
+def frame_stat(df: pd.DataFrame, kind: str, col, compute: Callable[[pd.DataFrame, Any], Any]) -> Any:
+    """``compute(df, col)``, cached if ``df`` is a dataset's current frame.
+
+    For services that are handed only a frame; other frames (projections,
+    subsets, frames in worker processes) are computed directly.
+    """
+    return frame_stats(df, kind, [col], lambda df, cols: {c: compute(df, c) for c in cols})[col]
+
+
+def frame_stats(df: pd.DataFrame, kind: str, columns: List,
+                compute: Callable[[pd.DataFrame, List], Dict[Any, Any]]) -> Dict[Any, Any]:
+    """Like ``frame_stat`` for several columns; ``compute(df, missing)``
+    returns ``{col: value}`` for all the uncached ones at once."""
+    with _lock:
+        art = next((a for a in _artifacts.values() if a["frame"]() is df), None)
+        known = dict(art["columns"].get(kind, {})) if art is not None else {}
+    missing = [col for col in dict.fromkeys(columns) if col not in known]
+    computed = compute(df, missing) if missing else {}
+    if art is not None and computed:
+        with _lock:
+            if art["frame"]() is df:
+                art["columns"].setdefault(kind, {}).update(computed)
+    known.update(computed)
+    return {col: known[col] for col in columns}
+
+
+def matrix_stats(dataset_id: str, df: pd.DataFrame, kind: str,
+                 compute: Callable[[pd.DataFrame, Optional[Dict]], Dict]) -> Dict:
+    """Cached column-by-column matrix, ``{"columns": [...], "matrix": array}``.
+
+    ``compute(df, known)`` receives the previous entry, whose ``"stale"``
+    set names the columns edited since, or None, and returns the complete
+    entry for ``df``.
+    """
+    with _lock:
+        known = _artifact(dataset_id, df)["matrices"].get(kind)
+    result = compute(df, known)
+    with _lock:
+        art = _artifacts.get(dataset_id)
+        if art is not None and art["frame"]() is df:
+            art["matrices"][kind] = {**result, "stale": set()}
+    return result
+
+
+def duplicate_count(dataset_id: str, df: pd.DataFrame) -> int:
+    """Number of rows repeating an earlier row, from 64-bit row hashes."""
+    with _lock:
+        row_hash = _artifact(dataset_id, df)["row_hash"]
+    if row_hash is None:
+        row_hash = np.zeros(len(df), dtype=np.uint64)
+        for col in df.columns:
+            row_hash += _column_hash(df[col]) * _column_multiplier(col)
+        with _lock:
+            art = _artifacts.get(dataset_id)
+            if art is not None and art["frame"]() is df:
+                art["row_hash"] = row_hash
+    ordered = np.sort(row_hash)
+    return int((ordered[1:] == ordered[:-1]).sum())
+
+
+def record_edit(dataset_id: str, old_df: Optional[pd.DataFrame], new_df: pd.DataFrame,
+                changed_columns: Optional[List[str]] = None,
+                kept_rows: Optional[np.ndarray] = None) -> None:
+    """Carry the artifact for ``old_df`` over to ``new_df``.
+
+    Column edits drop only the entries of ``changed_columns`` and patch the
+    row hashes with those columns' old and new hashes. Row-level edits
+    (``changed_columns=None``) drop every column entry; if the edit only
+    removed rows, ``kept_rows`` (positions into ``old_df``) keeps the row
+    hashes of the survivors.
+    """
+    with _lock:
+        art = _artifacts.get(dataset_id)
+        if art is None or old_df is None or art["frame"]() is not old_df:
+            _artifacts.pop(dataset_id, None)
+            return
+        if changed_columns is None:
+            art["columns"].clear()
+            art["matrices"].clear()
+            if art["row_hash"] is not None:
+                art["row_hash"] = None if kept_rows is None else art["row_hash"][kept_rows]
+        else:
+            changed = set(changed_columns)
+            for stats in art["columns"].values():
+                for col in changed:
+                    stats.pop(col, None)
+            for kind, matrix in art["matrices"].items():
+                art["matrices"][kind] = {**matrix, "stale": matrix["stale"] | changed}
+            if art["row_hash"] is not None:
+                row_hash = art["row_hash"].copy()
+                for col in changed:
+                    old = _column_hash(old_df[col]) if col in old_df.columns else 0
+                    row_hash += (_column_hash(new_df[col]) - old) * _column_multiplier(col)
+                art["row_hash"] = row_hash
+        art["frame"] = weakref.ref(new_df)
+
+
+def discard(dataset_id: str) -> None:
+    with _lock:
+        _artifacts.pop(dataset_id, None)
+
+
+def _artifact(dataset_id: str, df: pd.DataFrame) -> Dict[str, Any]:
+    # Caller holds _lock.
+    art = _artifacts.get(dataset_id)
+    if art is None or art["frame"]() is not df:
+        art = {"frame": weakref.ref(df), "columns": {}, "matrices": {}, "row_hash": None}
+        _artifacts[dataset_id] = art
+    return art
+
+
+def _column_hash(series: pd.Series) -> np.ndarray:
+    if pd.api.types.is_float_dtype(series.dtype):
+        series = series + 0.0  # -0.0 and 0.0 are equal for duplicated()
+    return pd.util.hash_pandas_object(series, index=False).to_numpy()
+
+
+def _column_multiplier(col) -> np.uint64:
+    # Row hash = sum of column hashes times a per-column odd constant, so one
+    # column can be swapped out without rehashing the others.
+    return pd.util.hash_array(np.array([str(col)], dtype=object))[0] | np.uint64(1)
@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 from typing import Dict, Any, List, Optional
 
+from app.services.dataset_handle import select_columns
+
 def compute_smd(treated: pd.Series, control: pd.Series) -> float:
     mean_diff = treated.mean() - control.mean()
     pooled_sd = np.sqrt((treated.std()**2 + control.std()**2) / 2)
@@ -22,10 +24,12 @@ def run_propensity_matching(
     except ImportError:
         return {"error": "scikit-learn not installed"}
 
+    # Only the treatment and covariates are loaded when given a DatasetHandle.
+    df = select_columns(df, [treatment_col] + covariate_cols)
     df_clean = df[[treatment_col] + covariate_cols].dropna().copy()
 
     for col in covariate_cols:
-        if df_clean[col].dtype == object or df_clean[col].nunique() <= 5:
+        if not pd.api.types.is_numeric_dtype(df_clean[col]) or df_clean[col].nunique() <= 5:
             dummies = pd.get_dummies(df_clean[col], prefix=col, drop_first=True)
             df_clean = pd.concat([df_clean.drop(columns=[col]), dummies], axis=1)
 
@@ -78,7 +82,7 @@ def run_propensity_matching(
     orig_covariate_cols = [c for c in covariate_cols if c in df.columns]
 
     for col in orig_covariate_cols:
-        if df[col].dtype == object:
+        if not pd.api.types.is_numeric_dtype(df[col]):
             continue
         t_vals_before = df[df[treatment_col] == 1][col].dropna()
         c_vals_before = df[df[treatment_col] == 0][col].dropna()
@@ -0,0 +1,77 @@
+import sys
+import tempfile
+sys.path.insert(0, '.')
+import numpy as np
+import pandas as pd
+from app.services import dataset_store, profile_cache
+from app.services.cohort_builder import build_cohort
+from app.services.dataset_cache import DatasetCache
+from app.services.dataset_handle import DatasetHandle
+
+INCLUSION = [
+    {'column': 'age', 'operator': 'greater_equal', 'value': 40},
+    {'column': 'region', 'operator': 'equals', 'value': 'Urban'},
+    {'column': 'notes', 'operator': 'contains', 'value': 'follow'},
+    {'column': 'nope', 'operator': 'equals', 'value': 1},  # skipped
+]
+EXCLUSION = [
+    {'column': 'diabetes', 'operator': 'equals', 'value': 1},
+    {'column': 'bmi', 'operator': 'is_missing'},
+]
+
+
+def _frame(n=5000):
+    rng = np.random.default_rng(0)
+    bmi = rng.normal(26, 4, n)
+    bmi[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame({
+        'age': rng.integers(18, 90, n).astype(np.int8),
+        'region': pd.Categorical(rng.choice(['Urban', 'Rural', None], n)),
+        'notes': rng.choice(['follow-up', 'lost', None], n),
+        'diabetes': pd.array(rng.choice([0, 1, None], n), dtype='Int64'),
+        'bmi': bmi,
+    })
+
+
+def _counts(result):
+    return {k: v for k, v in result.items() if k != 'final_df'}
+
+
+def test_cold_and_resident_builds_agree():
+    df = _frame()
+    with tempfile.TemporaryDirectory() as tmp:
+        store_dir, dataset_store.STORE_DIR = dataset_store.STORE_DIR, tmp
+        cache = DatasetCache()
+        profile_cache.configure(cache)
+        try:
+            dataset_store.save_dataset('trial', df)
+            cold = build_cohort(DatasetHandle('trial'), INCLUSION, EXCLUSION)
+            cold_rows = cold['final_df'].to_pandas()  # lazy: read before the store goes
+            assert 'trial' not in profile_cache._artifacts  # nothing cached for a cold build
+
+            stored = dataset_store.load_dataset('trial')
+            cache.put('trial', stored)
+            with profile_cache.pinned_frame('trial') as frame:
+                first = build_cohort(DatasetHandle('trial', frame), INCLUSION, EXCLUSION)
+                kinds = set(profile_cache._artifacts['trial']['columns'])
+                assert "criterion_greater_equal_40" in kinds  # masks cached for the frame
+                cached = build_cohort(DatasetHandle('trial', frame), INCLUSION, EXCLUSION)
+        finally:
+            dataset_store.STORE_DIR = store_dir
+            profile_cache._artifacts.pop('trial', None)
+
+    keep = ((df['age'] >= 40) & (df['region'] == 'Urban')
+            & df['notes'].str.contains('follow', na=False))
+    included = int(keep.sum())
+    # Exclusion criteria are combined like inclusion ones: all must hold.
+    keep &= ~(df['diabetes'].eq(1).fillna(False) & df['bmi'].isna())
+    assert _counts(cold) == _counts(first) == _counts(cached)
+    assert cold['after_inclusion_n'] == included and cold['final_n'] == int(keep.sum())
+    expected = stored[keep.to_numpy()]
+    assert cold_rows.reset_index(drop=True).equals(expected.reset_index(drop=True))
+    assert cached['final_df'].to_pandas().equals(expected)
+
+
+if __name__ == '__main__':
+    test_cold_and_resident_builds_agree()
+    print('Cohort tests passed')
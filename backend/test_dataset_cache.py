@@ -0,0 +1,37 @@
+import sys
+import tempfile
+sys.path.insert(0, '.')
+import pandas as pd
+from app.services import dataset_store, profile_cache
+from app.services.dataset_cache import DatasetCache
+
+
+def test_eviction_drops_profile_artifacts():
+    df = pd.DataFrame({'id': [1, 2, 2, 3], 'arm': ['a', 'b', 'b', 'a']})
+    with tempfile.TemporaryDirectory() as tmp:
+        store_dir, dataset_store.STORE_DIR = dataset_store.STORE_DIR, tmp
+        cache = DatasetCache()
+        profile_cache.configure(cache)
+        try:
+            dataset_store.save_dataset('trial', df)
+            cache.put('trial', df)
+            with profile_cache.pinned_frame('trial') as frame:
+                assert profile_cache.duplicate_count('trial', frame) == 1
+            assert profile_cache._artifacts['trial']['row_hash'] is not None
+
+            # An edit replaces the frame but keeps its artifact.
+            edited = df.drop_duplicates().reset_index(drop=True)
+            profile_cache.record_edit('trial', df, edited, kept_rows=[0, 1, 3])
+            cache.update_df('trial', edited)
+            assert 'trial' in profile_cache._artifacts
+
+            assert cache.evict('trial')
+            assert 'trial' not in profile_cache._artifacts
+        finally:
+            dataset_store.STORE_DIR = store_dir
+            profile_cache._artifacts.pop('trial', None)
+
+
+if __name__ == '__main__':
+    test_eviction_drops_profile_artifacts()
+    print('Dataset cache tests passed')
@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+sys.path.insert(0, '.')
+import pandas as pd
+from app.services import dataset_store
+
+
+def _frame():
+    return pd.DataFrame({'id': [1, 2, 3], 'age': [30.5, 41.0, 52.5], 'arm': ['a', 'b', 'a']})
+
+
+def test_commit_version_writes_changed_columns_only():
+    df = _frame()
+    with tempfile.TemporaryDirectory() as tmp:
+        store_dir, dataset_store.STORE_DIR = dataset_store.STORE_DIR, tmp
+        try:
+            dataset_store.save_dataset('trial', df)
+            base = dataset_store.generation('trial')
+
+            edited = df.assign(age=df['age'] * 2)
+            manifest = dataset_store.commit_version('trial', edited, 'recode', ['age'])
+            files = dict(map(tuple, manifest['columns']))
+            assert manifest['version'] == 1 and manifest['changed_columns'] == ['age']
+            assert files['id'] == files['arm'] != files['age']
+            assert dataset_store.generation('trial') != base
+
+            assert dataset_store.load_dataset('trial').equals(edited)
+            assert dataset_store.load_version('trial', 0).equals(df)
+            assert dataset_store.load_dataset('trial', ['arm', 'nope']).columns.tolist() == ['arm']
+
+            # Row-level edits write every column.
+            dropped = edited.iloc[:2]
+            manifest = dataset_store.commit_version('trial', dropped, 'remove_duplicates')
+            assert manifest['changed_columns'] is None
+            assert dataset_store.load_dataset('trial').equals(dropped)
+            lineage = dataset_store.list_versions('trial')
+            assert [v['operation'] for v in lineage] == ['ingest', 'recode', 'remove_duplicates']
+        finally:
+            dataset_store.STORE_DIR = store_dir
+
+
+def test_replace_after_versions_keeps_lineage_and_shared_content():
+    df = _frame()
+    with tempfile.TemporaryDirectory() as tmp:
+        store_dir, dataset_store.STORE_DIR = dataset_store.STORE_DIR, tmp
+        try:
+            dataset_store.save_dataset('first', df)
+            dataset_store.register_content('abc', 'first', {'row_count': 3})
+            assert dataset_store.link_content('abc', 'second') == {'row_count': 3}
+            assert dataset_store.link_content('missing', 'third') is None
+
+            dataset_store.commit_version('first', df.assign(arm='c'), 'recode', ['arm'])
+            replaced = df.assign(id=[7, 8, 9])
+            dataset_store.save_dataset('first', replaced)
+            assert dataset_store.current_version('first') == 2
+            assert dataset_store.list_versions('first')[-1]['operation'] == 'replace'
+            assert dataset_store.load_dataset('first').equals(replaced)
+            assert dataset_store.load_version('first', 0).equals(df)
+
+            # The dataset linked to the same upload is not affected.
+            assert dataset_store.load_dataset('second').equals(df)
+            assert os.path.exists(os.path.join(tmp, 'objects', 'abc.arrow'))
+        finally:
+            dataset_store.STORE_DIR = store_dir
+
+
+if __name__ == '__main__':
+    test_commit_version_writes_changed_columns_only()
+    test_replace_after_versions_keeps_lineage_and_shared_content()
+    print('Dataset store tests passed')
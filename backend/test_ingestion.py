@@ -0,0 +1,68 @@
+import os
+import sys
+import tempfile
+sys.path.insert(0, '.')
+import openpyxl
+import pandas as pd
+from app.analytics.ingestion import DataIngestionEngine
+from app.services import dataset_store
+
+
+def test_xlsx_mixed_column_across_chunks():
+    # "code" holds only numbers in the first chunk and text in the second.
+    rows = [(i, i * 10) for i in range(5)] + [(i, f"X{i}") for i in range(5, 9)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'mixed.xlsx')
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.append(['id', 'code'])
+        for row in rows:
+            ws.append(row)
+        wb.save(path)
+
+        ingestion = DataIngestionEngine()
+        ingestion.CONVERT_CHUNK_ROWS = 5
+        df, _ = ingestion.ingest(path)
+        expected = pd.read_excel(path)
+
+    assert len(df) == len(expected) == len(rows)
+    assert df['id'].tolist() == expected['id'].tolist()
+    assert df['code'].tolist() == expected['code'].astype(str).tolist()
+
+
+def test_stream_matches_pandas_ingest():
+    n = 3000
+    frame = pd.DataFrame({
+        'id': range(n),
+        'dose': [None if i % 97 == 0 else i % 40 for i in range(n)],
+        'arm': [f"arm{i % 3}" for i in range(n)],
+        'visit': ['2020-01-01T10:00:00+02:00', '2020-01-07T18:48:11'] * (n // 2),
+        'day': ['2020-01-01'] * n,
+    })
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'visits.csv')
+        frame.to_csv(path, index=False)
+        store_dir, dataset_store.STORE_DIR = dataset_store.STORE_DIR, tmp
+        try:
+            expected, expected_report = DataIngestionEngine().ingest(path)
+            ingestion = DataIngestionEngine()
+            ingestion.STREAM_BLOCK_SIZE = 1 << 14  # several blocks
+            with dataset_store.open_writer('visits') as writer:
+                df, report = ingestion.ingest_stream(path, writer)
+            stored = dataset_store.load_dataset('visits')
+        finally:
+            dataset_store.STORE_DIR = store_dir
+
+    assert report['compaction']['converted'] == expected_report['compaction']['converted']
+    for result in (df, stored):
+        assert result.dtypes.equals(expected.dtypes)
+        for col in expected.columns:
+            assert result[col].equals(expected[col]), col
+    # Dates and times are stored as the text in the file.
+    assert stored['visit'].astype(str).tolist()[:2] == ['2020-01-01T10:00:00+02:00', '2020-01-07T18:48:11']
+
+
+if __name__ == '__main__':
+    test_xlsx_mixed_column_across_chunks()
+    test_stream_matches_pandas_ingest()
+    print('Ingestion tests passed')
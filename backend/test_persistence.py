@@ -0,0 +1,65 @@
+import sys
+import tempfile
+sys.path.insert(0, '.')
+import pandas as pd
+from app.services import dataset_store, persistence
+from app.services.dataset_cache import DatasetCache
+
+
+def test_flush_coalesces_edits_and_requeues_failures():
+    df = pd.DataFrame({'a': [1.0, 2.0, 3.0], 'b': [4.0, 5.0, 6.0]})
+    commits = []
+    with tempfile.TemporaryDirectory() as tmp:
+        store_dir, dataset_store.STORE_DIR = dataset_store.STORE_DIR, tmp
+        delay, persistence.WRITE_DELAY_SECONDS = persistence.WRITE_DELAY_SECONDS, 3600  # flush only
+        commit_version = dataset_store.commit_version
+        cache = DatasetCache()
+        persistence.configure(cache, on_commit=lambda did, manifest, frame: commits.append(manifest))
+        try:
+            dataset_store.save_dataset('trial', df)
+            cache.get('trial')
+
+            # Two edits before a flush become one version.
+            edited = df.assign(a=-df['a'])
+            cache.update_df('trial', edited, dirty=True)
+            persistence.mark_dirty('trial', 'negate', ['a'])
+            edited = edited.assign(b=0.0)
+            cache.update_df('trial', edited, dirty=True)
+            persistence.mark_dirty('trial', 'zero', ['b'])
+            assert persistence.is_pending('trial') and cache.is_dirty('trial')
+            assert not cache.evict('trial')  # unsaved edits stay resident
+
+            assert persistence.flush()
+            assert dataset_store.current_version('trial') == 1
+            assert [m['operation'] for m in commits] == ['negate+zero']
+            assert commits[0]['changed_columns'] == ['a', 'b']
+            assert dataset_store.load_dataset('trial').equals(edited)
+            assert not persistence.is_pending('trial') and not cache.is_dirty('trial')
+
+            # A failed write keeps the edit queued and the entry dirty.
+            def fail(*args, **kwargs):
+                raise OSError('disk full')
+            dataset_store.commit_version = fail
+            persistence.logger.disabled = True  # the failure is expected
+            again = edited.assign(b=1.0)
+            cache.update_df('trial', again, dirty=True)
+            persistence.mark_dirty('trial', 'one', ['b'])
+            assert not persistence.flush()
+            assert persistence.is_pending('trial') and cache.is_dirty('trial')
+            assert dataset_store.current_version('trial') == 1
+
+            dataset_store.commit_version = commit_version
+            assert persistence.flush()
+            assert dataset_store.current_version('trial') == 2
+            assert dataset_store.load_dataset('trial').equals(again)
+            assert not cache.is_dirty('trial')
+        finally:
+            persistence.logger.disabled = False
+            dataset_store.commit_version = commit_version
+            persistence.WRITE_DELAY_SECONDS = delay
+            dataset_store.STORE_DIR = store_dir
+
+
+if __name__ == '__main__':
+    test_flush_coalesces_edits_and_requeues_failures()
+    print('Persistence tests passed')
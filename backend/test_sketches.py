@@ -0,0 +1,31 @@
+import sys
+sys.path.insert(0, '.')
+import numpy as np
+import pandas as pd
+from app.analytics.sketches import HyperLogLog
+
+
+def test_hll_unbiased_between_linear_counting_and_raw():
+    # 40k-80k distinct values at the default precision is 2.5m-5m registers,
+    # where raw HyperLogLog overestimates and linear counting no longer applies.
+    errors = []
+    for n in range(40_000, 80_001, 10_000):
+        for seed in range(4):
+            sketch = HyperLogLog()
+            sketch.update(pd.util.hash_array(np.arange(n) + seed * 10 ** 7))
+            errors.append(sketch.estimate() / n - 1)
+            assert abs(errors[-1]) < 3 * sketch.relative_error, (n, seed, errors[-1])
+    assert abs(np.mean(errors)) < 0.005
+
+
+def test_hll_small_and_empty():
+    sketch = HyperLogLog()
+    assert sketch.estimate() == 0
+    sketch.update(pd.util.hash_array(np.arange(100)))
+    assert round(sketch.estimate()) == 100
+
+
+if __name__ == '__main__':
+    test_hll_unbiased_between_linear_counting_and_raw()
+    test_hll_small_and_empty()
+    print('Sketch tests passed')
@@ -1,9 +1,12 @@
-import React, { useMemo, useState } from 'react';
+import React, { useEffect, useMemo, useState } from 'react';
+import { API_URL } from '../../config';
 import { useDescriptiveStatsStore, ColumnMeta } from '../../store/descriptiveStatsStore';
 import { useStudyStore } from '../../store/studyStore';
 import VariableCard from './VariableCard';
 import VariableStatsPanel from './VariableStatsPanel';
 
+const API_BASE = API_URL ?? '';
+
 type FilterPill = 'all' | 'categorical' | 'continuous' | 'exposure' | 'outcome';
 
 interface Props {
@@ -11,13 +14,51 @@ interface Props {
 }
 
 export default function VariableGrid({ datasetId }: Props) {
-  const { loadedDataset, expandedVariable } = useDescriptiveStatsStore();
+  const { loadedDataset, expandedVariable, cacheVariableStats } = useDescriptiveStatsStore();
   const { exposureVariable, outcomeVariable } = useStudyStore();
   const [search, setSearch]             = useState('');
   const [activeFilter, setActiveFilter] = useState<FilterPill>('all');
 
   const columns: ColumnMeta[] = loadedDataset?.columns ?? [];
 
+  // Prefetch every variable's statistics in one streamed request; the
+  // panels read them from the store cache as each line arrives.
+  useEffect(() => {
+    const variables = columns
+      .filter((col) => col.type !== 'date')
+      .map((col) => ({ name: col.name, type: col.type }));
+    if (variables.length === 0) return;
+    const controller = new AbortController();
+
+    (async () => {
+      const res = await fetch(`${API_BASE}/api/descriptive-stats/variables`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ dataset_id: datasetId, variables, stream: true }),
+        signal: controller.signal,
+      });
+      if (!res.ok || !res.body) return;
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffered = '';
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split('\n');
+        buffered = lines.pop() ?? '';
+        for (const line of lines) {
+          if (!line) continue;
+          const stats = JSON.parse(line);
+          if (stats.variable) cacheVariableStats(stats.variable, stats);
+        }
+      }
+    })().catch(() => { /* panels fall back to per-variable requests */ });
+
+    return () => controller.abort();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [datasetId, loadedDataset]);
+
   const filtered: ColumnMeta[] = useMemo(() => {
     return columns.filter((col) => {
       const matchesSearch = col.name.toLowerCase().includes(search.toLowerCase());
@@ -149,7 +149,7 @@ export default function DataDictionary() {
     setLoadingActive(true);
     setLoadError('');
     try {
-      const data = await api.getDatasetPreview(activeDataset.datasetId);
+      const data = await api.getDatasetRows(activeDataset.datasetId);
       const headers = (data.headers || []).map((h: unknown) => String(h));
       const rows = (data.rows || []).map((row: Record<string, unknown>) => {
         const normalized: Record<string, string> = {};
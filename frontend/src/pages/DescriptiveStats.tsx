@@ -86,8 +86,8 @@ export default function DescriptiveStats() {
         }));
       }
 
-      // 2. Also fetch preview (always — for nRows + fallback typing)
-      const previewRes = await fetch(`${API_BASE}/dataset/${datasetId}/preview`);
+      // 2. Also fetch a preview page (always — for nRows + fallback typing)
+      const previewRes = await fetch(`${API_BASE}/dataset/${datasetId}/preview?limit=200`);
       if (!previewRes.ok && columns.length === 0) {
         throw new Error('Unable to load dataset. Please try uploading again.');
       }
@@ -58,7 +58,7 @@ export default function GuidedAnalysis() {
     setLoading(true);
     setError('');
     try {
-      const preview = await api.getDatasetPreview(activeDataset.datasetId);
+      const preview = await api.getDatasetRows(activeDataset.datasetId);
       const hydrated = previewToUploadResult(preview);
       setUploadResult(hydrated);
       setDatasetId(activeDataset.datasetId);
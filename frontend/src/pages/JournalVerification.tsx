@@ -102,7 +102,7 @@ export default function JournalVerification() {
     setLoading(true);
     setError('');
     try {
-      const preview = await api.getDatasetPreview(activeDataset.datasetId);
+      const preview = await api.getDatasetRows(activeDataset.datasetId);
       const hydrated = previewToUploadResult(preview);
       setUploadResult(hydrated);
       setDatasetId(activeDataset.datasetId);
@@ -54,7 +54,7 @@ export default function NGOPipeline() {
     setLoading(true);
     setError('');
     try {
-      const preview = await api.getDatasetPreview(activeDataset.datasetId);
+      const preview = await api.getDatasetRows(activeDataset.datasetId);
       const hydrated = previewToUploadResult(preview);
       setUploadResult(hydrated);
       setDatasetId(activeDataset.datasetId);
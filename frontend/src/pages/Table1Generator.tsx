@@ -145,7 +145,7 @@ export default function Table1Generator() {
     setLoadingActive(true);
     setLoadError('');
     try {
-      const data = await api.getDatasetPreview(activeDataset.datasetId);
+      const data = await api.getDatasetRows(activeDataset.datasetId);
       const normalizedRows: Record<string, string>[] = (data.rows || []).map((row: Record<string, unknown>) => {
         const normalized: Record<string, string> = {};
         Object.entries(row).forEach(([key, value]) => {
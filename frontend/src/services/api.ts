@@ -14,12 +14,52 @@ export const api = {
     return res.json();
   },
 
-  getDatasetPreview: async (datasetId: string) => {
-    const res = await fetch(`${API_URL}/dataset/${datasetId}/preview`);
+  getDatasetPreview: async (
+    datasetId: string,
+    page?: {
+      offset?: number;
+      limit?: number;
+      columns?: string[];
+      sortBy?: string;
+      descending?: boolean;
+      filterColumn?: string;
+      filterOperator?: string;
+      filterValue?: string;
+    },
+  ) => {
+    // Without a limit the backend returns its default page (1000 rows).
+    const params = new URLSearchParams();
+    if (page?.offset != null) params.set('offset', String(page.offset));
+    if (page?.limit != null) params.set('limit', String(page.limit));
+    page?.columns?.forEach((c) => params.append('columns', c));
+    if (page?.sortBy) params.set('sort_by', page.sortBy);
+    if (page?.descending) params.set('descending', 'true');
+    if (page?.filterColumn) {
+      params.set('filter_column', page.filterColumn);
+      params.set('filter_operator', page.filterOperator || 'equals');
+      params.set('filter_value', page.filterValue ?? '');
+    }
+    const query = params.toString();
+    const res = await fetch(`${API_URL}/dataset/${datasetId}/preview${query ? `?${query}` : ''}`);
     if (!res.ok) throw new Error(await res.text());
     return res.json();
   },
 
+  // Every row of the dataset, fetched page by page (the preview endpoint
+  // caps each response at 10000 rows).
+  getDatasetRows: async (datasetId: string): Promise<any> => {
+    const limit = 10000;
+    const first = await api.getDatasetPreview(datasetId, { limit });
+    const rows = [...(first.rows || [])];
+    let more = first.has_more;
+    while (more) {
+      const page = await api.getDatasetPreview(datasetId, { offset: rows.length, limit });
+      rows.push(...(page.rows || []));
+      more = page.has_more && (page.rows || []).length > 0;
+    }
+    return { ...first, rows, has_more: false };
+  },
+
   createStudy: async (payload: object) => {
     const res = await fetch(`${API_URL}/study`, {
       method: 'POST',